@@ -3,10 +3,11 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 
 from backend.core.config import settings
-from backend.routes import health, infer, batch_sync, batch_async
+from backend.routes import health, infer, batch_sync, batch_async, upload, metrics
 from backend.core.startup import register_startup_events
 
 
@@ -19,11 +20,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE)
 
 app.include_router(health.router)
 app.include_router(infer.router)
 app.include_router(batch_sync.router)
 app.include_router(batch_async.router)
+app.include_router(upload.router)
+app.include_router(metrics.router)
 register_startup_events(app)
 
 if __name__ == "__main__":
@@ -1,25 +1,290 @@
 import os
-from typing import Any, Dict
-import requests
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Dict, Optional
+import httpx
 from fastapi import HTTPException
 from backend.core.config import settings
+from shared.metrics import REGISTRY
+from backend.core.wire import JSON_TYPE, accept_headers, decode_body, encode_body
 
 AUTH_HEADER_NAME = os.getenv("AUTH_HEADER_NAME", "Authorization")
 AUTH_SCHEME = os.getenv("AUTH_SCHEME", "Bearer")
 
-def forward_request(base_url: str | None, endpoint: str = "", data: Any = None,
-                    method: str = "POST", timeout: float | tuple[float,float] | None = None) -> Any:
+# Safe to resend after a response-side failure; other methods are only retried
+# when the request never reached the server (connect / pool errors).
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {429, 502, 503, 504}
+# A remote that cannot read the compact body answers 415 (the endpoint's
+# decode failure; 422 is a bad requisition and is not retried). The request is
+# resent as JSON, and later requests use JSON for WIRE_JSON_FALLBACK_S.
+UNSUPPORTED_BODY_STATUS = 415
+
+_client: Optional[httpx.AsyncClient] = None
+_json_until = 0.0  # monotonic deadline of the JSON fallback
+
+class RemoteError(HTTPException):
+    """The remote failed (network error, timeout or 5xx); counts against the circuit breaker."""
+
+class CircuitBreaker:
+    """
+    Fails fast while the remote is known to be down.
+
+    closed: calls go through; `failure_threshold` consecutive failures (errors,
+    5xx, or calls slower than `slow_call_s` per item they carry) open the breaker.
+    open: calls are rejected with 503 + Retry-After for `open_s` seconds.
+    half_open: up to `half_open_calls` trial calls go through; a success closes
+    the breaker, a failure opens it again. A successful health probe moves an
+    open breaker to half_open early.
+    """
+    def __init__(self, failure_threshold: int, open_s: float, slow_call_s: float, half_open_calls: int = 1) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_s = open_s
+        self.slow_call_s = slow_call_s
+        self.half_open_calls = max(1, half_open_calls)
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trials = 0
+        self.transitions: deque = deque(maxlen=20)
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0}
+
+    def _move(self, state: str, reason: str) -> None:
+        if state == self.state:
+            return
+        self.transitions.append({"at": round(time.time(), 3), "from": self.state, "to": state, "reason": reason})
+        self.state = state
+        self.opened_at = time.monotonic() if state == "open" else None
+        self._trials = 0
+        if state == "closed":
+            self.failures = 0
+
+    def before_call(self) -> bool:
+        """Admit a call or raise 503; returns True for a half-open trial call."""
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.open_s:
+            self._move("half_open", f"open for {self.open_s:g}s")
+        if self.state == "closed":
+            self._stats["calls"] += 1
+            return False
+        if self.state == "half_open" and self._trials < self.half_open_calls:
+            self._trials += 1
+            self._stats["calls"] += 1
+            return True
+        self._stats["rejected"] += 1
+        retry_after = self.open_s - (time.monotonic() - self.opened_at) if self.opened_at is not None else 1
+        raise HTTPException(status_code=503, detail="Remote endpoint unavailable (circuit breaker open)",
+                            headers={"Retry-After": str(max(1, round(retry_after)))})
+
+    def record_success(self, trial: bool, elapsed_s: float, items: int = 1) -> None:
+        """A multi-item call (a batch chunk) is slow when it averages more than `slow_call_s` per item."""
+        if elapsed_s / max(1, items) > self.slow_call_s:
+            self._stats["slow_calls"] += 1
+            self.record_failure(trial, f"slow call ({elapsed_s:.1f}s for {items} item(s))")
+            return
+        if trial:
+            self._move("closed", "trial call succeeded")
+        elif self.state == "closed":
+            self.failures = 0
+
+    def record_failure(self, trial: bool, reason: str) -> None:
+        self._stats["failures"] += 1
+        if trial:
+            self._move("open", f"trial call failed: {reason}")
+        elif self.state == "closed":
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._move("open", f"{self.failures} consecutive failures, last: {reason}")
+
+    def abandon(self, trial: bool) -> None:
+        """The caller went away before an outcome; give the trial slot back."""
+        if trial and self.state == "half_open":
+            self._trials -= 1
+
+    def probe_succeeded(self) -> None:
+        if self.state == "open":
+            self._move("half_open", "health probe succeeded")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.opened_at is not None else None,
+            "failure_threshold": self.failure_threshold,
+            "open_s": self.open_s,
+            "slow_call_s": self.slow_call_s,
+            **self._stats,
+            "transitions": list(self.transitions),
+        }
+
+breaker = CircuitBreaker(settings.BREAKER_FAILURES, settings.BREAKER_OPEN_S,
+                         settings.BREAKER_SLOW_CALL_S, settings.BREAKER_HALF_OPEN_CALLS)
+
+REGISTRY.gauge("backend_remote_breaker_state", "Circuit breaker state for the remote (1 = current)", ("state",),
+               fn=lambda: {s: int(breaker.state == s) for s in ("closed", "open", "half_open")})
+REGISTRY.gauge("backend_remote_breaker_rejected", "Calls rejected while the breaker was open",
+               fn=lambda: breaker.stats()["rejected"])
+
+class RemoteHealth:
+    """
+    Last result of the background health probe, so /health never waits on the remote.
+    probe() bypasses the breaker; a success while it is open moves it to half_open.
+    """
+    def __init__(self) -> None:
+        self.status: Dict[str, Any] = {"status": "unknown"}
+        self.checked_at: Optional[float] = None
+        self.consecutive_failures = 0
+
+    async def probe(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            remote = await forward_request(settings.MODAL_HEALTH_CHECK_URL, method="GET",
+                                           timeout=settings.HEALTH_PROBE_TIMEOUT_S, retries=0, use_breaker=False)
+        except Exception as e:
+            self.consecutive_failures += 1
+            error = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+            self.status = {"status": "error", "error": error, "consecutive_failures": self.consecutive_failures}
+        else:
+            self.consecutive_failures = 0
+            self.status = {"status": "ok", "latency_ms": int((time.perf_counter() - t0) * 1000), "remote": remote}
+            breaker.probe_succeeded()
+        self.checked_at = time.time()
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        age = round(time.time() - self.checked_at, 1) if self.checked_at is not None else None
+        return {**self.status, "checked_at": self.checked_at, "age_s": age, "breaker": breaker.stats()}
+
+remote_health = RemoteHealth()
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.MODAL_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.MODAL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MODAL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.MODAL_KEEPALIVE_EXPIRY,
+        ),
+        timeout=_timeout(None, "POST"),
+        headers=accept_headers(),
+    )
+
+async def init_client() -> httpx.AsyncClient:
+    """Create the shared pooled client (app startup)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+async def close_client() -> None:
+    """Close the shared client and its connections (app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()  # used outside the app lifespan (scripts, tests)
+    return _client
+
+def _timeout(timeout: float | tuple[float, float] | None, method: str) -> httpx.Timeout:
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = settings.MODAL_CONNECT_TIMEOUT
+        read = timeout or (60 if method == "GET" else settings.MODAL_READ_TIMEOUT)
+    return httpx.Timeout(
+        connect=connect,
+        read=read,
+        write=settings.MODAL_WRITE_TIMEOUT,
+        pool=settings.MODAL_POOL_TIMEOUT,
+    )
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(settings.MODAL_BACKOFF_MAX, settings.MODAL_BACKOFF_BASE * (2 ** attempt)))
+
+async def forward_request(base_url: str | None, endpoint: str = "", data: Any = None,
+                          method: str = "POST", timeout: float | tuple[float,float] | None = None,
+                          retries: int | None = None, use_breaker: bool = True, items: int = 1) -> Any:
+    """
+    Call the remote with retries. Unless use_breaker=False (health probes),
+    the call goes through the circuit breaker and fails fast while it is open.
+    `items` is how many requisitions the call carries, for the breaker's slow-call check.
+    """
     if not base_url:
         raise HTTPException(status_code=503, detail="Remote base URL not configured.")
-    url = base_url.rstrip("/") + endpoint
-    headers: Dict[str, str] = {"Content-Type": "application/json"}
+    if not use_breaker:
+        return await _send(base_url, endpoint, data, method, timeout, retries)
+
+    trial = breaker.before_call()
+    t0 = time.perf_counter()
     try:
-        r = requests.get(url, headers=headers, timeout=timeout or 60) if method.upper()=="GET" \
-            else requests.post(url, json=data, headers=headers, timeout=timeout or 180)
-        r.raise_for_status()
+        res = await _send(base_url, endpoint, data, method, timeout, retries)
+    except RemoteError as e:
+        breaker.record_failure(trial, str(e.detail))
+        raise
+    except HTTPException:
+        breaker.record_success(trial, time.perf_counter() - t0, items)  # the remote answered (4xx)
+        raise
+    except BaseException:
+        breaker.abandon(trial)
+        raise
+    breaker.record_success(trial, time.perf_counter() - t0, items)
+    return res
+
+async def _send(base_url: str, endpoint: str, data: Any, method: str,
+                timeout: float | tuple[float,float] | None, retries: int | None) -> Any:
+    global _json_until
+    url = base_url.rstrip("/") + endpoint
+    method = method.upper()
+    idempotent = method in IDEMPOTENT_METHODS
+    attempts = 1 + (settings.MODAL_RETRIES if retries is None else retries)
+    client = get_client()
+
+    json_only = time.monotonic() < _json_until
+    attempt = 0
+    while attempt < attempts:
+        last = attempt == attempts - 1
+        headers: Dict[str, str] = accept_headers()
+        body = None
+        if method != "GET":
+            body, body_headers = encode_body(data, json_only=json_only)
+            headers.update(body_headers)
         try:
-            return r.json()
-        except ValueError:
-            return {"status_code": r.status_code, "text": r.text}
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=502, detail=f"Error contacting {url}: {e}")
+            r = await client.request(
+                method, url,
+                content=body,
+                headers=headers,
+                timeout=_timeout(timeout, method),
+            )
+            if body is not None and headers.get("Content-Type") != JSON_TYPE and r.status_code == UNSUPPORTED_BODY_STATUS:
+                json_only = True  # negotiate down and resend without spending an attempt
+                _json_until = time.monotonic() + settings.WIRE_JSON_FALLBACK_S
+                continue
+            if idempotent and not last and r.status_code in RETRY_STATUSES:
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+            r.raise_for_status()
+            try:
+                # Content-Encoding (gzip/zstd) is already undone by httpx.
+                return decode_body(r.content, r.headers.get("Content-Type"))
+            except ValueError:
+                return {"status_code": r.status_code, "text": r.text}
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            if last:
+                raise RemoteError(status_code=502, detail=f"Error contacting {url}: {e}")
+            await asyncio.sleep(_backoff(attempt))
+        except httpx.HTTPStatusError as e:
+            # RETRY_STATUSES were retried above; any other status is final.
+            client_error = e.response.status_code < 500
+            raise (HTTPException if client_error else RemoteError)(status_code=502, detail=f"Error contacting {url}: {e}")
+        except httpx.HTTPError as e:
+            if last or not idempotent:
+                raise RemoteError(status_code=502, detail=f"Error contacting {url}: {e}")
+            await asyncio.sleep(_backoff(attempt))
+        attempt += 1
@@ -0,0 +1,238 @@
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+from backend.core.config import settings
+from shared.metrics import REGISTRY, Histogram
+
+def overloaded(status_code: int, detail: str, retry_after_s: float) -> HTTPException:
+    return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(max(1, round(retry_after_s)))})
+
+class AdmissionGate:
+    """
+    At most `limit` concurrent holders and at most `queue_size` waiters (FIFO).
+
+    A caller that finds the queue full is rejected at once with 429; one that
+    waits longer than `queue_timeout_s` gets 503. Both carry Retry-After.
+    enter() is synchronous, so a handler can learn that it was rejected before
+    starting any background work and wait for its turn later.
+    """
+    def __init__(self, name: str, limit: int, queue_size: int,
+                 queue_timeout_s: Optional[float], retry_after_s: float) -> None:
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout_s = queue_timeout_s
+        self.retry_after_s = retry_after_s
+        self.in_use = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._stats = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0}
+        self.wait_ms = Histogram(buckets=(1, 10, 100, 500, 1000, 5000, 10000, 30000, 60000))
+
+    def enter(self) -> Optional[asyncio.Future]:
+        """Admit now (None), or queue and return the future that resolves on admission; 429 if the queue is full."""
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            self._stats["admitted"] += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self._stats["rejected_full"] += 1
+            raise overloaded(429, f"Too many {self.name} requests; try again later", self.retry_after_s)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._stats["queued"] += 1
+        return fut
+
+    async def wait(self, ticket: Optional[asyncio.Future], timeout: Optional[float] = -1) -> None:
+        """Wait for a ticket from enter(); `timeout` defaults to queue_timeout_s (None waits forever)."""
+        if ticket is None:
+            return
+        timeout = self.queue_timeout_s if timeout == -1 else timeout
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait({ticket}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(ticket)
+            raise
+        self.wait_ms.observe((time.perf_counter() - t0) * 1000)
+        if not ticket.done():
+            self._abandon(ticket)
+            self._stats["rejected_timeout"] += 1
+            raise overloaded(503, f"Timed out waiting for a {self.name} slot", self.retry_after_s)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _abandon(self, ticket: asyncio.Future) -> None:
+        if ticket.done() and not ticket.cancelled():
+            self.release()  # admitted while we were giving up
+            return
+        ticket.cancel()
+        try:
+            self._waiters.remove(ticket)
+        except ValueError:
+            pass
+
+    async def acquire(self) -> None:
+        await self.wait(self.enter())
+
+    def release(self) -> None:
+        self.in_use -= 1
+        while self._waiters and self.in_use < self.limit:
+            fut = self._waiters.popleft()
+            if fut.cancelled():
+                continue
+            self.in_use += 1
+            self._stats["admitted"] += 1
+            fut.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "queue_size": self.queue_size,
+            **self._stats,
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+class FairScheduler:
+    """
+    Slots for remote extraction calls shared by interactive traffic and batch jobs.
+
+    Interactive callers (lane None) are always served first. Batch calls are
+    identified by their job and together hold at most `batch_limit` slots, so
+    part of the capacity is always left for /infer; waiting jobs take turns
+    round-robin, one call each, so a huge job cannot starve a small one.
+    """
+    def __init__(self, limit: int, batch_limit: int) -> None:
+        self.limit = max(1, limit)
+        self.batch_limit = max(1, min(batch_limit, self.limit))
+        self.in_use = 0
+        self.batch_in_use = 0
+        self._interactive: Deque[asyncio.Future] = deque()
+        self._batch: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._stats = {"interactive_calls": 0, "batch_calls": 0}
+        self.wait_ms = Histogram(buckets=(1, 10, 100, 500, 1000, 5000, 10000, 30000))
+
+    def _grant(self) -> None:
+        while self.in_use < self.limit:
+            if self._interactive:
+                fut = self._interactive.popleft()
+            elif self._batch and self.batch_in_use < self.batch_limit:
+                lane, queue = next(iter(self._batch.items()))
+                fut = queue.popleft()
+                if queue:
+                    self._batch.move_to_end(lane)  # next job's turn
+                else:
+                    del self._batch[lane]
+                if not fut.cancelled():
+                    self.batch_in_use += 1
+            else:
+                return
+            if fut.cancelled():
+                continue
+            self.in_use += 1
+            fut.set_result(None)
+
+    async def acquire(self, lane: Optional[str] = None) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        if lane is None:
+            self._interactive.append(fut)
+        else:
+            self._batch.setdefault(lane, deque()).append(fut)
+        self._grant()
+        if fut.done():
+            return
+        t0 = time.perf_counter()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(lane)
+            else:
+                fut.cancel()  # skipped by _grant
+            raise
+        self.wait_ms.observe((time.perf_counter() - t0) * 1000)
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for f in self._interactive if not f.cancelled()) + sum(len(q) for q in self._batch.values())
+
+    def release(self, lane: Optional[str] = None) -> None:
+        self.in_use -= 1
+        if lane is not None:
+            self.batch_in_use -= 1
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None) -> AsyncIterator[None]:
+        await self.acquire(lane)
+        self._stats["batch_calls" if lane is not None else "interactive_calls"] += 1
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "batch_limit": self.batch_limit,
+            "in_use": self.in_use,
+            "batch_in_use": self.batch_in_use,
+            "interactive_waiting": sum(1 for f in self._interactive if not f.cancelled()),
+            "batch_waiting": {lane: len(q) for lane, q in self._batch.items()},
+            **self._stats,
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+_infer_gate: Optional[AdmissionGate] = None
+_job_gate: Optional[AdmissionGate] = None
+_remote: Optional[FairScheduler] = None
+
+def infer_gate() -> AdmissionGate:
+    """In-flight /infer requests (including uploads)."""
+    global _infer_gate
+    if _infer_gate is None:
+        _infer_gate = AdmissionGate("inference", settings.INFER_MAX_INFLIGHT, settings.INFER_QUEUE_SIZE,
+                                    settings.INFER_QUEUE_TIMEOUT_S, settings.ADMISSION_RETRY_AFTER_S)
+    return _infer_gate
+
+def job_gate() -> AdmissionGate:
+    """Running batch jobs (async and sync); queued async jobs wait without a timeout."""
+    global _job_gate
+    if _job_gate is None:
+        _job_gate = AdmissionGate("batch", settings.BATCH_MAX_JOBS, settings.BATCH_MAX_QUEUED_JOBS,
+                                  settings.BATCH_QUEUE_TIMEOUT_S, settings.ADMISSION_RETRY_AFTER_S)
+    return _job_gate
+
+def remote_scheduler() -> FairScheduler:
+    global _remote
+    if _remote is None:
+        limit = settings.REMOTE_MAX_INFLIGHT
+        _remote = FairScheduler(limit, int(limit * settings.REMOTE_BATCH_SHARE))
+    return _remote
+
+def _gates() -> Dict[str, Any]:
+    return {"infer": infer_gate(), "batch_jobs": job_gate(), "remote": remote_scheduler()}
+
+REGISTRY.gauge("backend_inflight", "Requests holding a slot, per admission gate", ("gate",),
+               fn=lambda: {name: g.in_use for name, g in _gates().items()})
+REGISTRY.gauge("backend_waiting", "Requests queued for a slot, per admission gate", ("gate",),
+               fn=lambda: {name: g.waiting for name, g in _gates().items()})
+
+def admission_stats() -> Dict[str, Any]:
+    return {"infer": infer_gate().stats(), "batch_jobs": job_gate().stats(), "remote": remote_scheduler().stats()}
@@ -14,6 +14,95 @@ class Settings:
     MODAL_HEALTH_CHECK_URL: str | None = os.getenv("MODAL_HEALTH_CHECK_URL")
     PROCESS_START_TIME: float = time.time()
 
+    # remote HTTP client (shared pool)
+    MODAL_HTTP2: bool = _as_bool(os.getenv("MODAL_HTTP2"), True)
+    MODAL_MAX_CONNECTIONS: int = int(os.getenv("MODAL_MAX_CONNECTIONS", "100"))
+    MODAL_MAX_KEEPALIVE: int = int(os.getenv("MODAL_MAX_KEEPALIVE", "20"))
+    MODAL_KEEPALIVE_EXPIRY: float = float(os.getenv("MODAL_KEEPALIVE_EXPIRY", "60"))
+    MODAL_CONNECT_TIMEOUT: float = float(os.getenv("MODAL_CONNECT_TIMEOUT", "10"))
+    MODAL_READ_TIMEOUT: float = float(os.getenv("MODAL_READ_TIMEOUT", "180"))
+    MODAL_WRITE_TIMEOUT: float = float(os.getenv("MODAL_WRITE_TIMEOUT", "30"))
+    MODAL_POOL_TIMEOUT: float = float(os.getenv("MODAL_POOL_TIMEOUT", "10"))
+    MODAL_RETRIES: int = int(os.getenv("MODAL_RETRIES", "3"))
+    MODAL_BACKOFF_BASE: float = float(os.getenv("MODAL_BACKOFF_BASE", "0.25"))
+    MODAL_BACKOFF_MAX: float = float(os.getenv("MODAL_BACKOFF_MAX", "4"))
+
+    # circuit breaker + background health probe
+    BREAKER_FAILURES: int = int(os.getenv("BREAKER_FAILURES", "5"))  # consecutive failures that open it
+    BREAKER_OPEN_S: float = float(os.getenv("BREAKER_OPEN_S", "30"))  # fail fast this long before a trial call
+    BREAKER_SLOW_CALL_S: float = float(os.getenv("BREAKER_SLOW_CALL_S", "120"))  # slower calls (per item) count as failures
+    BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "1"))
+    HEALTH_PROBE_INTERVAL_S: float = float(os.getenv("HEALTH_PROBE_INTERVAL_S", "15"))
+    HEALTH_PROBE_TIMEOUT_S: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_S", "10"))
+
+    # wire format backend <-> Modal (JSON is the fallback)
+    WIRE_FORMAT: str = os.getenv("WIRE_FORMAT", "msgpack")  # msgpack | json
+    WIRE_COMPRESSION: str = os.getenv("WIRE_COMPRESSION", "zstd")  # zstd | gzip | none
+    WIRE_COMPRESS_MIN_BYTES: int = int(os.getenv("WIRE_COMPRESS_MIN_BYTES", "1024"))
+    WIRE_JSON_FALLBACK_S: float = float(os.getenv("WIRE_JSON_FALLBACK_S", "300"))  # JSON only, after a 415
+    GZIP_MIN_SIZE: int = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+
+    # batch
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_EVENT_ORDER: str = os.getenv("BATCH_EVENT_ORDER", "completion")  # completion | input
+    BATCH_CHUNK_MAX_ITEMS: int = int(os.getenv("BATCH_CHUNK_MAX_ITEMS", "8"))
+    BATCH_CHUNK_MAX_BYTES: int = int(os.getenv("BATCH_CHUNK_MAX_BYTES", "4000000"))
+    BATCH_CHUNK_GROWTH: float = float(os.getenv("BATCH_CHUNK_GROWTH", "2"))
+    BATCH_CHUNK_TARGET_MS: float = float(os.getenv("BATCH_CHUNK_TARGET_MS", "60000"))  # slower calls halve the chunk size
+    DATASET_QUEUE_SIZE: int = int(os.getenv("DATASET_QUEUE_SIZE", "256"))  # items read ahead of the runner
+    BATCH_DEDUP: bool = _as_bool(os.getenv("BATCH_DEDUP"), True)  # one extraction per (PDF, label)
+
+    # admission control (429/503 + Retry-After when full)
+    INFER_MAX_INFLIGHT: int = int(os.getenv("INFER_MAX_INFLIGHT", "32"))
+    INFER_QUEUE_SIZE: int = int(os.getenv("INFER_QUEUE_SIZE", "128"))
+    INFER_QUEUE_TIMEOUT_S: float = float(os.getenv("INFER_QUEUE_TIMEOUT_S", "30"))
+    BATCH_MAX_JOBS: int = int(os.getenv("BATCH_MAX_JOBS", "2"))  # running batch jobs, async + sync
+    BATCH_MAX_QUEUED_JOBS: int = int(os.getenv("BATCH_MAX_QUEUED_JOBS", "8"))
+    BATCH_QUEUE_TIMEOUT_S: float = float(os.getenv("BATCH_QUEUE_TIMEOUT_S", "120"))  # sync /batch only
+    REMOTE_MAX_INFLIGHT: int = int(os.getenv("REMOTE_MAX_INFLIGHT", "16"))  # concurrent calls to the scheduler
+    REMOTE_BATCH_SHARE: float = float(os.getenv("REMOTE_BATCH_SHARE", "0.75"))  # of those, at most this share for batches
+    ADMISSION_RETRY_AFTER_S: float = float(os.getenv("ADMISSION_RETRY_AFTER_S", "5"))
+
+    # SSE
+    SSE_HEARTBEAT_S: float = float(os.getenv("SSE_HEARTBEAT_S", "15"))
+
+    # batch job store
+    JOB_STORE: str = os.getenv("JOB_STORE", "sqlite")  # sqlite | memory
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", ".data/jobs.sqlite3")
+    JOB_TTL_S: float = float(os.getenv("JOB_TTL_S", str(24 * 3600)))  # finished jobs are deleted after this
+    JOB_MEMORY_TTL_S: float = float(os.getenv("JOB_MEMORY_TTL_S", "600"))  # sqlite: drop from memory, keep on disk
+    JOB_EVICT_INTERVAL_S: float = float(os.getenv("JOB_EVICT_INTERVAL_S", "300"))
+
+    # /infer micro-batching
+    MICROBATCH_ENABLED: bool = _as_bool(os.getenv("MICROBATCH_ENABLED"), False)
+    MICROBATCH_MAX_SIZE: int = int(os.getenv("MICROBATCH_MAX_SIZE", "16"))
+    MICROBATCH_MAX_WAIT_MS: float = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+    # backend result cache (content hash + label -> extracted fields)
+    RESULT_CACHE_ENABLED: bool = _as_bool(os.getenv("RESULT_CACHE_ENABLED"), True)
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESULT_CACHE_PATH: str = os.getenv("RESULT_CACHE_PATH", "")  # empty = memory only
+    RESULT_CACHE_SAVE_EVERY: int = int(os.getenv("RESULT_CACHE_SAVE_EVERY", "50"))
+
+    # uploads (/infer/upload, /batch/upload)
+    UPLOAD_MAX_FILE_BYTES: int = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+    UPLOAD_MAX_REQUEST_BYTES: int = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(1024 * 1024 * 1024)))
+    UPLOAD_MAX_FILES: int = int(os.getenv("UPLOAD_MAX_FILES", "1000"))
+    UPLOAD_SPOOL_BYTES: int = int(os.getenv("UPLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)))  # larger parts go to a temp file
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "")  # batch upload staging; empty = system temp dir
+
+    # PDF parsing
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", "0"))  # 0 = CPUs available to the process
+    PARSE_MAX_TASKS_PER_CHILD: int = int(os.getenv("PARSE_MAX_TASKS_PER_CHILD", "200"))  # recycle workers; 0 = never
+    PARSE_TIMEOUT_S: float = float(os.getenv("PARSE_TIMEOUT_S", "30"))  # per document; 0 = no limit
+    PARSE_START_METHOD: str = os.getenv("PARSE_START_METHOD", "forkserver")  # forkserver | spawn
+    PARSE_MAX_PAGES: int = int(os.getenv("PARSE_MAX_PAGES", "0"))  # pages read per PDF; 0 = all
+    PARSE_MAX_CHARS: int = int(os.getenv("PARSE_MAX_CHARS", "0"))  # characters of text sent per PDF; 0 = no limit
+    PARSE_CACHE_ENABLED: bool = _as_bool(os.getenv("PARSE_CACHE_ENABLED"), True)  # parsed text on disk, by PDF hash
+    PARSE_CACHE_DIR: str = os.getenv("PARSE_CACHE_DIR", ".data/parse_cache")
+    PARSE_CACHE_MAX_BYTES: int = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    PREFETCH_DEPTH: int = int(os.getenv("PREFETCH_DEPTH", "16"))  # >= BATCH_CHUNK_MAX_ITEMS to overlap whole chunks
+
     # warmup
     WARMUP_ON_STARTUP: bool = _as_bool(os.getenv("WARMUP_ON_STARTUP", "true"), True)
     WARMUP_KIND: str = os.getenv("WARMUP_KIND", "infer")
@@ -21,6 +110,16 @@ class Settings:
     WARMUP_TIMEOUT_CONNECT: float = float(os.getenv("WARMUP_TIMEOUT_CONNECT", "5"))
     WARMUP_TIMEOUT_READ: float = float(os.getenv("WARMUP_TIMEOUT_READ", "10"))
 
+    # keep-warm controller (WARMUP_ON_STARTUP pings once at boot whether or not it is enabled)
+    MODAL_KEEP_WARM_URL: str | None = os.getenv("MODAL_KEEP_WARM_URL")  # cheap ping; periodic pings need it
+    KEEP_WARM_ENABLED: bool = _as_bool(os.getenv("KEEP_WARM_ENABLED", "true"), True)
+    KEEP_WARM_WINDOW_S: float = float(os.getenv("KEEP_WARM_WINDOW_S", "3600"))  # traffic is "expected" while
+    KEEP_WARM_MIN_REQUESTS: int = int(os.getenv("KEEP_WARM_MIN_REQUESTS", "1"))  # this many calls in the window
+    KEEP_WARM_INTERVAL_S: float = float(os.getenv("KEEP_WARM_INTERVAL_S", "600"))  # < Modal scaledown_window
+    KEEP_WARM_IDLE_S: float = float(os.getenv("KEEP_WARM_IDLE_S", "1200"))  # = Modal scaledown_window
+    KEEP_WARM_MAX_PREWARM: int = int(os.getenv("KEEP_WARM_MAX_PREWARM", "4"))  # containers started before a batch
+    KEEP_WARM_TIMEOUT_S: float = float(os.getenv("KEEP_WARM_TIMEOUT_S", "120"))
+
     # warmup via infer
     WARMUP_INFER_LABEL: str = os.getenv("WARMUP_INFER_LABEL", "warmup")
     WARMUP_INFER_SCHEMA_JSON: str = os.getenv("WARMUP_INFER_SCHEMA_JSON", '{"warmup": ""}')
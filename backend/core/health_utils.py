@@ -1,6 +1,13 @@
 import time
 from typing import Dict, Any
+from backend.core.admission import admission_stats
 from backend.core.config import settings
+from backend.services.extraction_service import microbatch_stats
+from backend.services.keep_warm import get_keep_warm
+from backend.services.result_cache import get_result_cache
+from backend.models.job_store import get_job_store
+from backend.parsing.parse_cache import get_parse_cache
+from backend.parsing.parse_pool import get_parse_service
 
 def local_health_payload() -> Dict[str, Any]:
     uptime_s = int(time.time() - settings.PROCESS_START_TIME)
@@ -12,4 +19,11 @@ def local_health_payload() -> Dict[str, Any]:
             "MODAL_EXTRACTION_URL": bool(settings.MODAL_EXTRACTION_URL),
             "MODAL_HEALTH_CHECK_URL": bool(settings.MODAL_HEALTH_CHECK_URL),
         },
+        "microbatcher": microbatch_stats(),
+        "admission": admission_stats(),
+        "keep_warm": get_keep_warm().stats(),
+        "jobs": get_job_store().stats(),
+        "parse_pool": get_parse_service().stats(),
+        "parse_cache": parse_cache.stats() if (parse_cache := get_parse_cache()) else {"enabled": False},
+        "result_cache": cache.stats() if (cache := get_result_cache()) else {"enabled": False},
     }
@@ -1,6 +1,18 @@
 import json
-from typing import Any
-from fastapi.responses import Response
+from typing import Any, Iterable, Iterator, Optional
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is the fallback
+    orjson = None
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def dumps_compact(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 def pretty_response(payload: Any) -> Response:
     return Response(
@@ -15,3 +27,38 @@ def pretty_download(payload: Any, filename: str) -> Response:
     )
     resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
     return resp
+
+def _buffered(parts: Iterable[bytes]) -> Iterator[bytes]:
+    # Coalesce small per-item writes into ~STREAM_CHUNK_BYTES chunks.
+    buf = bytearray()
+    for part in parts:
+        buf += part
+        if len(buf) >= STREAM_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+def _json_array(items: Iterable[Any]) -> Iterator[bytes]:
+    yield b"["
+    for n, item in enumerate(items):
+        yield (b"," if n else b"") + dumps_compact(item)
+    yield b"]"
+
+def _ndjson(items: Iterable[Any]) -> Iterator[bytes]:
+    for item in items:
+        yield dumps_compact(item) + b"\n"
+
+def stream_items(items: Iterable[Any], ndjson: bool = False, filename: Optional[str] = None) -> StreamingResponse:
+    """
+    Serialize items one at a time as a compact JSON array (or NDJSON), so
+    memory stays flat and the first bytes go out immediately.
+    """
+    body = _ndjson(items) if ndjson else _json_array(items)
+    resp = StreamingResponse(
+        _buffered(body),
+        media_type="application/x-ndjson" if ndjson else "application/json",
+    )
+    if filename:
+        resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
@@ -1,5 +1,9 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-def sse_format(event: Dict[str, Any]) -> str:
-    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+def sse_format(event: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def sse_comment(text: str = "keep-alive") -> str:
+    return f": {text}\n\n"
@@ -1,56 +1,76 @@
-import asyncio, time, logging
+import asyncio, logging
 from backend.core.config import settings
-from backend.clients.modal_client import forward_request
+from backend.clients.modal_client import init_client, close_client, remote_health
+from backend.models.job_store import close_job_store, get_job_store
+from backend.parsing.parse_pool import get_parse_service, shutdown_parse_service
+from backend.services.extraction_service import close_microbatcher
+from backend.services.keep_warm import get_keep_warm
+from backend.services.result_cache import save_result_cache
 
 log = logging.getLogger("warmup")
 
-def _warmup_infer() -> None:
-    payload = [{
-        "label": settings.WARMUP_INFER_LABEL,
-        "extraction_schema": settings.WARMUP_INFER_SCHEMA,
-        "pdf_path": "WARMUP.pdf",
-        "pdf_content": "Warmup ping (ignore this response)"
-    }]
-    t0 = time.perf_counter()
-    try:
-        _ = forward_request(
-            settings.MODAL_EXTRACTION_URL,
-            endpoint="",
-            method="POST",
-            data=payload,
-            timeout=(settings.WARMUP_TIMEOUT_CONNECT, settings.WARMUP_TIMEOUT_READ),
-        )
-        dt = int((time.perf_counter() - t0) * 1000)
-        log.info(f"[warmup] infer ok in {dt} ms (response ignored)")
-    except Exception as e:
-        dt = int((time.perf_counter() - t0) * 1000)
-        log.warning(f"[warmup] infer failed in {dt} ms: {e}")
-
-def _warmup_health() -> None:
-    t0 = time.perf_counter()
-    try:
-        _ = forward_request(
-            settings.MODAL_HEALTH_CHECK_URL,
-            endpoint=settings.WARMUP_ENDPOINT,
-            method="GET",
-            timeout=(settings.WARMUP_TIMEOUT_CONNECT, settings.WARMUP_TIMEOUT_READ),
-        )
-        dt = int((time.perf_counter() - t0) * 1000)
-        log.info(f"[warmup] health ok in {dt} ms")
-    except Exception as e:
-        dt = int((time.perf_counter() - t0) * 1000)
-        log.warning(f"[warmup] health failed in {dt} ms: {e}")
-
-def _do_warmup() -> None:
-    if not settings.WARMUP_ON_STARTUP:
-        return
-    if settings.WARMUP_KIND.lower() == "infer":
-        _warmup_infer()
-    else:
-        _warmup_health()
+async def _evict_jobs_forever() -> None:
+    while True:
+        await asyncio.sleep(settings.JOB_EVICT_INTERVAL_S)
+        try:
+            n = get_job_store().evict_expired()
+            if n:
+                log.info(f"[jobs] evicted {n} expired job(s)")
+        except Exception as e:
+            log.warning(f"[jobs] eviction failed: {e}")
+
+async def _probe_remote_forever() -> None:
+    while True:
+        try:
+            status = await remote_health.probe()
+            if status["status"] != "ok" and remote_health.consecutive_failures in (1, 10):
+                log.warning(f"[health] remote probe failed: {status.get('error')}")
+        except Exception as e:
+            log.warning(f"[health] remote probe crashed: {e}")
+        await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL_S)
 
 def register_startup_events(app):
     @app.on_event("startup")
-    async def _warmup_on_startup():
-        loop = asyncio.get_running_loop()
-        loop.run_in_executor(None, _do_warmup)  # não bloqueia o boot
+    async def _open_client():
+        app.state.modal_client = await init_client()
+
+    @app.on_event("startup")
+    async def _start_keep_warm():
+        app.state.warmup_task = app.state.keep_warm_task = None
+        if not settings.REMOTE_ENABLED:
+            return
+        # não bloqueia o boot
+        if settings.WARMUP_ON_STARTUP:
+            app.state.warmup_task = asyncio.create_task(get_keep_warm().ping())
+        if settings.KEEP_WARM_ENABLED:
+            if settings.MODAL_KEEP_WARM_URL:
+                app.state.keep_warm_task = asyncio.create_task(get_keep_warm().run_forever())
+            else:
+                log.warning("[warmup] KEEP_WARM_ENABLED without MODAL_KEEP_WARM_URL: periodic keep-alive is off")
+
+    @app.on_event("startup")
+    async def _start_health_probe():
+        app.state.health_probe_task = None
+        if settings.REMOTE_ENABLED and settings.HEALTH_PROBE_INTERVAL_S > 0:
+            app.state.health_probe_task = asyncio.create_task(_probe_remote_forever())
+
+    @app.on_event("startup")
+    async def _start_parse_workers():
+        await asyncio.to_thread(get_parse_service().start)
+
+    @app.on_event("startup")
+    async def _open_job_store():
+        get_job_store()  # marks jobs left running by a previous process as interrupted
+        app.state.job_eviction_task = asyncio.create_task(_evict_jobs_forever())
+
+    @app.on_event("shutdown")
+    async def _on_shutdown():
+        for task in (app.state.health_probe_task, app.state.warmup_task, app.state.keep_warm_task):
+            if task is not None:
+                task.cancel()
+        await close_microbatcher()
+        await close_client()
+        shutdown_parse_service()
+        save_result_cache()
+        app.state.job_eviction_task.cancel()
+        close_job_store()
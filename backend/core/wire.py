@@ -0,0 +1,33 @@
+from typing import Any, Dict, Optional, Tuple
+from backend.core.config import settings
+from shared.transport.wire import (HAS_MSGPACK, HAS_ZSTD, JSON_TYPE, MSGPACK_TYPE, compress, decompress,
+                                   deserialize, media_type, serialize)
+
+def request_encoding(json_only: bool = False) -> Tuple[str, Optional[str]]:
+    """(media type, content encoding) to use for outgoing bodies given settings and installed codecs."""
+    media = MSGPACK_TYPE if settings.WIRE_FORMAT == "msgpack" and HAS_MSGPACK and not json_only else JSON_TYPE
+    wanted = settings.WIRE_COMPRESSION
+    if wanted == "zstd" and not HAS_ZSTD:
+        wanted = "gzip"
+    return media, (wanted if wanted in ("zstd", "gzip") else None)
+
+def accept_headers() -> Dict[str, str]:
+    accept = f"{MSGPACK_TYPE}, {JSON_TYPE};q=0.9" if HAS_MSGPACK else JSON_TYPE
+    encodings = "zstd, gzip" if HAS_ZSTD else "gzip"
+    return {"Accept": accept, "Accept-Encoding": encodings}
+
+def encode_body(data: Any, json_only: bool = False) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize (and compress above WIRE_COMPRESS_MIN_BYTES) a request body."""
+    media, encoding = request_encoding(json_only)
+    body = serialize(data, media)
+    headers = {"Content-Type": media}
+    if encoding and len(body) >= settings.WIRE_COMPRESS_MIN_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+def decode_body(body: bytes, content_type: Optional[str], content_encoding: Optional[str] = None) -> Any:
+    """Inverse of encode_body. Raises ValueError on unsupported or malformed payloads."""
+    media = media_type(content_type)
+    # Anything that is not msgpack is read as JSON, as the remote has always answered.
+    return deserialize(decompress(body, content_encoding), media if media == MSGPACK_TYPE else JSON_TYPE)
@@ -0,0 +1,47 @@
+import asyncio
+from typing import List, Tuple
+
+TERMINAL_EVENTS = ("complete", "cancelled")
+
+class EventLog:
+    """
+    Append-only log of a job's events with 1-based sequence ids.
+    A resumed job continues its ids after `start`, the last id of the previous
+    run, so a client's Last-Event-ID stays meaningful across runs.
+
+    Readers keep their own cursor (the last id they saw), so any number of
+    SSE subscribers can follow the same job and a reconnecting client can
+    replay everything after its Last-Event-ID.
+    """
+    def __init__(self, start: int = 0) -> None:
+        self.start = start
+        self._events: List[dict] = []
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @property
+    def last_id(self) -> int:
+        return self.start + len(self._events)
+
+    def append(self, event: dict) -> int:
+        self._events.append(event)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()  # wake every waiting subscriber
+        return self.last_id
+
+    def since(self, last_id: int) -> List[Tuple[int, dict]]:
+        """Events with id > last_id as (id, event) pairs (ids from an earlier run are gone)."""
+        skip = max(0, last_id - self.start)
+        return list(enumerate(self._events[skip:], start=self.start + skip + 1))
+
+    async def wait(self, last_id: int, timeout: float) -> bool:
+        """Wait until there is an event after last_id; False on timeout."""
+        if self.last_id > last_id:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
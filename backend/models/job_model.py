@@ -1,21 +1,44 @@
 import asyncio
 import time
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from typing import List, Optional
+
+from backend.models.event_log import EventLog
 
 @dataclass
 class BatchJob:
     id: str
-    total: int
+    total: Optional[int] = None  # known once the whole dataset has been read
     processed: int = 0
     filled_items: List[dict] = field(default_factory=list)
     meta_items: List[dict] = field(default_factory=list)
     started_at: float = field(default_factory=time.time)
     finished_at: Optional[float] = None
-    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    events: EventLog = field(default_factory=EventLog)
+    task: Optional[asyncio.Task] = None
+    cancelled: bool = False
+    interrupted: bool = False  # was running when a previous backend process stopped
+    queued: bool = False  # waiting for a batch job slot (admission control)
 
     @property
     def status(self) -> str:
+        if self.cancelled:
+            return "cancelled"
+        if self.interrupted:
+            return "interrupted"
+        if self.queued:
+            return "queued"
         return "done" if self.finished_at is not None else "running"
 
-JOBS: Dict[str, BatchJob] = {}
+    def resumed(self) -> "BatchJob":
+        """
+        Fresh job with the same id that keeps the successful items and retries
+        the rest; its event ids continue after this run's.
+        """
+        ok = {m["index"] for m in self.meta_items
+              if m.get("status") == "ok" and m["index"] < len(self.filled_items) and self.filled_items[m["index"]] is not None}
+        meta = [m for m in self.meta_items if m["index"] in ok]
+        filled = [f if i in ok else None for i, f in enumerate(self.filled_items)]
+        return BatchJob(id=self.id, processed=len(meta),
+                        filled_items=filled, meta_items=meta, started_at=self.started_at,
+                        events=EventLog(start=self.events.last_id))
@@ -0,0 +1,207 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.config import settings
+from backend.models.event_log import EventLog
+from backend.models.job_model import BatchJob
+
+Checkpoint = Tuple[int, dict, dict]  # (index, filled_item, meta)
+
+class JobStore:
+    """
+    Registry of batch jobs.
+
+    Running jobs always live in memory (they own a task and an event log).
+    Finished, cancelled or interrupted jobs are dropped from memory once they
+    are older than `memory_ttl_s`; what a subclass persists outlives that.
+    """
+    def __init__(self, memory_ttl_s: float) -> None:
+        self.memory_ttl_s = memory_ttl_s
+        self._live: Dict[str, BatchJob] = {}
+        self._params: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, job: BatchJob, params: Optional[Dict[str, Any]] = None) -> None:
+        self._live[job.id] = job
+        self._params[job.id] = dict(params or {})
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._live.get(job_id)
+
+    def params(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """What the job was started with (json_path, pdfs_root_path, ...)."""
+        return self._params.get(job_id)
+
+    def checkpoint(self, job: BatchJob, items: List[Checkpoint]) -> None:
+        """Record finished items (no-op for the in-memory store)."""
+
+    def finish(self, job: BatchJob) -> None:
+        """Record the job's final status (no-op for the in-memory store)."""
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        expired = [
+            job_id for job_id, job in self._live.items()
+            if job.finished_at is not None and now - job.finished_at > self.memory_ttl_s
+        ]
+        for job_id in expired:
+            del self._live[job_id]
+            self._params.pop(job_id, None)
+        return len(expired)
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self._live.values() if job.status == "running")
+        queued = sum(1 for job in self._live.values() if job.status == "queued")
+        return {"backend": "memory", "in_memory": len(self._live), "running": running, "queued": queued}
+
+class MemoryJobStore(JobStore):
+    """Jobs exist only in this process; a restart loses them."""
+
+class SQLiteJobStore(JobStore):
+    """
+    Persists every job and each item's result as soon as it finishes, so a
+    restarted backend can serve finished jobs and resume interrupted ones.
+    Rows of jobs that ended more than `ttl_s` ago are deleted by evict_expired().
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        total INTEGER,
+        started_at REAL NOT NULL,
+        finished_at REAL,
+        status TEXT NOT NULL,
+        params TEXT NOT NULL DEFAULT '{}',
+        last_event_id INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS items (
+        job_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        filled TEXT NOT NULL,
+        meta TEXT NOT NULL,
+        PRIMARY KEY (job_id, idx)
+    );
+    """
+
+    def __init__(self, path: Path, ttl_s: float, memory_ttl_s: float) -> None:
+        super().__init__(min(memory_ttl_s, ttl_s))
+        self.path = path
+        self.ttl_s = ttl_s
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "last_event_id" not in columns:  # store created before event ids were kept
+            self._db.execute("ALTER TABLE jobs ADD COLUMN last_event_id INTEGER NOT NULL DEFAULT 0")
+        with self._db:
+            # Whatever was still running (or waiting to run) belonged to a previous process.
+            self._db.execute(
+                "UPDATE jobs SET status = 'interrupted', finished_at = ? WHERE status IN ('running', 'queued')", (time.time(),)
+            )
+
+    def add(self, job: BatchJob, params: Optional[Dict[str, Any]] = None) -> None:
+        super().add(job, params)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, total, started_at, finished_at, status, params, last_event_id) "
+                "VALUES (?, ?, ?, NULL, ?, ?, ?)",
+                (job.id, job.total, job.started_at, job.status, json.dumps(params or {}, default=str), job.events.last_id),
+            )
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        job = super().get(job_id)
+        if job is not None:
+            return job
+        with self._lock:
+            row = self._db.execute(
+                "SELECT total, started_at, finished_at, status, last_event_id FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            items = self._db.execute(
+                "SELECT idx, filled, meta FROM items WHERE job_id = ? ORDER BY idx", (job_id,)
+            ).fetchall()
+        total, started_at, finished_at, status, last_event_id = row
+        job = BatchJob(id=job_id, total=total, started_at=started_at, finished_at=finished_at,
+                       events=EventLog(start=last_event_id))
+        job.filled_items = [None] * (total or 0)
+        for idx, filled, meta in items:
+            if idx >= len(job.filled_items):
+                job.filled_items.extend([None] * (idx + 1 - len(job.filled_items)))
+            job.filled_items[idx] = json.loads(filled)
+            job.meta_items.append(json.loads(meta))
+        job.processed = len(job.meta_items)
+        job.cancelled = status == "cancelled"
+        job.interrupted = status == "interrupted"
+        return job
+
+    def params(self, job_id: str) -> Optional[Dict[str, Any]]:
+        params = super().params(job_id)
+        if params is not None:
+            return params
+        with self._lock:
+            row = self._db.execute("SELECT params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def checkpoint(self, job: BatchJob, items: List[Checkpoint]) -> None:
+        rows = [
+            (job.id, i, json.dumps(filled, ensure_ascii=False), json.dumps(meta, ensure_ascii=False))
+            for i, filled, meta in items
+        ]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO items (job_id, idx, filled, meta) VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("UPDATE jobs SET last_event_id = ? WHERE id = ?", (job.events.last_id, job.id))
+
+    def finish(self, job: BatchJob) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, total = ?, last_event_id = ? WHERE id = ?",
+                (job.status, job.finished_at or time.time(), job.total, job.events.last_id, job.id),
+            )
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        super().evict_expired(now)
+        cutoff = now - self.ttl_s
+        with self._lock, self._db:
+            expired = [r[0] for r in self._db.execute(
+                "SELECT id FROM jobs WHERE status NOT IN ('running', 'queued') AND finished_at < ?", (cutoff,)
+            )]
+            self._db.executemany("DELETE FROM items WHERE job_id = ?", [(j,) for j in expired])
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(j,) for j in expired])
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {**super().stats(), "backend": "sqlite", "path": str(self.path), "stored": stored}
+
+_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        if settings.JOB_STORE == "sqlite":
+            path = Path(settings.JOB_STORE_PATH).expanduser()
+            _store = SQLiteJobStore(path, settings.JOB_TTL_S, settings.JOB_MEMORY_TTL_S)
+        else:
+            _store = MemoryJobStore(settings.JOB_TTL_S)
+    return _store
+
+def close_job_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,16 @@
+from pathlib import Path
+from typing import Optional
+
+from backend.core.config import settings
+from shared.parsing.parse_cache import ParseCache
+
+_cache: Optional[ParseCache] = None
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Per-process handle on the shared cache directory, or None when PARSE_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.PARSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ParseCache(Path(settings.PARSE_CACHE_DIR).expanduser(), settings.PARSE_CACHE_MAX_BYTES)
+    return _cache
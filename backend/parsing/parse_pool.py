@@ -0,0 +1,466 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from backend.core.config import settings
+from shared.metrics import REGISTRY
+from backend.parsing.parse_cache import get_parse_cache
+from shared.parsing.content_hash import known_hash
+from shared.parsing.pdf_text_parser import PDFExtractor
+
+log = logging.getLogger("parse_pool")
+
+class ParseTimeout(Exception):
+    """A PDF took longer than PARSE_TIMEOUT_S to parse."""
+
+# --------- worker side ---------
+_started: Any = None  # multiprocessing queue: (task id, pid) when a parse starts
+
+def _init_worker(started: Any = None) -> None:
+    global _started
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the server process
+    _started = started
+    import fitz  # noqa: F401  # PDFExtractor imports it lazily; load it before the first timed parse
+
+_timed_out = False
+
+def _on_alarm(signum, frame) -> None:
+    global _timed_out
+    _timed_out = True
+    raise ParseTimeout("PDF parsing timed out")
+
+def _ping() -> int:
+    return os.getpid()
+
+def _parse_text(task_id: int, pdf_path: str, timeout_s: float, max_pages: Optional[int],
+                max_chars: Optional[int], digest: Optional[str] = None) -> Tuple[str, float, bool]:
+    # Runs in a worker process; only the text (parse time, cache hit) crosses the process boundary.
+    # The alarm fires between PyMuPDF calls, so a runaway multi-page document stops early;
+    # a worker stuck inside a single call is killed by the server instead (see ParseService).
+    global _timed_out
+    if _started is not None:
+        _started.put((task_id, os.getpid()))
+    _timed_out = False
+    armed = timeout_s > 0 and hasattr(signal, "setitimer")
+    if armed:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout_s)
+    t0 = time.perf_counter()
+    cache = get_parse_cache()
+    try:
+        if cache is not None:
+            text, _, hit = cache.extract(Path(pdf_path), max_pages=max_pages, max_chars=max_chars, digest=digest)
+        else:
+            text, _ = PDFExtractor.extract_pdf_text(Path(pdf_path), max_pages=max_pages, max_chars=max_chars)
+            hit = False
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    if _timed_out:  # the parser may have caught the exception and returned an error string
+        raise ParseTimeout(f"Parsing {Path(pdf_path).name} took longer than {timeout_s:g}s")
+    return text, (time.perf_counter() - t0) * 1000, hit
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))  # honours container / taskset CPU limits
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# --------- server side ---------
+class _Task:
+    """One submitted parse: queued in the service, then in the pool (attempts > 0)."""
+    def __init__(self, task_id: int, path: Path, interactive: bool, digest: Optional[str] = None) -> None:
+        self.id = task_id
+        self.path = path
+        self.interactive = interactive
+        self.digest = digest  # content hash already computed here, so the worker does not re-read the file
+        self.outer: "Future[str]" = Future()
+        self.submitted = time.perf_counter()
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.inner: Optional[Future] = None
+        self.attempts = 0
+        self.killed = False
+
+class ParseService:
+    """
+    Dedicated process pool for PDF text extraction.
+
+    Workers are started up front (start()) so the first requests do not pay
+    for process creation and the PyMuPDF import. To contain leaks in the C
+    library the pool is replaced once it has taken `max_tasks_per_child`
+    documents per worker: new work goes to a fresh pool while the old one
+    finishes what it has and exits. (ProcessPoolExecutor's own
+    max_tasks_per_child can deadlock on the Python versions we run.)
+
+    Documents wait in the service, not in the pool: at most `workers` are
+    handed to the pool at once, interactive parses (parse()) ahead of batch
+    prefetches (submit()). Each worker reports when it starts a document; one
+    still running `timeout_s + KILL_GRACE_S` after that (stuck inside a single
+    PyMuPDF call, past its own alarm) is killed. That breaks the pool, which
+    is replaced; the other documents it was parsing are sent again once.
+
+    A supervisor thread does all of this. Future callbacks only record the
+    outcome and wake it: on Python 3.13 they can run under the executor's
+    shutdown lock, where touching the pool would deadlock.
+
+    `pending` counts documents submitted and not yet finished.
+    """
+    KILL_GRACE_S = 5.0
+
+    def __init__(self, workers: int, max_tasks_per_child: int, timeout_s: float, start_method: str,
+                 max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> None:
+        self.workers = max(1, workers)
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self.timeout_s = timeout_s
+        self.kill_after_s = timeout_s + self.KILL_GRACE_S if timeout_s > 0 else None
+        self.start_method = start_method
+        self._ctx = multiprocessing.get_context(start_method)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_tasks = 0
+        self._lock = threading.Lock()  # never held while calling into a pool
+        self._ids = itertools.count(1)
+        self._queued: Dict[bool, Deque[_Task]] = {True: deque(), False: deque()}  # interactive -> tasks
+        self._in_pool: Dict[int, _Task] = {}
+        self._running: Dict[int, Tuple[int, float]] = {}  # task id -> (worker pid, monotonic start)
+        self._finished: Deque[Tuple[_Task, Future]] = deque()
+        self._started: Any = None
+        self._supervisor: Optional[threading.Thread] = None
+        self._closed = False
+        self.pending = 0
+        self.max_pending = 0
+        self._stats = {"completed": 0, "cache_hits": 0, "errors": 0, "timeouts": 0, "killed": 0,
+                       "resubmitted": 0, "recycles": 0, "restarts": 0}
+        self.parse_ms = REGISTRY.histogram("backend_pdf_parse_ms", "PDF text extraction in the parse pool (cache misses)",
+                                           buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+        self.wait_ms = REGISTRY.histogram("backend_parse_queue_wait_ms", "Time a PDF waited for a parse worker",
+                                          buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000))
+        self.cache_results = REGISTRY.counter("backend_parse_cache_total", "Parse cache lookups by outcome", ("result",))
+        REGISTRY.gauge("backend_parse_pending", "PDFs submitted to the parse pool and not finished", fn=lambda: self.pending)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._started,),
+        )
+
+    def start(self) -> "ParseService":
+        """Create the pool and spawn every worker now rather than on first use."""
+        pool = self._get_pool()
+        for fut in [pool.submit(_ping) for _ in range(self.workers)]:
+            fut.result()
+        return self
+
+    def _get_pool(self, tasks: int = 0) -> ProcessPoolExecutor:
+        retired = None
+        with self._lock:
+            if self._started is None:
+                self._started = self._ctx.Queue()
+                self._supervisor = threading.Thread(target=self._supervise, name="parse-supervisor", daemon=True)
+                self._supervisor.start()
+            limit = self.max_tasks_per_child and self.workers * self.max_tasks_per_child
+            if self._pool is not None and limit and self._pool_tasks >= limit:
+                retired, self._pool = self._pool, None
+                self._stats["recycles"] += 1
+            if self._pool is None:
+                self._pool = self._new_pool()
+                self._pool_tasks = 0
+            self._pool_tasks += tasks
+            pool = self._pool
+        if retired is not None:
+            retired.shutdown(wait=False)  # documents it is parsing still complete
+        return pool
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self._stats["restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _wake(self) -> None:
+        if self._started is not None:
+            self._started.put(None)
+
+    # --------- submission ---------
+    def submit(self, pdf_path: Path, interactive: bool = False) -> "Future[str]":
+        """Queue a parse; the returned future resolves to the document text. Cancel it to drop the parse."""
+        task = _Task(next(self._ids), pdf_path, interactive, known_hash(pdf_path))
+        with self._lock:
+            self._queued[interactive].append(task)
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        # Cancelling the outer future (prefetch dropped) cancels the parse if it has not started.
+        task.outer.add_done_callback(lambda f: f.cancelled() and task.inner is not None and task.inner.cancel())
+        self._dispatch()
+        return task.outer
+
+    async def parse(self, pdf_path: Path, interactive: bool = True) -> str:
+        """
+        Await the text of a PDF without blocking the event loop or its thread pool.
+        The time limit runs from when a worker starts the document, not while it
+        waits for one.
+        """
+        return await asyncio.wrap_future(self.submit(pdf_path, interactive=interactive))
+
+    def _next_queued(self) -> Optional[_Task]:
+        # Called with the lock held.
+        while len(self._in_pool) < self.workers:
+            waiting = self._queued[True] or self._queued[False]
+            if not waiting:
+                return None
+            task = waiting.popleft()
+            if task.outer.cancelled():
+                self.pending -= 1
+                continue
+            self._in_pool[task.id] = task
+            return task
+        return None
+
+    def _dispatch(self) -> None:
+        while not self._closed:
+            with self._lock:
+                task = self._next_queued()
+            if task is None:
+                return
+            self._send(task)
+
+    def _send(self, task: _Task) -> None:
+        for attempt in range(2):
+            pool = self._get_pool(tasks=1)
+            try:
+                inner = pool.submit(_parse_text, task.id, str(task.path), self.timeout_s, self.max_pages,
+                                    self.max_chars, task.digest)
+                break
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._restart(pool)
+                if attempt:
+                    with self._lock:
+                        self._in_pool.pop(task.id, None)
+                    self._settle(task, None, e)
+                    return
+        task.pool, task.inner = pool, inner
+        task.attempts += 1
+        inner.add_done_callback(lambda f: self._on_done(task, f))
+        if task.outer.cancelled():
+            inner.cancel()
+
+    def _on_done(self, task: _Task, inner: Future) -> None:
+        with self._lock:
+            self._finished.append((task, inner))
+        if self._closed:
+            self._reap()  # no supervisor any more; nothing here touches a live pool
+        else:
+            self._wake()
+
+    # --------- supervisor ---------
+    def _supervise(self) -> None:
+        while not self._closed:
+            try:
+                message = self._started.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                return
+            if message is not None:
+                task_id, pid = message
+                with self._lock:
+                    if task_id in self._in_pool:
+                        self._running[task_id] = (pid, time.monotonic())
+            try:
+                self._reap()
+                self._kill_overdue()
+                self._dispatch()
+            except Exception:
+                log.exception("[parse_pool] supervisor step failed")
+
+    def _reap(self) -> None:
+        while True:
+            with self._lock:
+                if not self._finished:
+                    return
+                task, inner = self._finished.popleft()
+                self._in_pool.pop(task.id, None)
+                self._running.pop(task.id, None)
+            error = None if inner.cancelled() else inner.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._restart(task.pool)
+                if task.killed:
+                    error = ParseTimeout(f"Parsing {task.path.name} did not finish in {self.kill_after_s:g}s; worker killed")
+                elif task.attempts < 2 and not task.outer.cancelled() and not self._closed:
+                    # Another document took the pool down; this one was not at fault.
+                    with self._lock:
+                        self._queued[task.interactive].appendleft(task)
+                        self._stats["resubmitted"] += 1
+                    continue
+            self._settle(task, inner, error)
+
+    def _kill_overdue(self) -> None:
+        if self.kill_after_s is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            overdue = [(self._in_pool[tid], pid) for tid, (pid, t0) in self._running.items()
+                       if now - t0 > self.kill_after_s and not self._in_pool[tid].killed]
+            for task, _pid in overdue:
+                task.killed = True
+                self._stats["killed"] += 1
+        for task, pid in overdue:
+            log.warning(f"[parse_pool] killing worker {pid}: {task.path.name} ran past {self.kill_after_s:g}s")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def _settle(self, task: _Task, inner: Optional[Future], error: Optional[BaseException]) -> None:
+        with self._lock:
+            self.pending -= 1
+        if inner is not None and inner.cancelled():
+            task.outer.cancel()
+            return
+        if error is None:
+            text, parse_ms, hit = inner.result()
+            if hit:
+                self._stats["cache_hits"] += 1
+            else:
+                self.parse_ms.observe(parse_ms)
+            self.cache_results.labels("hit" if hit else "miss").inc()
+            self.wait_ms.observe(max(0.0, (time.perf_counter() - task.submitted) * 1000 - parse_ms))
+            self._stats["completed"] += 1
+            if task.outer.set_running_or_notify_cancel():
+                task.outer.set_result(text)
+            return
+        self._stats["timeouts" if isinstance(error, ParseTimeout) else "errors"] += 1
+        if task.outer.set_running_or_notify_cancel():
+            task.outer.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "started": self._pool is not None,
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "timeout_s": self.timeout_s,
+            "kill_after_s": self.kill_after_s,
+            "pending": self.pending,
+            "queued": len(self._queued[True]) + len(self._queued[False]),
+            "queued_interactive": len(self._queued[True]),
+            "max_pending": self.max_pending,
+            **self._stats,
+            "cache_misses": self._stats["completed"] - self._stats["cache_hits"],
+            "parse_ms": self.parse_ms.snapshot(),
+            "queue_wait_ms": self.wait_ms.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self._closed = True
+        with self._lock:
+            pool, self._pool = self._pool, None
+            queued = list(self._queued[True]) + list(self._queued[False])
+            self._queued[True].clear()
+            self._queued[False].clear()
+        for task in queued:
+            task.outer.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._reap()
+        self._wake()
+
+_service: Optional[ParseService] = None
+
+def get_parse_service() -> ParseService:
+    global _service
+    if _service is None:
+        _service = ParseService(
+            workers=settings.PARSE_WORKERS or _available_cpus(),
+            max_tasks_per_child=settings.PARSE_MAX_TASKS_PER_CHILD,
+            timeout_s=settings.PARSE_TIMEOUT_S,
+            start_method=settings.PARSE_START_METHOD,
+            max_pages=settings.PARSE_MAX_PAGES or None,
+            max_chars=settings.PARSE_MAX_CHARS or None,
+        )
+    return _service
+
+def shutdown_parse_service() -> None:
+    global _service
+    if _service is not None:
+        _service.shutdown()
+        _service = None
+
+class PDFPrefetcher:
+    """
+    Parses upcoming batch PDFs in the process pool while earlier items are
+    waiting on remote inference.
+
+    At most `depth` items beyond the highest requested index are parsed ahead,
+    so memory stays bounded; results are dropped once consumed, or by discard(i)
+    for items the caller settled without get(i) (cache hit, error). close() cancels
+    every parse that has not started (job finished or abandoned).
+    `total` may grow while a dataset is still being read.
+    """
+    def __init__(self, total: int, resolve: Callable[[int], Awaitable[Optional[Path]]], depth: Optional[int] = None) -> None:
+        self.total = total
+        self.resolve = resolve
+        self.depth = settings.PREFETCH_DEPTH if depth is None else depth
+        self._futures: Dict[int, Future] = {}
+        self._next = 0
+        self._skip: Set[int] = set()  # discarded before _fill reached them
+        self._closed = False
+        self._filling = asyncio.Lock()  # get(i) waits until item i has been resolved
+
+    async def _fill(self, upto: int) -> None:
+        service = get_parse_service()
+        async with self._filling:
+            while not self._closed and self._next <= min(upto, self.total - 1):
+                i = self._next
+                self._next += 1
+                if i in self._skip:
+                    self._skip.discard(i)
+                    continue
+                path = await self.resolve(i)
+                if path is not None and not self._closed:
+                    self._futures[i] = service.submit(path)
+
+    async def get(self, i: int) -> Optional[str]:
+        """Parsed text for item i, or None if it could not be prefetched."""
+        if self._closed:
+            return None
+        await self._fill(i + self.depth)
+        fut = self._futures.pop(i, None)
+        if fut is None:
+            return None
+        try:
+            return await asyncio.wrap_future(fut)
+        except ParseTimeout:
+            raise  # parsing it again inline would only time out again
+        except Exception:
+            return None  # caller falls back to parsing inline
+
+    def discard(self, i: int) -> None:
+        """Item i will not be asked for: drop (or never start) its parse."""
+        fut = self._futures.pop(i, None)
+        if fut is not None:
+            fut.cancel()
+        elif i >= self._next:
+            self._skip.add(i)
+
+    def close(self) -> None:
+        self._closed = True
+        for fut in self._futures.values():
+            fut.cancel()
+        self._futures.clear()
+        self._skip.clear()
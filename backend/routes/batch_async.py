@@ -1,18 +1,16 @@
-import json
-import uuid
-import asyncio
 from pathlib import Path
-from typing import List
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
 from fastapi.responses import StreamingResponse
 
 from backend.core.config import settings
-from backend.core.responses import pretty_response, pretty_download
-from backend.core.sse import sse_format
+from backend.core.responses import pretty_response, pretty_download, stream_items
+from backend.core.sse import sse_comment, sse_format
+from backend.models.event_log import TERMINAL_EVENTS
 from backend.schemas.v1.schemas import BatchRequest
-from backend.models.job_model import BatchJob, JOBS
-from backend.services.batch_runner import run_batch_job
+from backend.models.job_store import get_job_store
+from backend.services.batch_runner import start_batch_job
 
 router = APIRouter()
 
@@ -26,55 +24,79 @@ async def batch_start(request: BatchRequest):
     ds_path = Path(request.json_path).expanduser().resolve()
     if not ds_path.is_file():
         raise HTTPException(status_code=404, detail=f"Dataset not found: {ds_path}")
-    try:
-        dataset: List[dict] = json.loads(ds_path.read_text(encoding="utf-8"))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid dataset JSON: {e}")
-
-    job_id = uuid.uuid4().hex
-    job = BatchJob(id=job_id, total=len(dataset))
-    JOBS[job_id] = job
-    asyncio.create_task(run_batch_job(job, dataset, root))
-    return {"status": "started", "job_id": job_id, "total": job.total}
+    job = start_batch_job(ds_path, root, concurrency=request.concurrency,
+                          event_order=request.event_order, resume_job_id=request.resume_job_id)
+    status = "queued" if job.queued else "resumed" if request.resume_job_id else "started"
+    return {"status": status, "job_id": job.id, "total": job.total, "processed": job.processed}
 
 @router.get("/batch/stream/{job_id}")
-async def batch_stream(job_id: str):
-    job = JOBS.get(job_id)
+async def batch_stream(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    job = get_job_store().get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
+    try:
+        cursor = max(0, int(last_event_id or 0))
+    except ValueError:
+        cursor = 0
 
     async def event_generator():
+        nonlocal cursor
         yield "retry: 1500\n\n"
+        if job.task is None:
+            # Loaded from the store: not running in this process, nothing more will be logged.
+            yield sse_format({"type": "cancelled" if job.status != "done" else "complete", "job_id": job.id,
+                              "status": job.status, "processed": job.processed, "total": job.total})
+            return
         while True:
-            item = await job.queue.get()
-            yield sse_format(item)
-            if item.get("type") == "complete":
-                break
+            for seq, item in job.events.since(cursor):
+                cursor = seq
+                yield sse_format(item, event_id=seq)
+                if item.get("type") in TERMINAL_EVENTS:
+                    return
+            if not await job.events.wait(cursor, settings.SSE_HEARTBEAT_S):
+                yield sse_comment()
 
     headers = {"Cache-Control": "no-cache", "Connection": "keep-alive"}
     return StreamingResponse(event_generator(), media_type="text/event-stream", headers=headers)
 
+@router.post("/batch/cancel/{job_id}")
+async def batch_cancel(job_id: str):
+    job = get_job_store().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    if job.task is not None and not job.task.done():
+        job.task.cancel()
+    return {"status": "cancelling" if job.finished_at is None else job.status, "job_id": job_id}
+
 @router.get("/batch/result/{job_id}")
-def batch_result(job_id: str):
-    job = JOBS.get(job_id)
+def batch_result(job_id: str, format: Literal["json", "ndjson"] = "json", pretty: bool = False):
+    job = get_job_store().get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
-    return pretty_response(job.filled_items)
+    if pretty:
+        return pretty_response(job.filled_items)
+    return stream_items(list(job.filled_items), ndjson=format == "ndjson")
 
 @router.get("/batch/result/{job_id}/download")
-def batch_result_download(job_id: str):
-    job = JOBS.get(job_id)
+def batch_result_download(job_id: str, format: Literal["json", "ndjson"] = "json", pretty: bool = False):
+    job = get_job_store().get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
-    return pretty_download(job.filled_items, filename="batch_result.json")
+    if pretty:
+        return pretty_download(job.filled_items, filename="batch_result.json")
+    ndjson = format == "ndjson"
+    return stream_items(list(job.filled_items), ndjson=ndjson,
+                        filename="batch_result.ndjson" if ndjson else "batch_result.json")
 
 @router.get("/batch/item/{job_id}/{index}")
 def batch_item(job_id: str, index: int):
-    job = JOBS.get(job_id)
+    job = get_job_store().get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
     if index < 0 or index >= len(job.filled_items):
         raise HTTPException(status_code=404, detail="Item index out of range")
+    if job.filled_items[index] is None:
+        raise HTTPException(status_code=404, detail="Item not processed yet")
     meta = next((m for m in job.meta_items if m["index"] == index), None)
     file_name = (meta or {}).get("file_name")
     payload = {
@@ -85,18 +107,20 @@ def batch_item(job_id: str, index: int):
 
 @router.get("/batch/item/{job_id}/{index}/download")
 def batch_item_download(job_id: str, index: int):
-    job = JOBS.get(job_id)
+    job = get_job_store().get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
     if index < 0 or index >= len(job.filled_items):
         raise HTTPException(status_code=404, detail="Item index out of range")
+    if job.filled_items[index] is None:
+        raise HTTPException(status_code=404, detail="Item not processed yet")
     item = job.filled_items[index]
     filename = f"preview_{index}_result.json"
     return pretty_download(item, filename=filename)
 
 @router.get("/batch/meta/{job_id}")
 def batch_meta(job_id: str):
-    job = JOBS.get(job_id)
+    job = get_job_store().get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
     return pretty_response(job.meta_items)
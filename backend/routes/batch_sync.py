@@ -1,18 +1,21 @@
-import json
+import asyncio
+import uuid
 from pathlib import Path
-from typing import List
+from typing import List, Sequence
 from fastapi import APIRouter, HTTPException
 
+from backend.core.admission import job_gate
 from backend.core.config import settings
 from backend.core.responses import pretty_response
 from backend.schemas.v1.schemas import BatchRequest
-from backend.services.extraction_service import run_single_infer
-from backend.services.dataset_utils import resolve_pdf_path_from_sample, materialize_filled_item
+from backend.services.batch_runner import BatchInput, place, run_chunk_pool
+from backend.services.dataset_reader import DatasetError, DatasetFeed, validate_dataset
+from backend.services.keep_warm import get_keep_warm
 
 router = APIRouter()
 
 @router.post("/batch")
-def batch(request: BatchRequest):
+async def batch(request: BatchRequest):
     if not settings.REMOTE_ENABLED:
         raise HTTPException(status_code=503, detail="Remote batch not configured.")
     root = Path(request.pdfs_root_path).expanduser().resolve()
@@ -22,48 +25,29 @@ def batch(request: BatchRequest):
     if not ds_path.is_file():
         raise HTTPException(status_code=404, detail=f"Dataset not found: {ds_path}")
     try:
-        dataset: List[dict] = json.loads(ds_path.read_text(encoding="utf-8"))
-    except Exception as e:
+        # The response is all-or-nothing: reject a malformed manifest before any item is sent.
+        await asyncio.to_thread(validate_dataset, ds_path)
+    except DatasetError as e:
         raise HTTPException(status_code=400, detail=f"Invalid dataset JSON: {e}")
 
     filled_array: List[dict] = []
-    for sample in dataset:
-        try:
-            pdf_path, _ = resolve_pdf_path_from_sample(sample, root)
-        except ValueError:
-            empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
-            filled_array.append({
-                "label": sample.get("label"),
-                "extraction_schema": empty,
-                **({"pdf_path": sample.get("pdf_path")} if "pdf_path" in sample else {}),
-                **({"pdf_filename": sample.get("pdf_filename")} if "pdf_filename" in sample else {}),
-                "_error": "bad reference",
-            })
-            continue
 
-        if not pdf_path.is_file():
-            empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
-            filled_array.append({
-                "label": sample.get("label"),
-                "extraction_schema": empty,
-                **({"pdf_path": sample.get("pdf_path")} if "pdf_path" in sample else {}),
-                **({"pdf_filename": sample.get("pdf_filename")} if "pdf_filename" in sample else {}),
-                "_error": f"File not found: {pdf_path}",
-            })
-            continue
+    async def handle(chunk: Sequence[int]) -> None:
+        for i, filled, meta in await batch.process(chunk):
+            if meta["status"] == "error":
+                filled["_error"] = "bad reference" if meta.pop("error_kind", None) == "bad_reference" else meta["error"]
+            place(filled_array, i, filled)
 
+    async with job_gate().slot():
+        feed = DatasetFeed(ds_path).start()
+        batch = BatchInput(feed, root, lane=f"sync-{uuid.uuid4().hex}")
+        concurrency = request.concurrency or settings.BATCH_CONCURRENCY
+        get_keep_warm().prewarm(concurrency)
         try:
-            modal_res = run_single_infer(sample.get("label"), sample.get("extraction_schema"), str(pdf_path))
-            modal_item = (modal_res or [{}])[0]
-            filled_array.append(materialize_filled_item(sample, modal_item))
-        except Exception as e:
-            empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
-            filled_array.append({
-                "label": sample.get("label"),
-                "extraction_schema": empty,
-                **({"pdf_path": sample.get("pdf_path")} if "pdf_path" in sample else {}),
-                **({"pdf_filename": sample.get("pdf_filename")} if "pdf_filename" in sample else {}),
-                "_error": str(e),
-            })
+            await run_chunk_pool(batch.planner(), concurrency, handle)
+        finally:
+            batch.close()
+    if feed.error:
+        raise HTTPException(status_code=400, detail=f"Invalid dataset JSON: {feed.error}")
 
     return pretty_response(filled_array)
@@ -1,7 +1,8 @@
-import time
 from pathlib import Path
 from fastapi import APIRouter, HTTPException
+from backend.core.admission import infer_gate
 from backend.core.config import settings
+from shared.metrics import REGISTRY
 from backend.core.responses import pretty_download
 from backend.schemas.v1.schemas import InferenceRequest
 from backend.services.extraction_service import run_single_infer
@@ -9,29 +10,33 @@ from backend.services.dataset_utils import materialize_filled_item
 
 router = APIRouter()
 
+INFER_MS = REGISTRY.histogram("backend_infer_ms", "End-to-end /infer latency, including admission", labels=("route",))
+
 @router.post("/infer")
-def infer(request: InferenceRequest):
+async def infer(request: InferenceRequest):
     if not settings.REMOTE_ENABLED:
         raise HTTPException(status_code=503, detail="Remote inference not configured.")
     file_path = Path(request.pdf_path)
     if not file_path.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {request.pdf_path}")
-    t0 = time.perf_counter()
-    modal_res = run_single_infer(request.label, request.extraction_schema, str(file_path))
-    _duration_ms = int((time.perf_counter() - t0) * 1000)  # kept for parity
+    with INFER_MS.time("infer"):
+        async with infer_gate().slot():
+            modal_res = await run_single_infer(request.label, request.extraction_schema, str(file_path))
     modal_item = (modal_res or [{}])[0]
     sample_for_output = {"label": request.label, "extraction_schema": request.extraction_schema, "pdf_path": file_path.name}
     filled = materialize_filled_item(sample_for_output, modal_item)
     return filled
 
 @router.post("/infer/download")
-def infer_download(request: InferenceRequest):
+async def infer_download(request: InferenceRequest):
     if not settings.REMOTE_ENABLED:
         raise HTTPException(status_code=503, detail="Remote inference not configured.")
     file_path = Path(request.pdf_path)
     if not file_path.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {request.pdf_path}")
-    modal_res = run_single_infer(request.label, request.extraction_schema, str(file_path))
+    with INFER_MS.time("infer_download"):
+        async with infer_gate().slot():
+            modal_res = await run_single_infer(request.label, request.extraction_schema, str(file_path))
     modal_item = (modal_res or [{}])[0]
     sample_for_output = {"label": request.label, "extraction_schema": request.extraction_schema, "pdf_path": file_path.name}
     filled = materialize_filled_item(sample_for_output, modal_item)
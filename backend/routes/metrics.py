@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from shared.metrics import REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics")
+def metrics():
+    """Prometheus text exposition of the backend's metrics registry."""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,71 @@
+import asyncio
+import shutil
+from fastapi import APIRouter, HTTPException, Request
+from backend.core.admission import infer_gate
+from backend.core.config import settings
+from backend.core.responses import pretty_download
+from backend.services.batch_runner import start_batch_job
+from backend.services.dataset_utils import materialize_filled_item
+from backend.services.extraction_service import run_bytes_infer
+from backend.services.upload_service import form_file, form_json, pdf_view, read_form, stage_batch_upload
+
+router = APIRouter()
+
+async def _infer_uploaded(request: Request) -> dict:
+    if not settings.REMOTE_ENABLED:
+        raise HTTPException(status_code=503, detail="Remote inference not configured.")
+    form = await read_form(request)
+    try:
+        label = form.get("label")
+        if not isinstance(label, str) or not label:
+            raise HTTPException(status_code=422, detail="Missing form field 'label'")
+        extraction_schema = form_json(form, "extraction_schema")
+        upload = form_file(form, "file")
+        async with infer_gate().slot():
+            with pdf_view(upload) as data:
+                modal_res = await run_bytes_infer(label, extraction_schema, upload.filename or "upload.pdf", data)
+    finally:
+        await form.close()
+    modal_item = (modal_res or [{}])[0]
+    sample_for_output = {"label": label, "extraction_schema": extraction_schema, "pdf_path": upload.filename}
+    return materialize_filled_item(sample_for_output, modal_item)
+
+@router.post("/infer/upload")
+async def infer_upload(request: Request):
+    """multipart/form-data: file (PDF), label, extraction_schema (JSON object)."""
+    return await _infer_uploaded(request)
+
+@router.post("/infer/upload/download")
+async def infer_upload_download(request: Request):
+    return pretty_download(await _infer_uploaded(request), filename="single_result.json")
+
+@router.post("/batch/upload")
+async def batch_upload(request: Request):
+    """
+    multipart/form-data: files (PDFs and/or zips, repeatable), dataset (JSON or
+    JSONL manifest, optional when a zip carries dataset.json), and optionally
+    concurrency / event_order. Starts an async job like /batch/start.
+    """
+    if not settings.REMOTE_ENABLED:
+        raise HTTPException(status_code=503, detail="Remote batch not configured.")
+    form = await read_form(request)
+    try:
+        # Plain fields first: nothing is written to disk for a request that is rejected anyway.
+        concurrency = form.get("concurrency")
+        event_order = form.get("event_order")
+        try:
+            concurrency = min(64, max(1, int(concurrency))) if concurrency else None
+        except ValueError:
+            raise HTTPException(status_code=422, detail="concurrency must be an integer")
+        if event_order not in (None, "", "completion", "input"):
+            raise HTTPException(status_code=422, detail="event_order must be 'completion' or 'input'")
+        workdir, manifest = await asyncio.to_thread(stage_batch_upload, form)
+    finally:
+        await form.close()
+
+    try:
+        job = start_batch_job(manifest, workdir, concurrency=concurrency, event_order=event_order or None, cleanup_dir=workdir)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)  # bad manifest (400) or no job slot (429)
+        raise
+    return {"status": "queued" if job.queued else "started", "job_id": job.id, "total": job.total, "processed": job.processed}
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from pathlib import Path
+from typing import Literal, Optional
 
 class InferenceRequest(BaseModel):
     label: str
@@ -9,6 +10,9 @@ class InferenceRequest(BaseModel):
 class BatchRequest(BaseModel):
     json_path: Path
     pdfs_root_path: Path = Field(default=Path("ai-fellowship-data/files"))
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+    event_order: Optional[Literal["completion", "input"]] = None
+    resume_job_id: Optional[str] = None  # /batch/start: continue this job, skipping items already done
 
     @field_validator("pdfs_root_path", mode="before")
     @classmethod
@@ -1,116 +1,539 @@
 import time
+import uuid
+import shutil
 import asyncio
 from pathlib import Path
-from typing import List
+from typing import Awaitable, Callable, Collection, Dict, List, Optional, Sequence, Tuple, Union
+
 from fastapi import HTTPException
 
-from backend.core.sse import sse_format
+from backend.core.admission import job_gate
+from backend.core.config import settings
 from backend.models.job_model import BatchJob
+from backend.models.job_store import get_job_store
+from backend.parsing.parse_pool import PDFPrefetcher
+from backend.services.dataset_reader import DatasetError, DatasetFeed, sniff_format
 from backend.services.dataset_utils import resolve_pdf_path_from_sample, materialize_filled_item
-from backend.services.extraction_service import run_single_infer
+from backend.services.keep_warm import get_keep_warm
+from backend.services.extraction_service import (
+    build_requisition, cache_lookup, cache_merge, cached_result, parse_pdf_text, run_multi_infer,
+)
+from backend.services.result_cache import get_result_cache
+from shared.parsing.content_hash import hash_file
+
+ItemResult = Tuple[int, dict, dict]  # (index, filled_item, meta)
+Dataset = Union[List[dict], Dict[int, dict]]  # indexable by dataset position
+
+def empty_filled_item(sample: dict) -> dict:
+    empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
+    filled = {"label": sample.get("label"), "extraction_schema": empty}
+    if "pdf_path" in sample: filled["pdf_path"] = sample["pdf_path"]
+    if "pdf_filename" in sample: filled["pdf_filename"] = sample["pdf_filename"]
+    return filled
 
-async def run_batch_job(job: BatchJob, dataset: List[dict], root: Path) -> None:
-    await job.queue.put({"type": "start", "job_id": job.id, "total": job.total, "processed": 0, "status": job.status})
-    loop = asyncio.get_running_loop()
+class DocumentGroups:
+    """
+    Items that reference the same PDF under the same label, registered in
+    dataset order as they are read.
 
-    for i, sample in enumerate(dataset):
+    The first item of a group (its leader) is extracted with the union of the
+    schema keys of every member seen before it is dispatched; the other members
+    wait for that answer and fill their own schema from it, so each document
+    goes through parsing and the remote call once per batch. An item that shows
+    up after its leader was dispatched and asks for keys outside that union
+    starts a new group.
+    """
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._first: Dict[Tuple[Path, Optional[str]], int] = {}
+        self._leader: Dict[int, int] = {}
+        self._schemas: Dict[int, dict] = {}
+        self._sealed: set[int] = set()
+        self._answers: Dict[int, asyncio.Future] = {}
+        self._members: Dict[int, int] = {}  # leader -> members not released yet
+        self._keys: Dict[int, Tuple[Path, Optional[str]]] = {}
+        self.duplicates = 0
+
+    def add(self, i: int, sample: dict) -> None:
+        try:
+            pdf_path, _ = resolve_pdf_path_from_sample(sample, self.root)
+        except ValueError:
+            return
+        key = (pdf_path, sample.get("label"))
+        schema = sample.get("extraction_schema") or {}
+        leader = self._first.get(key)
+        if leader is None or (leader in self._sealed and not schema.keys() <= self._schemas[leader].keys()):
+            leader = self._first[key] = i
+            self._keys[leader] = key
+        else:
+            self.duplicates += 1
+        self._leader[i] = leader
+        self._members[leader] = self._members.get(leader, 0) + 1
+        union = self._schemas.setdefault(leader, {})
+        for k, v in schema.items():
+            union.setdefault(k, v)
+
+    def leader(self, i: int) -> int:
+        return self._leader.get(i, i)
+
+    def is_follower(self, i: int) -> bool:
+        return self.leader(i) != i
+
+    def union(self, i: int, sample: dict) -> dict:
+        return self._schemas.get(i) or sample.get("extraction_schema") or {}
+
+    def schema(self, i: int, sample: dict) -> dict:
+        """Schema to request for item i (the group union for a leader); fixes the group's keys."""
+        self._sealed.add(i)
+        return self.union(i, sample)
+
+    def _future(self, leader: int) -> asyncio.Future:
+        fut = self._answers.get(leader)
+        if fut is None:
+            fut = self._answers[leader] = asyncio.get_running_loop().create_future()
+        return fut
+
+    def publish(self, leader: int, modal_item: Optional[dict], error: Optional[str]) -> None:
+        fut = self._future(leader)
+        if not fut.done():
+            fut.set_result((modal_item, error))
+
+    async def answer(self, i: int) -> Tuple[Optional[dict], Optional[str]]:
+        """(modal item, error) of item i's leader, once it has been extracted."""
+        return await asyncio.shield(self._future(self.leader(i)))
+
+    def release(self, i: int) -> None:
+        """Item i's result is recorded; the group is dropped once all its members are."""
+        leader = self._leader.pop(i, None)
+        if leader is None:
+            return
+        self._members[leader] -= 1
+        if self._members[leader]:
+            return
+        del self._members[leader]
+        self._schemas.pop(leader, None)
+        self._answers.pop(leader, None)
+        self._sealed.discard(leader)
+        key = self._keys.pop(leader, None)
+        if self._first.get(key) == leader:
+            del self._first[key]  # a later duplicate starts a new group
+
+async def prefetchable_path(sample: dict, root: Path) -> Optional[Path]:
+    try:
+        pdf_path, _ = resolve_pdf_path_from_sample(sample, root)
+    except ValueError:
+        return None
+    if not pdf_path.is_file():
+        return None
+    cache = get_result_cache()
+    if cache is not None:
+        keys = list((sample.get("extraction_schema") or {}).keys())
+        content_hash = await asyncio.to_thread(hash_file, pdf_path)
+        entry = cache.peek(content_hash, sample.get("label"))
+        if entry is not None and all(k in entry for k in keys):
+            return None  # answered from the result cache, nothing to parse
+    return pdf_path
+
+class ChunkPlanner:
+    """
+    Pulls items from a DatasetFeed and hands out chunks of consecutive indices
+    for bulk submission; every item read is passed to `on_item` first.
+    The first chunk is a single item (item 0 starts as soon as it is read).
+    After that the size follows what the finished chunks report (observe()):
+    it grows by `growth` while calls come back within `target_ms`, halves when
+    a call is slower, and drops to the items-per-call that fit when
+    split_by_bytes had to split a chunk. It never exceeds BATCH_CHUNK_MAX_ITEMS.
+    Indices in `skip` (done in a resumed job) are read but not handed out.
+    """
+    def __init__(self, feed: DatasetFeed, on_item: Callable[[int, dict], None], skip: Collection[int] = (),
+                 max_items: Optional[int] = None, growth: Optional[float] = None,
+                 target_ms: Optional[float] = None) -> None:
+        self.feed = feed
+        self.on_item = on_item
+        self.skip = skip
+        self.max_items = max(1, max_items or settings.BATCH_CHUNK_MAX_ITEMS)
+        self.growth = max(1.0, growth or settings.BATCH_CHUNK_GROWTH)
+        self.target_ms = target_ms or settings.BATCH_CHUNK_TARGET_MS
+        self._size = 1.0
+        self._lock = asyncio.Lock()  # keeps chunks contiguous across workers
+
+    async def next_chunk(self) -> Optional[List[int]]:
+        async with self._lock:
+            size = self.size
+            chunk: List[int] = []
+            while len(chunk) < size and (item := await self.feed.next()) is not None:
+                i, sample = item
+                self.on_item(i, sample)
+                if i not in self.skip:
+                    chunk.append(i)
+            return chunk or None
+
+    def observe(self, sent: int, calls: int, slowest_ms: float) -> None:
+        """Feedback from a finished chunk: `sent` items went out in `calls` remote calls."""
+        if calls > 1:
+            self._size = max(1.0, sent / calls)  # the byte limit, not the planner, decided the call size
+        elif sent and slowest_ms > self.target_ms:
+            self._size = max(1.0, self._size / 2)
+        else:
+            self._size = min(self._size * self.growth, float(self.max_items))
+
+    @property
+    def size(self) -> int:
+        return min(int(self._size), self.max_items)
+
+class BatchInput:
+    """
+    Items read so far from a DatasetFeed plus the per-batch helpers built on
+    them: duplicate groups (BATCH_DEDUP) and the PDF prefetcher. Samples, and
+    groups whose members are all done, are dropped with release() once their
+    result is recorded, so memory follows the in-flight window rather than the
+    dataset size.
+    """
+    def __init__(self, feed: DatasetFeed, root: Path, skip: Collection[int] = (), lane: Optional[str] = None) -> None:
+        self.feed = feed
+        self.root = root
+        self.skip = skip
+        self.lane = lane
+        self.samples: Dict[int, dict] = {}
+        self.groups = DocumentGroups(root) if settings.BATCH_DEDUP else None
+        self.prefetcher = PDFPrefetcher(0, self._prefetch_path)
+        self._planner: Optional[ChunkPlanner] = None
+
+    def add(self, i: int, sample: dict) -> None:
+        if i in self.skip:
+            return
+        self.samples[i] = sample
+        if self.groups is not None:
+            self.groups.add(i, sample)
+        self.prefetcher.total = i + 1  # items past this have not been read yet
+
+    def release(self, i: int) -> None:
+        self.samples.pop(i, None)
+        if self.groups is not None:
+            self.groups.release(i)
+
+    async def _prefetch_path(self, i: int) -> Optional[Path]:
+        sample = self.samples.get(i)
+        if sample is None:
+            return None  # skipped, or already processed
+        if self.groups is not None:
+            if self.groups.is_follower(i):
+                return None  # filled from its leader's answer
+            sample = {**sample, "extraction_schema": self.groups.union(i, sample)}
+        return await prefetchable_path(sample, self.root)
+
+    def planner(self) -> ChunkPlanner:
+        self._planner = ChunkPlanner(self.feed, self.add, self.skip)
+        return self._planner
+
+    async def process(self, chunk: Sequence[int]) -> List[ItemResult]:
+        observe = self._planner.observe if self._planner is not None else None
+        results = await process_chunk(chunk, self.samples, self.root, self.prefetcher, self.groups, self.lane, observe)
+        for i, _filled, _meta in results:
+            self.release(i)
+        return results
+
+    def close(self) -> None:
+        self.prefetcher.close()
+        self.feed.close()
+
+def place(items: List[Optional[dict]], i: int, value: dict) -> None:
+    """items[i] = value, growing the list with None as needed."""
+    if i >= len(items):
+        items.extend([None] * (i + 1 - len(items)))
+    items[i] = value
+
+def split_by_bytes(requisitions: List[Tuple[int, dict]], max_bytes: int) -> List[List[Tuple[int, dict]]]:
+    """Group requisitions so each request's pdf_content stays under max_bytes (an oversized item goes alone)."""
+    groups: List[List[Tuple[int, dict]]] = []
+    current: List[Tuple[int, dict]] = []
+    size = 0
+    for i, req in requisitions:
+        n = len((req.get("pdf_content") or "").encode("utf-8"))
+        if current and size + n > max_bytes:
+            groups.append(current)
+            current, size = [], 0
+        current.append((i, req))
+        size += n
+    if current:
+        groups.append(current)
+    return groups
+
+async def process_chunk(indices: Sequence[int], dataset: Dataset, root: Path,
+                        prefetcher: Optional[PDFPrefetcher] = None,
+                        groups: Optional[DocumentGroups] = None, lane: Optional[str] = None,
+                        observe: Optional[Callable[[int, int, float], None]] = None) -> List[ItemResult]:
+    """
+    Run a chunk of dataset items through the remote scheduler in as few calls as
+    the byte limit allows. Never raises: failures come back as empty filled items
+    plus meta records with status "error", mapped to their dataset index.
+    Unresolvable references also carry error_kind="bad_reference"; callers pop
+    it before the meta is stored or returned.
+
+    With `groups`, a duplicate item is not sent again: it is filled from its
+    group leader's answer once that is available (same chunk or an earlier one).
+    `lane` identifies the batch for fair scheduling of remote calls.
+    observe(items sent, remote calls, slowest call ms) is called once the
+    remote calls are done (see ChunkPlanner.observe).
+    """
+    results: List[ItemResult] = []
+    ready: List[Tuple[int, dict]] = []
+    followers: List[int] = []
+    file_names: dict[int, str] = {}
+    cached: dict[int, Tuple[Optional[str], dict, dict]] = {}  # index -> (content hash, cached fields, schema)
+    t0 = time.perf_counter()
+
+    def elapsed_ms() -> int:
+        return int((time.perf_counter() - t0) * 1000)
+
+    def finish(i: int, modal_item: Optional[dict], error: Optional[str], **extra) -> None:
+        sample = dataset[i]
+        if groups is not None and not groups.is_follower(i):
+            groups.publish(i, modal_item, error)
+        if error:
+            results.append((i, empty_filled_item(sample), {"index": i, "file_name": file_names[i], "status": "error", "response_ms": elapsed_ms(), "error": str(error), **extra}))
+        else:
+            results.append((i, materialize_filled_item(sample, modal_item), {"index": i, "file_name": file_names[i], "status": "ok", "response_ms": elapsed_ms(), **extra}))
+
+    for i in indices:
+        sample = dataset[i]
         try:
             pdf_path, ref = resolve_pdf_path_from_sample(sample, root)
         except ValueError as e:
-            empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
-            filled = {"label": sample.get("label"), "extraction_schema": empty}
-            if "pdf_path" in sample: filled["pdf_path"] = sample["pdf_path"]
-            if "pdf_filename" in sample: filled["pdf_filename"] = sample["pdf_filename"]
             file_name = (sample.get("pdf_path") or sample.get("pdf_filename") or f"item_{i}.pdf").split("/")[-1]
-            job.filled_items.append(filled)
-            job.meta_items.append({"index": i, "file_name": file_name, "status": "error", "response_ms": 0, "error": str(e)})
-            job.processed += 1
-            await job.queue.put({
-                "type": "item_error",
-                "job_id": job.id,
-                "index": i,
-                "file_name": file_name,
-                "response_ms": 0,
-                "error": str(e),
-                "processed": job.processed,
-                "total": job.total,
-                "preview_download_path": f"/batch/item/{job.id}/{i}/download",
-            })
+            results.append((i, empty_filled_item(sample), {"index": i, "file_name": file_name, "status": "error", "response_ms": 0, "error": str(e), "error_kind": "bad_reference"}))
             continue
 
-        file_name = Path(ref).name
-        t0 = time.perf_counter()
-
+        file_names[i] = Path(ref).name
+        if groups is not None and groups.is_follower(i):
+            followers.append(i)
+            continue
         if not pdf_path.is_file():
-            duration_ms = int((time.perf_counter() - t0) * 1000)
-            empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
-            filled = {"label": sample.get("label"), "extraction_schema": empty}
-            if "pdf_path" in sample: filled["pdf_path"] = sample["pdf_path"]
-            if "pdf_filename" in sample: filled["pdf_filename"] = sample["pdf_filename"]
-            job.filled_items.append(filled)
-            job.meta_items.append({"index": i, "file_name": file_name, "status": "error", "response_ms": duration_ms, "error": f"File not found: {pdf_path}"})
-            job.processed += 1
-            await job.queue.put({
-                "type": "item_error",
-                "job_id": job.id,
-                "index": i,
-                "file_name": file_name,
-                "response_ms": duration_ms,
-                "error": f"File not found: {pdf_path}",
-                "processed": job.processed,
-                "total": job.total,
-                "preview_download_path": f"/batch/item/{job.id}/{i}/download",
-            })
+            finish(i, None, f"File not found: {pdf_path}")
             continue
 
+        schema = groups.schema(i, sample) if groups is not None else (sample.get("extraction_schema") or {})
         try:
-            modal_res = await loop.run_in_executor(None, lambda: run_single_infer(sample.get("label"), sample.get("extraction_schema"), str(pdf_path)))
-            duration_ms = int((time.perf_counter() - t0) * 1000)
-            modal_item = (modal_res or [{}])[0]
-            filled = materialize_filled_item(sample, modal_item)
+            content_hash, hits, missing = await cache_lookup(sample.get("label"), schema, pdf_path)
+            if not missing:
+                finish(i, cached_result(sample.get("label"), pdf_path, hits), None, cached=True)
+                continue
+            cached[i] = (content_hash, hits, schema)
 
-            job.filled_items.append(filled)
-            job.meta_items.append({"index": i, "file_name": file_name, "status": "ok", "response_ms": duration_ms})
-            job.processed += 1
+            pdf_content = await prefetcher.get(i) if prefetcher is not None else None
+            if pdf_content is None:
+                pdf_content = await parse_pdf_text(pdf_path, interactive=False)
+        except Exception as e:
+            finish(i, None, str(e))
+            continue
+        ready.append((i, build_requisition(sample.get("label"), {k: schema[k] for k in missing}, pdf_path, pdf_content)))
+    if prefetcher is not None:
+        for i in indices:
+            prefetcher.discard(i)  # items settled without get(i); no-op for the rest
 
-            await job.queue.put({
-                "type": "item_ok",
-                "job_id": job.id,
-                "index": i,
-                "file_name": file_name,
-                "response_ms": duration_ms,
-                "filled_item": filled,
-                "processed": job.processed,
-                "total": job.total,
-                "preview_download_path": f"/batch/item/{job.id}/{i}/download",
-            })
+    calls = split_by_bytes(ready, settings.BATCH_CHUNK_MAX_BYTES)
+    slowest_ms = 0.0
+    for group in calls:
+        t_call = time.perf_counter()
+        try:
+            modal_res = await run_multi_infer([req for _, req in group], lane=lane)
+            errors = [None] * len(group)
         except Exception as e:
-            duration_ms = int((time.perf_counter() - t0) * 1000)
-            empty = {k: None for k in (sample.get("extraction_schema") or {}).keys()}
-            filled = {"label": sample.get("label"), "extraction_schema": empty}
-            if "pdf_path" in sample: filled["pdf_path"] = sample["pdf_path"]
-            if "pdf_filename" in sample: filled["pdf_filename"] = sample["pdf_filename"]
-            job.filled_items.append(filled)
-            job.meta_items.append({"index": i, "file_name": file_name, "status": "error", "response_ms": duration_ms, "error": str(e)})
+            modal_res = [{}] * len(group)
+            errors = [str(e)] * len(group)
+        slowest_ms = max(slowest_ms, (time.perf_counter() - t_call) * 1000)
+
+        for (i, _req), modal_item, error in zip(group, modal_res, errors):
+            error = error or (modal_item or {}).get("_error")
+            if error:
+                finish(i, None, error)
+            else:
+                content_hash, hits, schema = cached[i]
+                finish(i, cache_merge(content_hash, dataset[i].get("label"), schema, hits, modal_item), None)
+
+    if observe is not None:
+        observe(len(ready), len(calls), slowest_ms)
+
+    # Leaders of this chunk's duplicates are either above (already published) or in an earlier chunk.
+    for i in followers:
+        modal_item, error = await groups.answer(i)
+        finish(i, modal_item, error, deduplicated_from=groups.leader(i))
+
+    results.sort(key=lambda r: r[0])
+    return results
+
+async def run_chunk_pool(planner: ChunkPlanner, concurrency: int, handle: Callable[[Sequence[int]], Awaitable[None]]) -> None:
+    """
+    Call handle(chunk) for every chunk the planner yields with at most `concurrency`
+    chunks in flight. The first chunk (item 0) runs alone so the first result is
+    not slowed by the rest of the batch.
+    """
+    first = await planner.next_chunk()
+    if first is None:
+        return
+    await handle(first)
+
+    async def worker() -> None:
+        while (chunk := await planner.next_chunk()) is not None:
+            await handle(chunk)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+async def run_batch_job(job: BatchJob, feed: DatasetFeed, root: Path,
+                        concurrency: Optional[int] = None, event_order: Optional[str] = None) -> None:
+    """
+    Process a dataset in chunks on a bounded worker pool while it is being read.
+
+    event_order="completion" emits each item as soon as its chunk finishes;
+    "input" buffers results and emits them in dataset order.
+    job.filled_items is always kept in input order, and every finished chunk is
+    checkpointed to the job store. job.total is None until the feed reaches the
+    end of the dataset. Items already filled (a resumed job, see
+    BatchJob.resumed) are skipped.
+    """
+    concurrency = concurrency or settings.BATCH_CONCURRENCY
+    in_input_order = (event_order or settings.BATCH_EVENT_ORDER) == "input"
+    done = {i for i, filled in enumerate(job.filled_items) if filled is not None}
+    store = get_job_store()
+    batch = BatchInput(feed.start(), root, skip=done, lane=job.id)
+    get_keep_warm().prewarm(concurrency)  # one container per chunk in flight
+
+    job.events.append({"type": "start", "job_id": job.id, "total": job.total, "processed": job.processed, "status": job.status})
+
+    emitted = job.processed
+    next_to_emit = 0
+    pending: dict[int, dict] = {}
+
+    async def emit(meta: dict) -> None:
+        nonlocal emitted
+        i = meta["index"]
+        emitted += 1
+        event = {
+            "type": "item_ok" if meta["status"] == "ok" else "item_error",
+            "job_id": job.id,
+            "index": i,
+            "file_name": meta["file_name"],
+            "response_ms": meta["response_ms"],
+            "processed": emitted,
+            "total": job.total,
+            "read": feed.count,  # items read so far; total stays None until the end of the dataset
+            "preview_download_path": f"/batch/item/{job.id}/{i}/download",
+        }
+        if meta["status"] == "ok":
+            event["filled_item"] = job.filled_items[i]
+        else:
+            event["error"] = meta.get("error")
+        job.events.append(event)
+
+    async def handle(chunk: Sequence[int]) -> None:
+        nonlocal next_to_emit
+        results = await batch.process(chunk)
+        for i, filled, meta in results:
+            meta.pop("error_kind", None)  # internal to process(); not part of the item meta
+            place(job.filled_items, i, filled)
+            job.meta_items.append(meta)
             job.processed += 1
-            await job.queue.put({
-                "type": "item_error",
-                "job_id": job.id,
-                "index": i,
-                "file_name": file_name,
-                "response_ms": duration_ms,
-                "error": str(e),
-                "processed": job.processed,
-                "total": job.total,
-                "preview_download_path": f"/batch/item/{job.id}/{i}/download",
-            })
+        job.total = feed.total
 
+        for i, _filled, meta in results:
+            if not in_input_order:
+                await emit(meta)
+                continue
+            pending[i] = meta
+            while next_to_emit in pending or next_to_emit in done:
+                if next_to_emit in pending:
+                    await emit(pending.pop(next_to_emit))
+                next_to_emit += 1
+        store.checkpoint(job, results)  # after the events, so the stored last event id covers them
+
+    try:
+        await run_chunk_pool(batch.planner(), concurrency, handle)
+    except asyncio.CancelledError:
+        mark_cancelled(job)
+        raise
+    finally:
+        batch.close()
+
+    job.total = feed.total
     job.finished_at = time.time()
-    await job.queue.put({
+    store.finish(job)
+    complete = {
         "type": "complete",
         "job_id": job.id,
         "status": job.status,
         "processed": job.processed,
         "failed": len([m for m in job.meta_items if m.get("status") == "error"]),
         "total": job.total,
-    })
+    }
+    if feed.error:
+        complete["dataset_error"] = feed.error  # ingestion stopped at the first malformed item
+    job.events.append(complete)
+
+def mark_cancelled(job: BatchJob) -> None:
+    job.cancelled = True
+    job.finished_at = time.time()
+    get_job_store().finish(job)
+    job.events.append({"type": "cancelled", "job_id": job.id, "status": job.status,
+                       "processed": job.processed, "total": job.total})
+
+# A resumed job keeps results by dataset index, so these must not change.
+RESUME_KEYS = ("json_path", "pdfs_root_path")
+
+def start_batch_job(ds_path: Path, root: Path, concurrency: Optional[int] = None, event_order: Optional[str] = None,
+                    resume_job_id: Optional[str] = None, cleanup_dir: Optional[Path] = None) -> BatchJob:
+    """
+    Register a job (new, or resumed from the store) and start run_batch_job in
+    the background. `cleanup_dir` (an upload's staging directory) is removed
+    once the job ends.
+
+    At most BATCH_MAX_JOBS jobs run at once; the next BATCH_MAX_QUEUED_JOBS
+    wait with status "queued", and anything beyond that is rejected with 429.
+    """
+    try:
+        sniff_format(ds_path)  # items themselves are read while the job runs
+    except DatasetError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid dataset JSON: {e}")
+
+    store = get_job_store()
+    params = {"json_path": str(ds_path), "pdfs_root_path": str(root),
+              "concurrency": concurrency, "event_order": event_order}
+    if resume_job_id:
+        previous = store.get(resume_job_id)
+        if not previous:
+            raise HTTPException(status_code=404, detail="Unknown job_id")
+        if previous.status in ("running", "queued"):
+            raise HTTPException(status_code=409, detail="Job is still running")
+        stored = store.params(resume_job_id) or {}
+        changed = [k for k in RESUME_KEYS if k in stored and stored[k] != params[k]]
+        if changed:
+            raise HTTPException(status_code=409, detail=f"Job {resume_job_id} was started with a different {', '.join(changed)}")
+        job = previous.resumed()
+    else:
+        job = BatchJob(id=uuid.uuid4().hex)
+
+    gate = job_gate()
+    ticket = gate.enter()
+    job.queued = ticket is not None
+    store.add(job, params)
+
+    async def run() -> None:
+        try:
+            if ticket is not None:
+                job.events.append({"type": "queued", "job_id": job.id, "status": job.status})
+                try:
+                    await gate.wait(ticket, timeout=None)
+                except asyncio.CancelledError:
+                    job.queued = False
+                    mark_cancelled(job)
+                    raise
+                job.queued = False
+            try:
+                await run_batch_job(job, DatasetFeed(ds_path), root, concurrency=concurrency, event_order=event_order)
+            finally:
+                gate.release()
+        finally:
+            if cleanup_dir is not None:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+    job.task = asyncio.create_task(run())
+    return job
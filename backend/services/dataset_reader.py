@@ -0,0 +1,183 @@
+import json
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO, Tuple
+
+from backend.core.config import settings
+
+READ_BLOCK_CHARS = 256 * 1024
+_EOF = object()
+_NUMBER_CHARS = "0123456789.eE+-"
+
+class DatasetError(ValueError):
+    """Malformed dataset manifest."""
+
+def sniff_format(path: Path) -> str:
+    """
+    'jsonl' or 'json' (array), from the extension or the first non-blank
+    character. The first item is decoded as well, so a file that is not a
+    dataset is rejected before a job starts; later items are checked as read.
+    """
+    fmt = None
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        fmt = "jsonl"
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            while True:
+                block = f.read(4096)
+                if not block:
+                    raise DatasetError("Dataset is empty")
+                stripped = block.lstrip()
+                if stripped:
+                    break
+        if stripped[0] == "[":
+            fmt = "json"
+        elif stripped[0] == "{":
+            fmt = "jsonl"
+        else:
+            raise DatasetError("Dataset must be a JSON array or JSON Lines of objects")
+    with open(path, "r", encoding="utf-8") as f:
+        first = next(_iter_jsonl(f) if fmt == "jsonl" else _iter_json_array(f), None)
+    if first is not None and not isinstance(first, dict):
+        raise DatasetError("Item 0 is not a JSON object")
+    return fmt
+
+def _iter_jsonl(f: TextIO) -> Iterator[Any]:
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise DatasetError(f"Invalid JSON on line {line_no}: {e}")
+
+def _iter_json_array(f: TextIO) -> Iterator[Any]:
+    """Decode the elements of a top-level JSON array one at a time with raw_decode."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        block = f.read(READ_BLOCK_CHARS)
+        if not block:
+            eof = True
+            return False
+        buf = buf[pos:] + block  # drop what has been consumed
+        pos = 0
+        return True
+
+    def skip_ws() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    if skip_ws() != "[":
+        raise DatasetError("Dataset must start with '['")
+    pos += 1
+    first = True
+    while True:
+        ch = skip_ws()
+        if ch is None:
+            raise DatasetError("Unexpected end of dataset (missing ']')")
+        if ch == "]":
+            return
+        if not first:
+            if ch != ",":
+                raise DatasetError(f"Expected ',' or ']' in dataset, got {ch!r}")
+            pos += 1
+            skip_ws()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof or not fill():
+                    raise DatasetError(f"Invalid JSON in dataset: {e}")
+                continue
+            # A number running to the end of the block ("12" read as "1") may go on in the next one.
+            if eof or not isinstance(item, (int, float)) or buf[end:].lstrip(_NUMBER_CHARS) or not fill():
+                break
+        pos = end
+        first = False
+        yield item
+
+def iter_dataset(path: Path) -> Iterator[dict]:
+    """Yield dataset items one at a time from a JSON array or a JSON Lines file."""
+    fmt = sniff_format(path)
+    with open(path, "r", encoding="utf-8") as f:
+        items = _iter_jsonl(f) if fmt == "jsonl" else _iter_json_array(f)
+        for n, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise DatasetError(f"Item {n} is not a JSON object")
+            yield item
+
+def validate_dataset(path: Path) -> int:
+    """
+    Read the whole dataset once, keeping nothing, and return its item count;
+    DatasetError at the first malformed item. For callers that must not start
+    work on a file that turns out to be broken (the synchronous /batch route).
+    """
+    return sum(1 for _ in iter_dataset(path))
+
+class DatasetFeed:
+    """
+    Reads a dataset on a background thread into a bounded queue.
+
+    The reader blocks when `maxsize` items are waiting (backpressure), so memory
+    does not grow with the manifest, and the first item is available as soon as
+    it has been decoded. `total` stays None until the end of the file; a parse
+    error ends the feed early and is kept in `error`.
+    """
+    def __init__(self, path: Path, maxsize: Optional[int] = None) -> None:
+        self.path = path
+        self.count = 0
+        self.total: Optional[int] = None
+        self.error: Optional[str] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize or settings.DATASET_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Future] = None
+
+    def start(self) -> "DatasetFeed":
+        loop = asyncio.get_running_loop()
+        self._task = loop.run_in_executor(None, self._read, loop)
+        return self
+
+    def _read(self, loop: asyncio.AbstractEventLoop) -> None:
+        def put(item: Any) -> None:
+            asyncio.run_coroutine_threadsafe(self._queue.put(item), loop).result()
+
+        try:
+            for sample in iter_dataset(self.path):
+                if self._stop.is_set():
+                    return
+                put(sample)
+        except Exception as e:
+            if not self._stop.is_set():
+                put(e)
+            return
+        if not self._stop.is_set():
+            put(_EOF)
+
+    async def next(self) -> Optional[Tuple[int, dict]]:
+        """(index, sample) of the next item, or None once the feed is exhausted."""
+        if self.total is not None:
+            return None
+        item = await self._queue.get()
+        if item is _EOF or isinstance(item, Exception):
+            if isinstance(item, Exception):
+                self.error = str(item)
+            self.total = self.count
+            return None
+        i = self.count
+        self.count += 1
+        return i, item
+
+    def close(self) -> None:
+        self._stop.set()
+        while not self._queue.empty():  # unblock a reader waiting on a full queue
+            self._queue.get_nowait()
@@ -1,11 +1,229 @@
+import time
+import asyncio
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple, Union
 from fastapi import HTTPException
 
+from backend.core.admission import remote_scheduler
 from backend.core.config import settings
+from shared.metrics import REGISTRY, Histogram
 from backend.clients.modal_client import forward_request
+from backend.services.keep_warm import count_cold_starts, get_keep_warm
+from backend.parsing.parse_cache import get_parse_cache
+from backend.services.result_cache import get_result_cache
+from shared.parsing.content_hash import hash_bytes, hash_file
 
-def run_single_infer(label: str, extraction_schema: dict, pdf_path_str: str) -> Any:
+REMOTE_MS = REGISTRY.histogram("backend_remote_request_ms", "Round trip of one extraction call to the remote scheduler",
+                               labels=("lane", "outcome"))
+REMOTE_ITEMS = REGISTRY.counter("backend_remote_items_total", "Requisitions sent to the remote scheduler", ("lane",))
+RESULT_CACHE = REGISTRY.counter("backend_result_cache_total", "Result cache lookups by outcome", ("result",))
+PARSE_CACHE = REGISTRY.counter("backend_parse_cache_total", "Parse cache lookups by outcome", ("result",))
+
+async def parse_pdf_text(p: Path, interactive: bool = True) -> str:
+    try:
+        from backend.parsing.parse_pool import ParseTimeout, get_parse_service
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Parser import error: {e}")
+
+    try:
+        return await get_parse_service().parse(p, interactive=interactive)
+    except ParseTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+def build_requisition(label: str, extraction_schema: dict, pdf_path: Path, pdf_content: str) -> dict:
+    return {
+        "label": label,
+        "extraction_schema": extraction_schema,
+        "pdf_path": str(pdf_path),
+        "pdf_content": pdf_content,
+    }
+
+def cached_result(label: str, pdf_path: Path, fields: dict) -> dict:
+    """Same shape as a remote result item, built from cached fields."""
+    return {"label": label, "pdf_filename": pdf_path.name, "requested_fields": fields}
+
+async def cache_lookup(label: str, extraction_schema: dict,
+                       source: Union[Path, bytes, memoryview]) -> Tuple[Optional[str], dict, List[str]]:
+    """
+    (content hash, cached fields, keys still to extract) for a PDF on disk or in
+    memory; hash is None when the cache is off.
+    """
+    keys = list((extraction_schema or {}).keys())
+    cache = get_result_cache()
+    if cache is None:
+        return None, {}, keys
+    if isinstance(source, Path):
+        content_hash = await asyncio.to_thread(hash_file, source)
+    else:
+        content_hash = await asyncio.to_thread(hash_bytes, source)
+    hits, missing = cache.lookup(content_hash, label, keys)
+    RESULT_CACHE.labels("miss" if not hits else "partial" if missing else "hit").inc()
+    return content_hash, hits, missing
+
+def cache_merge(content_hash: Optional[str], label: str, extraction_schema: dict,
+                hits: dict, modal_item: dict) -> dict:
+    """Store freshly extracted fields and return the item with cached + new fields in schema order."""
+    fields = (modal_item or {}).get("requested_fields") or {}
+    cache = get_result_cache()
+    if cache is not None and content_hash is not None:
+        cache.store(content_hash, label, fields)
+    merged = {**hits, **fields}
+    return {**(modal_item or {}), "requested_fields": {k: merged.get(k) for k in (extraction_schema or {})}}
+
+async def run_multi_infer(requisitions: List[dict], lane: Optional[str] = None) -> List[dict]:
+    """
+    Send several requisitions in one call to the Modal scheduler.
+    Results come back in the same order; a failed item is {"_error": "..."}.
+    `lane` is the batch job making the call (None for interactive traffic),
+    used to share remote slots fairly (see FairScheduler).
+    """
+    if not settings.REMOTE_ENABLED:
+        raise HTTPException(status_code=503, detail="Remote inference not configured.")
+    kind = "interactive" if lane is None else "batch"
+    async with remote_scheduler().slot(lane), get_keep_warm().track():
+        REMOTE_ITEMS.labels(kind).inc(len(requisitions))
+        t0 = time.perf_counter()
+        outcome = "error"
+        try:
+            res = await forward_request(settings.MODAL_EXTRACTION_URL, data=requisitions, method="POST",
+                                        items=len(requisitions))
+            outcome = "ok"
+        finally:
+            REMOTE_MS.labels(kind, outcome).observe((time.perf_counter() - t0) * 1000)
+    if not isinstance(res, list) or len(res) != len(requisitions):
+        got = len(res) if isinstance(res, list) else type(res).__name__
+        raise HTTPException(status_code=502, detail=f"Remote returned {got} results for {len(requisitions)} requisitions")
+    get_keep_warm().cold_start("user", count_cold_starts(res))
+    return res
+
+class MicroBatcher:
+    """
+    Coalesces concurrent /infer calls into multi-item scheduler requests.
+
+    The first queued requisition opens a window of at most max_wait_ms; anything
+    that arrives before it closes (up to max_batch items) is sent in the same call
+    and each caller gets its own item back. On close() every caller still
+    waiting (queued, being collected or in flight) gets a 503.
+    """
+    def __init__(self, max_batch: int, max_wait_ms: float) -> None:
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self.batch_sizes = Histogram(buckets=(1, 2, 4, 8, 16, 32, 64))
+        self.wait_ms = Histogram(buckets=(0.5, 1, 2, 5, 10, 20, 50, 100))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._collecting: List[Tuple[dict, asyncio.Future, float]] = []
+        self._dispatches: set = set()
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._collect())
+        return self._queue
+
+    async def submit(self, requisition: dict) -> dict:
+        queue = self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        await queue.put((requisition, fut, time.perf_counter()))
+        return await fut
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._collecting = batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._collecting = []
+            task = asyncio.create_task(self._dispatch(batch))  # keep collecting while this one is in flight
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[dict, asyncio.Future, float]], error: BaseException) -> None:
+        for _, fut, _ in batch:
+            if not fut.done():
+                fut.set_exception(error)
+
+    async def _dispatch(self, batch: List[Tuple[dict, asyncio.Future, float]]) -> None:
+        now = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, queued_at in batch:
+            self.wait_ms.observe((now - queued_at) * 1000)
+        try:
+            res = await run_multi_infer([req for req, _, _ in batch])
+        except asyncio.CancelledError:
+            self._fail(batch, _shutting_down())
+            raise
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for (_, fut, _), item in zip(batch, res):
+            if not fut.done():  # caller may have gone away
+                fut.set_result(item)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._dispatches):
+            task.cancel()
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        pending, self._collecting = self._collecting, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, _shutting_down())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+def _shutting_down() -> HTTPException:
+    return HTTPException(status_code=503, detail="Extraction service is shutting down.")
+
+_microbatcher: Optional[MicroBatcher] = None
+
+def get_microbatcher() -> MicroBatcher:
+    global _microbatcher
+    if _microbatcher is None:
+        _microbatcher = MicroBatcher(settings.MICROBATCH_MAX_SIZE, settings.MICROBATCH_MAX_WAIT_MS)
+    return _microbatcher
+
+async def close_microbatcher() -> None:
+    if _microbatcher is not None:
+        await _microbatcher.close()
+
+def microbatch_stats() -> Dict[str, Any]:
+    if not settings.MICROBATCH_ENABLED:
+        return {"enabled": False}
+    return get_microbatcher().stats()
+
+async def _infer_missing(label: str, extraction_schema: dict, pdf_path: Path, pdf_content: str,
+                         content_hash: Optional[str], hits: dict, missing: List[str]) -> List[dict]:
+    schema = {k: extraction_schema[k] for k in missing}
+    requisition = build_requisition(label, schema, pdf_path, pdf_content)
+    if settings.MICROBATCH_ENABLED:
+        res = [await get_microbatcher().submit(requisition)]
+    else:
+        res = await run_multi_infer([requisition])
+    if isinstance(res[0], dict) and res[0].get("_error"):
+        raise HTTPException(status_code=502, detail=f"Remote extraction failed: {res[0]['_error']}")
+    return [cache_merge(content_hash, label, extraction_schema, hits, res[0])]
+
+async def run_single_infer(label: str, extraction_schema: dict, pdf_path_str: str,
+                           pdf_content: Optional[str] = None) -> Any:
     if not settings.REMOTE_ENABLED:
         raise HTTPException(status_code=503, detail="Remote inference not configured.")
 
@@ -13,17 +231,34 @@ def run_single_infer(label: str, extraction_schema: dict, pdf_path_str: str) ->
     if not p.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {pdf_path_str}")
 
+    content_hash, hits, missing = await cache_lookup(label, extraction_schema, p)
+    if not missing:
+        return [cached_result(label, p, hits)]  # no parse, no round-trip
+
+    if pdf_content is None:
+        pdf_content = await parse_pdf_text(p)
+    return await _infer_missing(label, extraction_schema, p, pdf_content, content_hash, hits, missing)
+
+async def run_bytes_infer(label: str, extraction_schema: dict, filename: str,
+                          data: Union[bytes, memoryview]) -> Any:
+    """run_single_infer for an uploaded PDF: hashed and parsed straight from `data`."""
+    if not settings.REMOTE_ENABLED:
+        raise HTTPException(status_code=503, detail="Remote inference not configured.")
     try:
-        from backend.parsing.pdf_text_parser import PDFExtractor
+        from shared.parsing.pdf_text_parser import PDFExtractor
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Parser import error: {e}")
 
-    pdf_content, _ = PDFExtractor.extract_pdf_text(pdf_path=str(p))
+    p = Path(filename)
+    content_hash, hits, missing = await cache_lookup(label, extraction_schema, data)
+    if not missing:
+        return [cached_result(label, p, hits)]
 
-    payload = [{
-        "label": label,
-        "extraction_schema": extraction_schema,
-        "pdf_path": str(p),
-        "pdf_content": pdf_content,
-    }]
-    return forward_request(settings.MODAL_EXTRACTION_URL, data=payload, method="POST")
+    budgets = {"max_pages": settings.PARSE_MAX_PAGES or None, "max_chars": settings.PARSE_MAX_CHARS or None}
+    parse_cache = get_parse_cache()
+    if parse_cache is not None:
+        pdf_content, _, hit = await asyncio.to_thread(parse_cache.extract_bytes, data, p.name, **budgets)
+        PARSE_CACHE.labels("hit" if hit else "miss").inc()
+    else:
+        pdf_content, _ = await asyncio.to_thread(PDFExtractor.extract_pdf_bytes, data, p.name, **budgets)
+    return await _infer_missing(label, extraction_schema, p, pdf_content, content_hash, hits, missing)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from backend.clients.modal_client import forward_request
+from backend.core.config import settings
+from shared.metrics import REGISTRY
+
+log = logging.getLogger("warmup")
+
+class KeepWarmController:
+    """
+    Keeps the Modal containers warm while traffic is expected, and only then.
+
+    Every remote extraction call is tracked (track()). While at least
+    `min_requests` calls arrived in the last `window_s`, a keep-alive ping is
+    sent whenever the remote has been quiet for `interval_s` (kept below the
+    container scaledown window); once traffic stops, pings stop and the
+    containers are allowed to scale down. Periodic pings and pre-warming need
+    MODAL_KEEP_WARM_URL: the other warm-up kinds would send real requisitions.
+
+    Cold starts are reported by the remote: the first input a container serves
+    comes back flagged. Flags on extraction results are counted as paid by a
+    user (cold_start("user")), flags on pings as absorbed by a ping. The latency
+    of the first call after `idle_s` without remote activity is recorded in
+    `after_idle_ms`.
+    """
+    def __init__(self, window_s: float, min_requests: int, interval_s: float, idle_s: float,
+                 max_prewarm: int) -> None:
+        self.window_s = window_s
+        self.min_requests = max(1, min_requests)
+        self.interval_s = interval_s
+        self.idle_s = idle_s
+        self.max_prewarm = max(1, max_prewarm)
+        self._arrivals: Deque[float] = deque()
+        self.last_activity: Optional[float] = None
+        self._last_prewarm = (0, 0.0)  # (containers, monotonic time)
+        self._tasks: set = set()
+        self._stats = {"requests": 0, "pings": 0, "ping_failures": 0, "prewarms": 0,
+                       "cold_starts_user": 0, "cold_starts_ping": 0}
+        buckets = (100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000)
+        self.after_idle_ms = REGISTRY.histogram("backend_remote_after_idle_ms",
+                                                "First remote call after the containers may have scaled down", buckets)
+        self.ping_ms = REGISTRY.histogram("backend_keep_warm_ping_ms", "Keep-alive ping round trip", buckets)
+        self.cold_starts = REGISTRY.counter("backend_cold_starts_total", "Containers booted for a call, by who paid for it", ("paid_by",))
+
+    def _idle(self, now: float) -> bool:
+        return self.last_activity is None or now - self.last_activity > self.idle_s
+
+    # --------- traffic ---------
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Wrap one remote extraction call."""
+        now = time.monotonic()
+        after_idle = self._idle(now)
+        self._arrivals.append(now)
+        self._stats["requests"] += 1
+        self.last_activity = now
+        try:
+            yield
+        finally:
+            self.last_activity = time.monotonic()
+            if after_idle:
+                self.after_idle_ms.observe((self.last_activity - now) * 1000)
+
+    def cold_start(self, paid_by: str, containers: int = 1) -> None:
+        """Count `containers` containers the remote reported as booted for a call ("user" or "ping")."""
+        if containers > 0:
+            self._stats[f"cold_starts_{paid_by}"] += containers
+            self.cold_starts.labels(paid_by).inc(containers)
+
+    def recent_requests(self) -> int:
+        cutoff = time.monotonic() - self.window_s
+        while self._arrivals and self._arrivals[0] < cutoff:
+            self._arrivals.popleft()
+        return len(self._arrivals)
+
+    def traffic_expected(self) -> bool:
+        return self.recent_requests() >= self.min_requests
+
+    # --------- pings ---------
+    async def ping(self, containers: int = 1) -> bool:
+        """Keep-alive for `containers` containers; True on success."""
+        t0 = time.monotonic()
+        self._stats["pings"] += 1
+        try:
+            cold = await _send_ping(containers)
+        except Exception as e:
+            self._stats["ping_failures"] += 1
+            log.warning(f"[warmup] keep-alive ping failed: {e}")
+            return False
+        self.last_activity = time.monotonic()
+        ms = (self.last_activity - t0) * 1000
+        self.ping_ms.observe(ms)
+        self.cold_start("ping", cold)
+        log.info(f"[warmup] keep-alive ok in {int(ms)} ms ({containers} container(s))")
+        return True
+
+    def prewarm(self, containers: int) -> None:
+        """
+        Start `containers` containers in the background before a large batch.
+        Skipped when at least as many were pre-warmed within `interval_s`, or
+        without MODAL_KEEP_WARM_URL.
+        """
+        if not settings.REMOTE_ENABLED or not settings.MODAL_KEEP_WARM_URL:
+            return
+        n = min(max(1, containers), self.max_prewarm)
+        last_n, last_t = self._last_prewarm
+        if last_n >= n and time.monotonic() - last_t < self.interval_s:
+            return
+        self._last_prewarm = (n, time.monotonic())
+        self._stats["prewarms"] += 1
+        task = asyncio.create_task(self.ping(n))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def tick(self) -> None:
+        if not self.traffic_expected():
+            return
+        if self.last_activity is not None and time.monotonic() - self.last_activity < self.interval_s:
+            return  # real traffic is keeping it warm
+        await self.ping()
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(self.interval_s, self.window_s) / 10))
+            try:
+                await self.tick()
+            except Exception as e:
+                log.warning(f"[warmup] keep-warm tick failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        idle_for = time.monotonic() - self.last_activity if self.last_activity is not None else None
+        return {
+            "recent_requests": self.recent_requests(),
+            "window_s": self.window_s,
+            "traffic_expected": self.recent_requests() >= self.min_requests,
+            "idle_for_s": round(idle_for, 1) if idle_for is not None else None,
+            "interval_s": self.interval_s,
+            **self._stats,
+            "after_idle_ms": self.after_idle_ms.snapshot(),
+            "ping_ms": self.ping_ms.snapshot(),
+        }
+
+async def _send_ping(containers: int) -> int:
+    """Send one keep-alive; returns how many containers the remote reports as booted for it."""
+    timeout = (settings.WARMUP_TIMEOUT_CONNECT, max(settings.WARMUP_TIMEOUT_READ, settings.KEEP_WARM_TIMEOUT_S))
+    # Pings bypass the circuit breaker: a cold start is expected to be slow.
+    if settings.MODAL_KEEP_WARM_URL:
+        res = await forward_request(settings.MODAL_KEEP_WARM_URL, endpoint=f"?containers={containers}", method="GET",
+                                    timeout=timeout, retries=0, use_breaker=False)
+        return int((res or {}).get("cold_starts") or 0) if isinstance(res, dict) else 0
+    if settings.WARMUP_KIND.lower() == "infer":
+        payload = [{
+            "label": settings.WARMUP_INFER_LABEL,
+            "extraction_schema": settings.WARMUP_INFER_SCHEMA,
+            "pdf_path": "WARMUP.pdf",
+            "pdf_content": "Warmup ping (ignore this response)"
+        }] * containers
+        res = await forward_request(settings.MODAL_EXTRACTION_URL, method="POST", data=payload,
+                                    timeout=timeout, retries=0, use_breaker=False)
+        return count_cold_starts(res)
+    await forward_request(settings.MODAL_HEALTH_CHECK_URL, endpoint=settings.WARMUP_ENDPOINT, method="GET",
+                          timeout=timeout, retries=0, use_breaker=False)
+    return 0  # the health endpoint does not reach a container
+
+def count_cold_starts(items: Any) -> int:
+    """Pop the remote's "_cold_start" flags off extraction results and count them."""
+    if not isinstance(items, list):
+        return 0
+    return sum(bool(item.pop("_cold_start", False)) for item in items if isinstance(item, dict))
+
+_controller: Optional[KeepWarmController] = None
+
+def get_keep_warm() -> KeepWarmController:
+    global _controller
+    if _controller is None:
+        _controller = KeepWarmController(
+            window_s=settings.KEEP_WARM_WINDOW_S,
+            min_requests=settings.KEEP_WARM_MIN_REQUESTS,
+            interval_s=settings.KEEP_WARM_INTERVAL_S,
+            idle_s=settings.KEEP_WARM_IDLE_S,
+            max_prewarm=settings.KEEP_WARM_MAX_PREWARM,
+        )
+    return _controller
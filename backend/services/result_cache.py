@@ -0,0 +1,165 @@
+import json
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.config import settings
+from shared.parsing.content_hash import budget_tag
+
+log = logging.getLogger("result_cache")
+
+class ResultCache:
+    """
+    Backend-side cache of extracted fields, keyed by (PDF content hash, parse
+    budgets, label), both from shared.parsing.content_hash: fields extracted from text cut at PARSE_MAX_PAGES /
+    PARSE_MAX_CHARS are not reused once those budgets change.
+
+    Each entry holds a field -> value dict, so a request for a different schema
+    reuses whichever fields are already known and only the rest go remote.
+    Entries are evicted LRU once the approximate payload size exceeds max_bytes;
+    with a persist_path the cache is reloaded on startup and rewritten every
+    `save_every` stores (in a worker thread when on the event loop) and on shutdown.
+    """
+    def __init__(self, max_bytes: int, persist_path: Optional[Path] = None, save_every: int = 50,
+                 max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self.budget = budget_tag(max_pages, max_chars)
+        self.persist_path = persist_path
+        self.save_every = max(1, save_every)
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._dirty_stores = 0
+        self._saving: Optional[asyncio.Future] = None
+        self._write_lock = threading.Lock()
+        self._generation = 0  # of the snapshot being written; older ones are skipped
+        self._written = 0
+        self._stats = {"hits": 0, "partial": 0, "misses": 0, "evictions": 0}
+
+    # --------- keys ---------
+    def _key(self, content_hash: str, label: Optional[str]) -> str:
+        return f"{content_hash}-{self.budget}:{label or ''}"
+
+    # --------- lookups ---------
+    def lookup(self, content_hash: str, label: Optional[str], keys: Iterable[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """Return (known fields, missing keys) for the requested keys."""
+        keys = list(keys)
+        key = self._key(content_hash, label)
+        entry = self._lru.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return {}, keys
+        self._lru.move_to_end(key)
+        hits = {k: entry[k] for k in keys if k in entry}
+        missing = [k for k in keys if k not in entry]
+        if missing and hits:
+            self._stats["partial"] += 1
+        elif missing:
+            self._stats["misses"] += 1
+        else:
+            self._stats["hits"] += 1
+        return hits, missing
+
+    def peek(self, content_hash: str, label: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Entry without touching LRU order or hit/miss stats."""
+        return self._lru.get(self._key(content_hash, label))
+
+    def store(self, content_hash: str, label: Optional[str], fields: Dict[str, Any]) -> None:
+        if not fields:
+            return
+        key = self._key(content_hash, label)
+        self._put(key, {**self._lru.get(key, {}), **fields})
+
+        self._dirty_stores += 1
+        if self.persist_path is not None and self._dirty_stores >= self.save_every:
+            self.save_soon()
+
+    def _put(self, key: str, entry: Dict[str, Any]) -> None:
+        self._lru.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+        size = len(key) + len(json.dumps(entry, ensure_ascii=False))
+        self._lru[key] = entry
+        self._sizes[key] = size
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._lru) > 1:
+            old_key, _ = self._lru.popitem(last=False)
+            self._bytes -= self._sizes.pop(old_key, 0)
+            self._stats["evictions"] += 1
+
+    # --------- persistence ---------
+    def load(self) -> None:
+        if self.persist_path is None or not self.persist_path.is_file():
+            return
+        try:
+            data = json.loads(self.persist_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            log.warning(f"[result_cache] could not load {self.persist_path}: {e}")
+            return
+        for key, entry in data.items():
+            self._put(key, entry)
+
+    def save(self) -> None:
+        if self.persist_path is None:
+            return
+        self._write(*self._snapshot())
+
+    def save_soon(self) -> None:
+        """save() without blocking the event loop: the JSON dump runs in a worker thread."""
+        if self.persist_path is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        if self._saving is not None and not self._saving.done():
+            return  # the next store retries once this write is done
+        self._saving = loop.run_in_executor(None, self._write, *self._snapshot())
+
+    def _snapshot(self) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        # Entries are replaced on store, never mutated, so a shallow copy is consistent.
+        self._generation += 1
+        self._dirty_stores = 0
+        return self._generation, dict(self._lru)
+
+    def _write(self, generation: int, entries: Dict[str, Dict[str, Any]]) -> None:
+        with self._write_lock:
+            if generation < self._written:
+                return  # a newer snapshot is already on disk
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.persist_path.with_suffix(self.persist_path.suffix + ".tmp")
+            tmp.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.persist_path)
+            self._written = generation
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            **self._stats,
+            "entries": len(self._lru),
+            "bytes": self._bytes,
+            "budget": self.budget,
+            "max_bytes": self.max_bytes,
+            "persist_path": str(self.persist_path) if self.persist_path else None,
+        }
+
+_cache: Optional[ResultCache] = None
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide cache, or None when RESULT_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        persist = Path(settings.RESULT_CACHE_PATH).expanduser() if settings.RESULT_CACHE_PATH else None
+        _cache = ResultCache(settings.RESULT_CACHE_MAX_BYTES, persist, settings.RESULT_CACHE_SAVE_EVERY,
+                             max_pages=settings.PARSE_MAX_PAGES or None, max_chars=settings.PARSE_MAX_CHARS or None)
+        _cache.load()
+    return _cache
+
+def save_result_cache() -> None:
+    if _cache is not None:
+        _cache.save()
@@ -0,0 +1,212 @@
+import os
+import json
+import mmap
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartParser
+from starlette.types import Message
+
+from backend.core.config import settings
+
+# Parts up to this size stay in memory; larger ones roll over to a temp file.
+MultiPartParser.spool_max_size = settings.UPLOAD_SPOOL_BYTES
+
+MANIFEST_NAMES = ("dataset.json", "dataset.jsonl", "dataset.ndjson")
+
+def _too_large(what: str, limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"{what} exceeds {limit} bytes")
+
+async def read_form(request: Request) -> FormData:
+    """
+    Parse a multipart body of at most UPLOAD_MAX_REQUEST_BYTES: rejected up
+    front from Content-Length, and counted while receiving otherwise (chunked).
+    """
+    limit = settings.UPLOAD_MAX_REQUEST_BYTES
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        raise _too_large("Request", limit)
+
+    received = 0
+
+    async def receive() -> Message:
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise _too_large("Request", limit)
+        return message
+
+    counted = Request(request.scope, receive)
+    return await counted.form(max_files=settings.UPLOAD_MAX_FILES, max_fields=100)
+
+def form_json(form: FormData, name: str) -> dict:
+    raw = form.get(name)
+    if raw is None:
+        raise HTTPException(status_code=422, detail=f"Missing form field '{name}'")
+    try:
+        value = json.loads(raw)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise HTTPException(status_code=422, detail=f"Form field '{name}' is not valid JSON: {e}")
+    if not isinstance(value, dict):
+        raise HTTPException(status_code=422, detail=f"Form field '{name}' must be a JSON object")
+    return value
+
+def form_file(form: FormData, name: str) -> UploadFile:
+    part = form.get(name)
+    if not isinstance(part, UploadFile):
+        raise HTTPException(status_code=422, detail=f"Missing file part '{name}'")
+    return part
+
+@contextmanager
+def pdf_view(upload: UploadFile) -> Iterator[memoryview]:
+    """
+    Zero-copy view of an uploaded PDF: the in-memory spool buffer itself, or an
+    mmap of the temp file it rolled over to. Valid only inside the `with`.
+    """
+    if upload.size is not None and upload.size > settings.UPLOAD_MAX_FILE_BYTES:
+        raise _too_large(f"File {upload.filename}", settings.UPLOAD_MAX_FILE_BYTES)
+
+    spool = upload.file
+    if not getattr(spool, "_rolled", True) and hasattr(getattr(spool, "_file", None), "getbuffer"):
+        view = spool._file.getbuffer()  # BytesIO still in memory
+        mm = None
+    elif hasattr(spool, "fileno") and (spool.flush() or os.fstat(spool.fileno()).st_size > 0):
+        mm = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+    else:
+        spool.seek(0)
+        view, mm = memoryview(spool.read()), None
+
+    try:
+        if b"%PDF-" not in bytes(view[:1024]):
+            raise HTTPException(status_code=415, detail=f"{upload.filename} is not a PDF")
+        yield view
+    finally:
+        view.release()
+        if mm is not None:
+            mm.close()
+
+def _safe_relpath(name: Optional[str]) -> Optional[PurePosixPath]:
+    """Relative path inside the upload directory, or None for absolute / parent-escaping names."""
+    if not name:
+        return None
+    p = PurePosixPath(name.replace("\\", "/"))
+    if p.is_absolute() or ".." in p.parts or not p.name:
+        return None
+    return p
+
+def _claim(staged: Set[PurePosixPath], rel: PurePosixPath) -> None:
+    """Reserve a path in the upload directory; two parts may not write the same file."""
+    if rel in staged:
+        raise HTTPException(status_code=422, detail=f"Duplicate file in upload: {rel}")
+    staged.add(rel)
+
+def _copy_pdf(src: BinaryIO, target: Path, what: str) -> int:
+    """Copy a PDF stream to `target` once its header checks out; returns the bytes written."""
+    head = src.read(1024)
+    if b"%PDF-" not in head:
+        raise HTTPException(status_code=415, detail=f"{what} is not a PDF")
+    with open(target, "wb") as dst:
+        dst.write(head)
+        shutil.copyfileobj(src, dst, 1 << 20)
+        return dst.tell()
+
+def _extract_zip(upload: UploadFile, workdir: Path, budget: int,
+                 staged: Set[PurePosixPath]) -> Tuple[int, Optional[Path]]:
+    """Unpack PDFs (and a dataset manifest, if any) from a zip part; returns (bytes written, manifest)."""
+    manifest: Optional[Path] = None
+    written = 0
+    try:
+        archive = zipfile.ZipFile(upload.file)
+    except zipfile.BadZipFile as e:
+        raise HTTPException(status_code=400, detail=f"Invalid zip {upload.filename}: {e}")
+    with archive:
+        for info in archive.infolist():
+            rel = _safe_relpath(info.filename)
+            if info.is_dir() or rel is None:
+                continue
+            is_manifest = rel.name in MANIFEST_NAMES and len(rel.parts) == 1
+            if not is_manifest and rel.suffix.lower() != ".pdf":
+                continue
+            if info.file_size > settings.UPLOAD_MAX_FILE_BYTES:
+                raise _too_large(f"{upload.filename}:{info.filename}", settings.UPLOAD_MAX_FILE_BYTES)
+            written += info.file_size  # declared size; checked before inflating anything
+            if written > budget:
+                raise _too_large("Unpacked upload", settings.UPLOAD_MAX_REQUEST_BYTES)
+            _claim(staged, rel)
+            target = workdir / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with archive.open(info) as src:
+                if is_manifest:
+                    with open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                    manifest = target
+                else:
+                    _copy_pdf(src, target, f"{upload.filename}:{info.filename}")
+    return written, manifest
+
+def stage_batch_upload(form: FormData) -> Tuple[Path, Path]:
+    """
+    Write an uploaded batch into a fresh temp directory and return (workdir, manifest).
+
+    Accepted parts: `files` (PDFs and/or zips of PDFs, repeatable) and
+    `dataset` (JSON array or JSON Lines manifest). The manifest may instead be
+    a dataset.json / dataset.jsonl at the root of a zip. Items reference the
+    PDFs by pdf_filename / pdf_path relative to the upload.
+
+    Loose PDFs and zip members share one byte budget (UPLOAD_MAX_REQUEST_BYTES
+    unpacked), must start like a PDF, and may not reuse a file name.
+    """
+    base = Path(settings.UPLOAD_DIR).expanduser() if settings.UPLOAD_DIR else None
+    if base is not None:
+        base.mkdir(parents=True, exist_ok=True)
+    workdir = Path(tempfile.mkdtemp(prefix="batch_upload_", dir=base))
+    try:
+        manifest: Optional[Path] = None
+        written = 0
+        staged: Set[PurePosixPath] = set()
+        for part in form.getlist("files"):
+            if not isinstance(part, UploadFile):
+                continue
+            if (part.filename or "").lower().endswith(".zip"):
+                n, zipped_manifest = _extract_zip(part, workdir, settings.UPLOAD_MAX_REQUEST_BYTES - written, staged)
+                written += n
+                manifest = manifest or zipped_manifest
+                continue
+            rel = _safe_relpath(part.filename)
+            if rel is None or rel.suffix.lower() != ".pdf":
+                raise HTTPException(status_code=415, detail=f"Unsupported upload part: {part.filename}")
+            if part.size is not None and part.size > settings.UPLOAD_MAX_FILE_BYTES:
+                raise _too_large(f"File {part.filename}", settings.UPLOAD_MAX_FILE_BYTES)
+            _claim(staged, PurePosixPath(rel.name))
+            n = _copy_pdf(part.file, workdir / rel.name, part.filename)
+            if n > settings.UPLOAD_MAX_FILE_BYTES:
+                raise _too_large(f"File {part.filename}", settings.UPLOAD_MAX_FILE_BYTES)
+            written += n
+            if written > settings.UPLOAD_MAX_REQUEST_BYTES:
+                raise _too_large("Unpacked upload", settings.UPLOAD_MAX_REQUEST_BYTES)
+
+        dataset = form.get("dataset")
+        if isinstance(dataset, UploadFile):
+            name = "dataset.jsonl" if (dataset.filename or "").lower().endswith((".jsonl", ".ndjson")) else "dataset.json"
+            manifest = workdir / name
+            with open(manifest, "wb") as dst:
+                shutil.copyfileobj(dataset.file, dst, 1 << 20)
+        elif isinstance(dataset, str) and dataset.strip():
+            manifest = workdir / "dataset.json"
+            manifest.write_text(dataset, encoding="utf-8")
+
+        if manifest is None:
+            raise HTTPException(status_code=422, detail="Missing dataset manifest ('dataset' part or dataset.json in the zip)")
+        return workdir, manifest
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
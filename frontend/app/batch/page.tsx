@@ -18,7 +18,7 @@ import { Play, Download, Copy, Sparkles, CheckCircle2, XCircle, Loader2, X } fro
 interface SSEStartMessage {
   type: "start"
   job_id: string
-  total: number
+  total: number | null
   processed: number
   status: "running"
 }
@@ -31,7 +31,8 @@ interface SSEItemOkMessage {
   response_ms: number
   filled_item: any
   processed: number
-  total: number
+  total: number | null
+  read: number
   preview_download_path: string
 }
 
@@ -43,7 +44,8 @@ interface SSEItemErrorMessage {
   response_ms: number
   error: string
   processed: number
-  total: number
+  total: number | null
+  read: number
   preview_download_path: string
 }
 
@@ -70,7 +72,9 @@ export default function BatchPage() {
   const [jsonPath, setJsonPath] = useState("")
   const [pdfsRootPath, setPdfsRootPath] = useState("")
   const [jobId, setJobId] = useState<string | null>(null)
-  const [total, setTotal] = useState(0)
+  // total is null until the backend has read the whole dataset; read is how many items it has seen so far
+  const [total, setTotal] = useState<number | null>(null)
+  const [read, setRead] = useState(0)
   const [processed, setProcessed] = useState(0)
   const [rows, setRows] = useState<BatchRow[]>([])
   const [done, setDone] = useState(false)
@@ -98,6 +102,7 @@ export default function BatchPage() {
       setDone(false)
       setRows([])
       setProcessed(0)
+      setRead(0)
 
       const result = await startBatch({ pdfs_root_path: pdfsRootPath, json_path: jsonPath })
       setJobId(result.job_id)
@@ -128,6 +133,8 @@ export default function BatchPage() {
                 },
               ])
               setProcessed(message.processed)
+              setTotal(message.total)
+              setRead(message.read)
               break
 
             case "item_error":
@@ -142,9 +149,12 @@ export default function BatchPage() {
                 },
               ])
               setProcessed(message.processed)
+              setTotal(message.total)
+              setRead(message.read)
               break
 
             case "complete":
+              setTotal(message.total)
               setDone(true)
               setIsRunning(false)
               eventSource.close()
@@ -208,7 +218,8 @@ export default function BatchPage() {
     }
   }
 
-  const progressPercent = total > 0 ? (processed / total) * 100 : 0
+  const expected = total ?? read
+  const progressPercent = expected > 0 ? (processed / expected) * 100 : 0
 
   return (
     <div className="min-h-screen bg-background">
@@ -288,7 +299,7 @@ export default function BatchPage() {
                   <div className="flex items-center justify-between text-sm">
                     <span className="text-muted-foreground">Progress</span>
                     <span className="font-mono">
-                      {processed} / {total} ({progressPercent.toFixed(0)}%)
+                      {processed} / {total ?? `${read}+`} ({progressPercent.toFixed(0)}%)
                     </span>
                   </div>
                   <Progress value={progressPercent} className="h-2" />
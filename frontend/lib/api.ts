@@ -48,7 +48,7 @@ export interface InferResponse {
 export interface BatchStartResponse {
   status: string
   job_id: string
-  total: number
+  total: number | null
 }
 
 export interface BatchResult {
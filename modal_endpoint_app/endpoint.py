@@ -1,5 +1,11 @@
+import itertools
+import os
+import threading
+import time
 import modal
+from fastapi import Request, Response
 from fastapi.security import HTTPBearer
+from pydantic import TypeAdapter, ValidationError
 from typing import List
 auth_scheme = HTTPBearer()
 
@@ -17,51 +23,186 @@ image = (
         "python-dotenv==1.1.1",
         "uvicorn==0.37.0",
         "langchain-openai==0.3.35",
-        "langchain==0.3.27"
+        "langchain==0.3.27",
+        "msgpack==1.1.0",
+        "zstandard==0.23.0"
     )
     .add_local_dir("./modal_endpoint_app/src", remote_path="/root/modal_endpoint_app/src")
     .add_local_dir("./modal_endpoint_app/config", remote_path="/root/modal_endpoint_app/config")
+    .add_local_dir("./shared", remote_path="/root/shared")
     .add_local_file("./.env", remote_path="/root/.env")
 )
 app = modal.App(name="enter_document_parsing_system", image=image)
 
+# Index snapshots built offline by scripts/build_index.py:
+#   modal volume put enter-index-snapshots index_snapshot/index.snap /index.snap
+SNAPSHOT_DIR = "/snapshots"
+snapshot_volume = modal.Volume.from_name("enter-index-snapshots", create_if_missing=True)
+
+# Each running DocumentParser pushes its stats and metrics here (keyed by container
+# id), so reporting endpoints read them without calling, or starting, a GPU container.
+telemetry = modal.Dict.from_name("enter-pipeline-telemetry", create_if_missing=True)
+TELEMETRY_PUSH_S = 15
+TELEMETRY_TTL_S = 3 * TELEMETRY_PUSH_S  # entries older than this are from containers that are gone
+
 from modal_endpoint_app.src.schemas.v1.schemas import ParsingRequisition
+from modal_endpoint_app.src.transport.wire import UnsupportedPayload, decode_request, encode_response
+from shared.metrics import merge_expositions
+
+_requisitions = TypeAdapter(List[ParsingRequisition])
 
 # Imports within the Modal image context
 with image.imports():
+    from dotenv import load_dotenv
     from modal_endpoint_app.src.pipeline.pipeline import Solution
+    from modal_endpoint_app.src.pipeline.startup import phase
 
-# Modal function
-@app.function(
+# Modal class: one Solution per container so the cache, vector store and
+# background compaction outlive a single request.
+@app.cls(
     image=image,
     timeout=60 * 60 * 24,
     gpu="T4",
-    scaledown_window=1200 # 30 min alive
+    scaledown_window=1200, # 30 min alive
+    volumes={SNAPSHOT_DIR: snapshot_volume},
 )
-def document_parsing(idx: int, label: str, extraction_schema: dict, pdf_path: str, pdf_content: str):
-    solution = Solution()
-    parsed = solution.process_single_sample(idx, label, extraction_schema, pdf_path, pdf_content)
-    return parsed
+class DocumentParser:
+    @modal.enter()
+    def load(self):
+        load_dotenv()  # /root/.env, for the settings read below
+        snapshot = os.getenv("INDEX_SNAPSHOT_PATH", f"{SNAPSHOT_DIR}/index.snap")
+        with phase("container_enter"):
+            self.solution = Solution(
+                snapshot_path=snapshot,
+                # Same budgets as the backend (PARSE_MAX_PAGES / PARSE_MAX_CHARS), for PDFs parsed here.
+                parse_max_pages=int(os.getenv("PARSE_MAX_PAGES", "0")) or None,
+                parse_max_chars=int(os.getenv("PARSE_MAX_CHARS", "0")) or None,
+            )
+            self.solution.preload_in_background()
+            self.solution.start_background_jobs()
+        self.container_id = os.getenv("MODAL_TASK_ID") or f"pid-{os.getpid()}"
+        self._inputs = itertools.count()  # the first input this container serves paid for its boot
+        self._stop_push = threading.Event()
+        self._pusher = threading.Thread(target=self._push_telemetry, name="telemetry-push", daemon=True)
+        self._pusher.start()
+
+    @modal.exit()
+    def shutdown(self):
+        self._stop_push.set()
+        self.solution.stop_background_jobs()
+        try:
+            telemetry.pop(self.container_id)
+        except Exception:
+            pass
+
+    def _push_telemetry(self):
+        while True:
+            try:
+                telemetry[self.container_id] = {
+                    "at": time.time(),
+                    "stats": self.solution.stats(),
+                    "metrics": self.solution.metrics(),
+                }
+            except Exception:
+                pass  # best effort; the next push retries
+            if self._stop_push.wait(TELEMETRY_PUSH_S):
+                return
+
+    @modal.method()
+    def parse(self, idx: int, label: str, extraction_schema: dict, pdf_path: str, pdf_content: str):
+        cold_start = next(self._inputs) == 0
+        result = self.solution.process_single_sample(idx, label, extraction_schema, pdf_path, pdf_content)
+        return {**result, "_cold_start": cold_start}
+
+    @modal.method()
+    def ping(self, _i: int = 0):
+        # Keep-alive: returns once the models are loaded, without an LLM call.
+        cold_start = next(self._inputs) == 0
+        return {"container": self.container_id, "warm": self.solution.wait_until_warm(timeout=120), "cold_start": cold_start}
 
 
 # FastAPI endpoint
 @app.function()
 @modal.fastapi_endpoint(method="POST")
-def document_parsing_scheduler(
-    requisitions_list: List[ParsingRequisition]):
-    
-    results = []
-    for idx, requisition in enumerate(requisitions_list):
-        result = document_parsing.remote(
-            idx,
-            requisition.label,
-            requisition.extraction_schema,
-            requisition.pdf_path,
-            requisition.pdf_content
+async def document_parsing_scheduler(request: Request):
+    # Body: JSON or msgpack, optionally zstd/gzip; reply in the caller's preferred format.
+    try:
+        payload = decode_request(
+            await request.body(),
+            request.headers.get("content-type"),
+            request.headers.get("content-encoding"),
         )
+    except (UnsupportedPayload, ValueError) as e:
+        return Response(content=str(e), status_code=415)
+    try:
+        requisitions_list = _requisitions.validate_python(payload)
+    except ValidationError as e:
+        return Response(content=e.json(), status_code=422, media_type="application/json")
+
+    # One call per chunk: items fan out across containers, results keep input
+    # order and a failing item becomes {"_error": ...} instead of failing the chunk.
+    args = [
+        (idx, r.label, r.extraction_schema, r.pdf_path, r.pdf_content)
+        for idx, r in enumerate(requisitions_list)
+    ]
+    results = []
+    async for result in DocumentParser().parse.starmap.aio(args, order_outputs=True, return_exceptions=True):
+        if isinstance(result, BaseException):
+            result = {"_error": f"{type(result).__name__}: {result}"}
         results.append(result)
 
-    return results
+    body, headers = encode_response(
+        results,
+        request.headers.get("accept"),
+        request.headers.get("accept-encoding"),
+    )
+    return Response(content=body, headers=headers)
+
+
+# Pipeline stats endpoint (cache size, vector-store compaction, startup breakdown)
+@app.function()
+@modal.fastapi_endpoint(method="GET")
+def pipeline_stats():
+    """Counters of every running DocumentParser container, by container id (empty when none is up)."""
+    return {cid: entry["stats"] for cid, entry in _live_telemetry()}
+
+
+def _live_telemetry():
+    now = time.time()
+    live = []
+    for cid, entry in telemetry.items():
+        if now - entry["at"] <= TELEMETRY_TTL_S:
+            live.append((cid, entry))
+        else:
+            telemetry.pop(cid)  # container exited without cleaning up
+    return live
+
+
+# Pipeline metrics endpoint (Prometheus text format)
+@app.function()
+@modal.fastapi_endpoint(method="GET")
+def pipeline_metrics():
+    """Registries of every running DocumentParser container, each sample labeled container="<id>"."""
+    renders = {cid: entry["metrics"] for cid, entry in _live_telemetry() if "metrics" in entry}
+    return Response(content=merge_expositions(renders), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Keep-alive endpoint: pings `containers` DocumentParser inputs at once. Each
+# ping holds its container until warm-up is done, so parallel pings spread over
+# (and start) that many containers before a large batch.
+@app.function()
+@modal.fastapi_endpoint(method="GET")
+async def keep_warm(containers: int = 1):
+    n = max(1, min(containers, 16))
+    pongs = [p async for p in DocumentParser().ping.map.aio(range(n), return_exceptions=True)]
+    ok = [p for p in pongs if isinstance(p, dict)]
+    return {
+        "requested": n,
+        "containers": len({p["container"] for p in ok}),
+        "warm": sum(1 for p in ok if p["warm"]),
+        "cold_starts": sum(1 for p in ok if p["cold_start"]),
+        "errors": len(pongs) - len(ok),
+    }
 
 
 # Health check endpoint (no token required)
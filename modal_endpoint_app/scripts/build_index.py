@@ -0,0 +1,138 @@
+import argparse
+import json
+import time
+import os
+import yaml
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from modal_endpoint_app.src.embeddings.embeddings import EmbeddingModel
+from modal_endpoint_app.src.embeddings.snapshot import write_snapshot
+from shared.parsing.parse_cache import ParseCache
+
+
+def load_known_good(path: Optional[Path]) -> Tuple[List[dict], Dict[Tuple[str, str], dict]]:
+    """
+    Load known-good extractions (e.g. a /batch result download): a list of
+    {label, extraction_schema: {field: value}, pdf_path|pdf_filename}.
+    Returned both by position and keyed by (label, pdf file name).
+    """
+    if path is None:
+        return [], {}
+    with path.open("r", encoding="utf-8") as f:
+        items = json.load(f)
+    by_key: Dict[Tuple[str, str], dict] = {}
+    for item in items:
+        ref = item.get("pdf_path") or item.get("pdf_filename")
+        if item.get("label") and ref:
+            by_key.setdefault((item["label"], os.path.basename(ref)), {}).update(item.get("extraction_schema") or {})
+    return items, by_key
+
+
+def main(
+    config_path: Path,
+    output: Path,
+    extractions_path: Optional[Path],
+    batch_size: int,
+    json_path: Optional[Path] = None,
+    pdfs_root_path: Optional[Path] = None,
+) -> None:
+    with config_path.open("r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    json_path = json_path or Path(config["paths"]["json_path"])
+    pdfs_root_path = pdfs_root_path or Path(config["paths"]["pdfs_root_path"])
+
+    with json_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    known_list, known_by_key = load_known_good(extractions_path)
+    parse_cache = ParseCache(Path(config["paths"].get("parse_cache_dir", ".data/parse_cache")), 512 * 1024 * 1024)
+
+    # One record per (label, pdf file); repeated items merge their fields.
+    records: Dict[Tuple[str, str], dict] = {}
+    skipped = 0
+    t0 = time.perf_counter()
+    for idx, sample in enumerate(data):
+        label, pdf_path = sample.get("label"), sample.get("pdf_path") or sample.get("pdf_filename")
+        if not label or not pdf_path:
+            skipped += 1
+            continue
+        doc_id = os.path.basename(pdf_path)
+        key = (label, doc_id)
+
+        fields = dict(known_by_key.get(key) or {})
+        if idx < len(known_list) and known_list[idx].get("label") == label:
+            fields.update(known_list[idx].get("extraction_schema") or {})
+        schema = sample.get("extraction_schema") or {}
+        fields = {k: v for k, v in fields.items() if k in schema}
+        if not fields:
+            print(f"[SKIP] idx={idx} {doc_id}: no known-good extraction")
+            skipped += 1
+            continue
+
+        if key not in records:
+            text, _, _ = parse_cache.extract(Path(os.path.join(pdfs_root_path, pdf_path)))
+            records[key] = {
+                "label": label,
+                "doc_id": doc_id,
+                "pdf_raw_text": text,
+                "extracted_fields": {},
+                "requested_fields": {},
+            }
+        records[key]["extracted_fields"].update(fields)
+        records[key]["requested_fields"].update({k: schema[k] for k in fields})
+
+    rows = list(records.values())
+    parse_s = time.perf_counter() - t0
+    if not rows:
+        print("No records with known-good extractions; nothing to write.")
+        return
+
+    t1 = time.perf_counter()
+    embedder = EmbeddingModel()
+    embeddings = embedder.encode_batch([r["pdf_raw_text"] for r in rows], batch_size=batch_size)
+    embed_s = time.perf_counter() - t1
+
+    write_snapshot(output, rows, embeddings)
+
+    print("\n=== Index Build Summary ===")
+    print(f"Records written: {len(rows)} (skipped {skipped})")
+    print(f"Labels: {sorted({r['label'] for r in rows})}")
+    print(f"Parse time: {parse_s:.2f} seconds")
+    print(f"Embed time: {embed_s:.2f} seconds")
+    print(f"Snapshot: {output} ({output.stat().st_size / 1024:.1f} KiB)")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build a portable vector-store snapshot from a dataset.")
+    parser.add_argument(
+        "-c", "--config",
+        type=Path,
+        default=Path("config/config.yaml"),
+        help="Path to YAML config file (default: config/config.yaml)",
+    )
+    parser.add_argument(
+        "-e", "--extractions",
+        type=Path,
+        default=None,
+        help="Known-good extractions JSON (same shape as a /batch result download)",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        default=Path("index_snapshot/index.snap"),
+        help="Snapshot output file (default: index_snapshot/index.snap)",
+    )
+    parser.add_argument("--dataset", type=Path, default=None, help="Override paths.json_path from the config")
+    parser.add_argument("--pdfs-root", type=Path, default=None, help="Override paths.pdfs_root_path from the config")
+    parser.add_argument("--batch-size", type=int, default=128, help="Embedding batch size (default: 128)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(
+        config_path=args.config,
+        output=args.output,
+        extractions_path=args.extractions,
+        batch_size=args.batch_size,
+        json_path=args.dataset,
+        pdfs_root_path=args.pdfs_root,
+    )
@@ -13,7 +13,8 @@ def main(config_path: Path) -> None:
     json_path = Path(config["paths"]["json_path"])
     pdfs_root_path = Path(config["paths"]["pdfs_root_path"])
 
-    solution = Solution()
+    # Same directory and format as the backend's parse cache, so either side's parses are reused
+    solution = Solution(parse_cache_dir=Path(config["paths"].get("parse_cache_dir", ".data/parse_cache")))
 
     with json_path.open("r", encoding="utf-8") as f:
         data = json.load(f)
@@ -39,6 +40,10 @@ def main(config_path: Path) -> None:
     print(f"Total time: {total_time:.2f} seconds")
     print(f"Average time per sample: {avg_time:.2f} seconds")
 
+    solution.vstore.compact_all()
+    print("\n=== Pipeline Stats ===")
+    print(json.dumps(solution.stats(), ensure_ascii=False, indent=2))
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run local parsing pipeline.")
     parser.add_argument(
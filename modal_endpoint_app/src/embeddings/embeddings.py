@@ -1,17 +1,62 @@
 # src/embeddings/embeddings.py
 
-from sentence_transformers import SentenceTransformer
+import threading
 import numpy as np
-from typing import Union, List
+from typing import Optional, Union, List
+from ..pipeline.metrics import EMBED_MS
+from ..pipeline.startup import lazy_import, phase
 
 class EmbeddingModel:
+    """
+    SentenceTransformer wrapper with deferred loading.
+
+    Nothing heavy is imported until the model is needed. `start_preload()` loads
+    the weights in a background thread; `encode` waits for it if it is running.
+    """
     def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._model is not None:
+                return
+            with phase("embedder_load"):
+                sentence_transformers = lazy_import("sentence_transformers")
+                self._model = sentence_transformers.SentenceTransformer(self.model_name)
+
+    def start_preload(self) -> None:
+        """Load model weights in a daemon thread (container boot)."""
+        if self._model is not None or self._loader is not None:
+            return
+        self._loader = threading.Thread(target=self._load, name="embedder-preload", daemon=True)
+        self._loader.start()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._load()  # blocks on the preload thread's lock if it is still loading
+        return self._model
 
     def encode(self, text: Union[str, List[str]]) -> np.ndarray:
-        if isinstance(text, str):
-            emb = self.model.encode([text], normalize_embeddings=True)
-            return np.array(emb[0], dtype="float32")
-        else:
-            emb = self.model.encode(text, normalize_embeddings=True)
-            return np.array(emb, dtype="float32")
+        model = self.model  # loading time is not encode time
+        with EMBED_MS.time("single"):
+            if isinstance(text, str):
+                emb = model.encode([text], normalize_embeddings=True)
+                return np.array(emb[0], dtype="float32")
+            else:
+                emb = model.encode(text, normalize_embeddings=True)
+                return np.array(emb, dtype="float32")
+
+    def encode_batch(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode many texts at once (offline index builds)."""
+        model = self.model
+        with EMBED_MS.time("batch"):
+            emb = model.encode(texts, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False)
+        return np.array(emb, dtype="float32").reshape(len(texts), -1)
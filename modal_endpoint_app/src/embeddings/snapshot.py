@@ -0,0 +1,69 @@
+# src/embeddings/snapshot.py
+"""
+Portable vector-store snapshot.
+
+Layout (little-endian):
+    8 bytes   magic  b"EDPSNAP1"
+    8 bytes   header length (uint64)
+    N bytes   header JSON: {"dim", "count", "built_at", "records": [...]}
+    rest      float32 embeddings, row-major (count x dim)
+
+The whole file is read with a single sequential read at startup.
+"""
+from __future__ import annotations
+import json
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+SNAPSHOT_MAGIC = b"EDPSNAP1"
+_LEN = struct.Struct("<Q")
+
+
+def write_snapshot(path: Path | str, records: List[Dict[str, Any]], embeddings: np.ndarray) -> None:
+    """
+    Write records + their embeddings. Each record holds label, doc_id, pdf_raw_text,
+    extracted_fields and requested_fields (same fields VectorStore.add_document takes).
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="<f4")
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(records):
+        raise ValueError(f"Expected {len(records)} x dim embeddings, got {embeddings.shape}")
+
+    header = json.dumps(
+        {
+            "dim": int(embeddings.shape[1]),
+            "count": len(records),
+            "built_at": time.time(),
+            "records": records,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(_LEN.pack(len(header)))
+        f.write(header)
+        f.write(embeddings.tobytes())
+    tmp.replace(path)
+
+
+def read_snapshot(path: Path | str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Return (records, embeddings) from a snapshot file."""
+    blob = Path(path).read_bytes()
+    if blob[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError(f"Not an index snapshot: {path}")
+
+    offset = len(SNAPSHOT_MAGIC)
+    (header_len,) = _LEN.unpack_from(blob, offset)
+    offset += _LEN.size
+    header = json.loads(blob[offset:offset + header_len].decode("utf-8"))
+    offset += header_len
+
+    count, dim = int(header["count"]), int(header["dim"])
+    embeddings = np.frombuffer(blob, dtype="<f4", count=count * dim, offset=offset).reshape(count, dim)
+    return header["records"], embeddings
@@ -1,13 +1,68 @@
 # src/embeddings/vector_store.py
 
+from dataclasses import dataclass, asdict
+from pathlib import Path
 from typing import Optional, Dict, Any, Tuple, List
 import json
-import chromadb
+import logging
+import threading
+import time
 import numpy as np
+from .snapshot import read_snapshot
+from ..pipeline.logs import get_logger, log_event
+from ..pipeline.metrics import VECTOR_INSERT_MS, VECTOR_QUERY_MS
+from ..pipeline.startup import lazy_import, phase
+
+log = get_logger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Per-label retention for exemplar collections.
+
+    max_size: entries kept per `label__{label}` collection after compaction.
+    recency_half_life_s: age at which an entry's recency weight drops to 0.5.
+    recency_weight: how much staleness adds to an entry's eviction score
+        (0 = pure near-duplicate eviction, higher = older entries go first).
+    compact_interval_s: period of the background compaction job.
+    """
+    max_size: int = 200
+    recency_half_life_s: float = 7 * 24 * 3600.0
+    recency_weight: float = 0.25
+    compact_interval_s: float = 300.0
+
 
 class VectorStore:
-    def __init__(self, persist_dir: str = "./chroma_store"):
-        self.client = chromadb.PersistentClient(path=persist_dir)
+    def __init__(self, persist_dir: str = "./chroma_store", retention: Optional[RetentionPolicy] = None):
+        self.persist_dir = persist_dir
+        self.retention = retention or RetentionPolicy()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # Compaction bookkeeping
+        self._lock = threading.Lock()
+        self._dirty: set[str] = set()
+        self._stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        self._stats: Dict[str, Any] = {
+            "runs": 0,
+            "evicted_total": 0,
+            "last_run_at": None,
+            "last_duration_ms": None,
+            "per_label": {},
+        }
+
+    @property
+    def client(self):
+        """Chroma client, opened (and chromadb imported) on first use."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    with phase("vstore_open"):
+                        chromadb = lazy_import("chromadb")
+                        self._client = chromadb.PersistentClient(path=self.persist_dir)
+        return self._client
 
     def _collection_name(self, label: str) -> str:
         return f"label__{label}"
@@ -30,8 +85,26 @@ class VectorStore:
     ) -> None:
 
         col = self.get_or_create_collection(label)
+        metadata = self._build_metadata(label, pdf_raw_text, extracted_fields, requested_fields)
 
-        metadata = {
+        with self._lock, VECTOR_INSERT_MS.time():
+            col.add(
+                ids=[doc_id],
+                embeddings=[embedding.tolist()],
+                documents=[pdf_raw_text],
+                metadatas=[metadata],
+            )
+            self._dirty.add(label)
+
+    @staticmethod
+    def _build_metadata(
+        label: str,
+        pdf_raw_text: str,
+        extracted_fields: Dict[str, Any],
+        requested_fields: Optional[List[str]] = None,
+        added_at: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        return {
             "pdf_raw_text": pdf_raw_text,
             "extracted_fields_json": json.dumps(
                 extracted_fields,
@@ -39,14 +112,52 @@ class VectorStore:
             ),
             "label": label,
             "requested_fields": json.dumps(requested_fields or [], ensure_ascii=False),
+            "added_at": added_at if added_at is not None else time.time(),
         }
 
-        col.add(
-            ids=[doc_id],
-            embeddings=[embedding.tolist()],
-            documents=[pdf_raw_text],
-            metadatas=[metadata],
-        )
+    def import_snapshot(self, path: Path | str, batch_size: int = 512) -> int:
+        """
+        Bulk-load an index snapshot written by scripts/build_index.py.
+        Entries whose doc_id already exists in the label collection are skipped,
+        so importing on every container start is idempotent. Returns rows added.
+        """
+        records, embeddings = read_snapshot(path)
+
+        by_label: Dict[str, List[int]] = {}
+        for i, rec in enumerate(records):
+            by_label.setdefault(rec["label"], []).append(i)
+
+        added = 0
+        for label, rows in by_label.items():
+            col = self.get_or_create_collection(label)
+            existing = set(col.get(ids=[records[i]["doc_id"] for i in rows], include=[]).get("ids") or [])
+            rows = [i for i in rows if records[i]["doc_id"] not in existing]
+
+            with self._lock:
+                for start in range(0, len(rows), batch_size):
+                    chunk = rows[start:start + batch_size]
+                    col.add(
+                        ids=[records[i]["doc_id"] for i in chunk],
+                        embeddings=embeddings[chunk].tolist(),
+                        documents=[records[i]["pdf_raw_text"] for i in chunk],
+                        metadatas=[
+                            self._build_metadata(
+                                label,
+                                records[i]["pdf_raw_text"],
+                                records[i].get("extracted_fields") or {},
+                                records[i].get("requested_fields"),
+                                added_at=records[i].get("added_at"),
+                            )
+                            for i in chunk
+                        ],
+                    )
+                if rows:
+                    self._dirty.add(label)
+            added += len(rows)
+
+        self.mark_all_dirty()  # imported (and pre-existing) collections may be over the retention limit
+        log_event(log, "vstore_snapshot_imported", imported=added, skipped=len(records) - added, path=str(path))
+        return added
 
     def query_most_similar(
         self,
@@ -58,28 +169,156 @@ class VectorStore:
         col = self.get_or_create_collection(label)
 
         try:
-            res = col.query(
-                query_embeddings=[embedding.tolist()],
-                n_results=top_k,
-                include=["distances", "metadatas", "documents"],
-            )
+            with VECTOR_QUERY_MS.time():
+                res = col.query(
+                    query_embeddings=[embedding.tolist()],
+                    n_results=top_k,
+                    include=["distances", "metadatas", "documents"],
+                )
         except Exception as e:
-            print(f"[VSTORE::QUERY] EXCEPTION during query: {e}")
+            log_event(log, "vstore_query_failed", logging.WARNING, label=label, error=str(e))
             return None
 
         dists_list = res.get("distances", [[]])
         metas_list = res.get("metadatas", [[]])
 
         if not dists_list or not metas_list:
-            print("[VSTORE::QUERY] empty result (no lists)")
+            log_event(log, "vstore_query_empty", logging.DEBUG, label=label)
             return None
 
         if len(dists_list[0]) == 0 or len(metas_list[0]) == 0:
-            print("[VSTORE::QUERY] empty result (no items in first list)")
+            log_event(log, "vstore_query_empty", logging.DEBUG, label=label)
             return None
 
         best_distance = dists_list[0][0]
         best_meta = metas_list[0][0]
 
-        print(f"[VSTORE::QUERY] found candidate dist={best_distance:.4f}")
+        log_event(log, "vstore_query_hit", logging.DEBUG, label=label, distance=round(best_distance, 4))
         return best_distance, best_meta
+
+    # --------- retention / compaction ---------
+    def _select_evictions(self, embeddings: np.ndarray, added_at: np.ndarray, n_evict: int) -> List[int]:
+        """
+        Greedy diversity-preserving eviction.
+
+        Each kept entry is scored by its redundancy (cosine similarity to the
+        nearest other kept entry) plus a staleness term derived from its age.
+        The highest-scoring entry is dropped and only the rows whose nearest
+        neighbour was the evicted entry are rescored.
+        """
+        policy = self.retention
+        n = embeddings.shape[0]
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        unit = embeddings / np.maximum(norms, 1e-12)
+        sim = unit @ unit.T
+        np.fill_diagonal(sim, -np.inf)
+
+        age = np.maximum(0.0, time.time() - added_at)
+        half_life = max(policy.recency_half_life_s, 1e-9)
+        staleness = 1.0 - np.power(0.5, age / half_life)
+        penalty = policy.recency_weight * staleness
+
+        kept = np.ones(n, dtype=bool)
+        nearest = sim.argmax(axis=1)
+        redundancy = sim[np.arange(n), nearest]
+
+        evicted: List[int] = []
+        for _ in range(n_evict):
+            score = np.where(kept, redundancy + penalty, -np.inf)
+            victim = int(score.argmax())
+            kept[victim] = False
+            evicted.append(victim)
+            sim[:, victim] = -np.inf
+
+            stale_rows = np.flatnonzero(kept & (nearest == victim))
+            if stale_rows.size:
+                nearest[stale_rows] = sim[stale_rows].argmax(axis=1)
+                redundancy[stale_rows] = sim[stale_rows, nearest[stale_rows]]
+        return evicted
+
+    def compact(self, label: str) -> int:
+        """Shrink one label collection down to the retention max_size. Returns evicted count."""
+        col = self.get_or_create_collection(label)
+        with self._lock:
+            self._dirty.discard(label)
+            size = col.count()
+            n_evict = size - self.retention.max_size
+            if n_evict <= 0:
+                self._stats["per_label"].setdefault(label, {"size": size, "evicted": 0})["size"] = size
+                return 0
+
+            res = col.get(include=["embeddings", "metadatas"])
+            ids = list(res.get("ids") or [])
+            embeddings = np.asarray(res.get("embeddings"), dtype="float32")
+            metas = res.get("metadatas") or [{} for _ in ids]
+            added_at = np.asarray(
+                [float((m or {}).get("added_at", 0.0)) for m in metas],
+                dtype="float64",
+            )
+
+            victims = self._select_evictions(embeddings, added_at, n_evict)
+            col.delete(ids=[ids[i] for i in victims])
+
+            label_stats = self._stats["per_label"].setdefault(label, {"size": 0, "evicted": 0})
+            label_stats["size"] = size - len(victims)
+            label_stats["evicted"] += len(victims)
+            self._stats["evicted_total"] += len(victims)
+
+        log_event(log, "vstore_compacted", label=label, evicted=len(victims), kept=size - len(victims))
+        return len(victims)
+
+    def mark_all_dirty(self) -> None:
+        """Queue every existing label collection for the next compaction run."""
+        prefix = self._collection_name("")
+        names = [getattr(c, "name", c) for c in self.client.list_collections()]
+        with self._lock:
+            self._dirty.update(n[len(prefix):] for n in names if n.startswith(prefix))
+
+    def compact_all(self) -> int:
+        """Compact every collection that received inserts since its last compaction."""
+        t0 = time.perf_counter()
+        with self._lock:
+            labels = sorted(self._dirty)
+        evicted = 0
+        for label in labels:
+            try:
+                evicted += self.compact(label)
+            except Exception as e:
+                log_event(log, "vstore_compaction_failed", logging.WARNING, label=label, error=str(e))
+        self._stats["runs"] += 1
+        self._stats["last_run_at"] = time.time()
+        self._stats["last_duration_ms"] = int((time.perf_counter() - t0) * 1000)
+        return evicted
+
+    def start_compactor(self) -> None:
+        """Run compact_all() periodically in a daemon thread."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop() -> None:
+            try:
+                self.mark_all_dirty()  # collections persisted by an earlier run were never inserted into here
+            except Exception as e:
+                log_event(log, "vstore_compaction_failed", logging.WARNING, label=None, error=str(e))
+            while not self._stop.wait(self.retention.compact_interval_s):
+                self.compact_all()
+
+        self._compactor = threading.Thread(target=_loop, name="vstore-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+            self._compactor = None
+
+    def compaction_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **{k: v for k, v in self._stats.items() if k != "per_label"},
+                "per_label": {k: dict(v) for k, v in self._stats["per_label"].items()},
+                "pending_labels": sorted(self._dirty),
+                "policy": asdict(self.retention),
+            }
@@ -2,10 +2,15 @@
 import os
 import json
 from typing import Dict, List, Optional, Any
+import logging
+import threading
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
 import time
+from ..pipeline.logs import get_logger, log_event
+from ..pipeline.metrics import LLM_MS, LLM_TOKENS
+from ..pipeline.startup import lazy_import, phase
+
+log = get_logger(__name__)
 
 class FieldExtractor:
     def __init__(
@@ -19,12 +24,10 @@ class FieldExtractor:
             os.environ["OPENAI_API_KEY"] = openai_api_key
         load_dotenv()
 
-        self.llm = ChatOpenAI(
-            model=model,
-            reasoning={"effort": "minimal"},
-            text={"verbosity": "low"},
-            api_key=os.getenv("OPENAI_API_KEY"),
-        )
+        # LangChain client is built on first use (see `llm`)
+        self.model = model
+        self._llm = None
+        self._llm_lock = threading.Lock()
 
         # System prompt for strict JSON extraction
         self.system_prompt = (
@@ -37,6 +40,21 @@ class FieldExtractor:
             "The document may be in Brazilian Portuguese."
         )
 
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    with phase("llm_client"):
+                        langchain_openai = lazy_import("langchain_openai")
+                        self._llm = langchain_openai.ChatOpenAI(
+                            model=self.model,
+                            reasoning={"effort": "minimal"},
+                            text={"verbosity": "low"},
+                            api_key=os.getenv("OPENAI_API_KEY"),
+                        )
+        return self._llm
+
     @staticmethod
     def try_parse_json(s: str) -> Dict[str, Any]:
         """Strict parse; if it fails, try slicing the first {...} block."""
@@ -76,6 +94,18 @@ class FieldExtractor:
 
         return str(content).strip()
 
+    @staticmethod
+    def _token_usage(resp) -> Dict[str, int]:
+        """Prompt/completion token counts from an AIMessage, when the provider reports them."""
+        msg = resp[0] if isinstance(resp, list) else resp
+        usage = getattr(msg, "usage_metadata", None)
+        if usage:
+            return {"prompt": int(usage.get("input_tokens") or 0), "completion": int(usage.get("output_tokens") or 0)}
+        usage = (getattr(msg, "response_metadata", None) or {}).get("token_usage") or {}
+        if usage:
+            return {"prompt": int(usage.get("prompt_tokens") or 0), "completion": int(usage.get("completion_tokens") or 0)}
+        return {}
+
 
 
     def _extract_with_gpt(
@@ -117,14 +147,26 @@ class FieldExtractor:
         if model:
             self.llm.model = model
 
+        schema = lazy_import("langchain.schema")
+        SystemMessage, HumanMessage = schema.SystemMessage, schema.HumanMessage
+
         # Perform the call
-        start_inference = time.time()
-        response = self.llm.invoke([
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=user_instructions),
-        ])
-        end_inference = time.time()
-        print(f"[DEBUG] Inference time: {end_inference - start_inference:.2f}s")
+        llm = self.llm  # client construction is not call time
+        start_inference = time.perf_counter()
+        try:
+            response = llm.invoke([
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=user_instructions),
+            ])
+        except Exception:
+            LLM_MS.labels("error").observe((time.perf_counter() - start_inference) * 1000)
+            raise
+        inference_ms = (time.perf_counter() - start_inference) * 1000
+        LLM_MS.labels("ok").observe(inference_ms)
+        usage = self._token_usage(response)
+        for kind, n in usage.items():
+            LLM_TOKENS.labels(kind).inc(n)
+        log_event(log, "llm_call", logging.DEBUG, label=label, fields=len(schema_keys), ms=round(inference_ms, 1), **usage)
 
         # Always get plain text safely
         raw = self._as_text(response)
@@ -12,7 +12,8 @@ from ..pipeline.types import CacheEntry
 class DocumentCache:
     """
     LRU cache keyed by (label, pdf_filename, signature).
-    Also tracks the latest doc_key per (label, pdf_filename) to invalidate on file change.
+    Also tracks the latest doc_key per (label, pdf_filename) to invalidate on file change;
+    the superseded entry is handed back so its fields can be carried over incrementally.
     """
     def __init__(self, capacity: int = 2000) -> None:
         self._lru: "OrderedDict[str, CacheEntry]" = OrderedDict()
@@ -63,6 +64,11 @@ class DocumentCache:
         else:
             return fast
 
+    @staticmethod
+    def text_signature(text: str) -> str:
+        """Signature from already-parsed text (used when the PDF is not on this host)."""
+        return "text:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
     @staticmethod
     def make_doc_key(label: Optional[str], pdf_filename: Optional[str], signature: str) -> str:
         raw = json.dumps({"label": label, "pdf_filename": pdf_filename, "sig": signature},
@@ -87,12 +93,20 @@ class DocumentCache:
         return entry
 
     # --------- public API ---------
-    def upsert_latest_key(self, label: Optional[str], pdf_filename: Optional[str], new_key: str) -> None:
+    def upsert_latest_key(
+        self, label: Optional[str], pdf_filename: Optional[str], new_key: str
+    ) -> Optional[CacheEntry]:
+        """
+        Point (label, pdf_filename) at new_key. If the PDF changed, the old entry is
+        invalidated and returned (None otherwise).
+        """
         base = (label, pdf_filename)
         old_key = self._index.get(base)
+        previous: Optional[CacheEntry] = None
         if old_key is not None and old_key != new_key and old_key in self._lru:
-            del self._lru[old_key]  # invalidate old version (PDF changed)
+            previous = self._lru.pop(old_key)  # invalidate old version (PDF changed)
         self._index[base] = new_key
+        return previous
 
     def get(self, doc_key: str) -> Optional[CacheEntry]:
         return self._get(doc_key)
@@ -0,0 +1,62 @@
+# src/pipeline/logs.py
+"""
+Structured logging for the pipeline: one JSON object per line on stderr
+(ts, level, logger, event + fields), so container logs can be filtered by
+event and field instead of grepping printed text.
+
+    log = get_logger(__name__)
+    log_event(log, "cache_miss", idx=3, label="oab")
+
+PIPELINE_LOG_LEVEL sets the level (default INFO); per-call details are DEBUG.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, Optional
+
+ROOT_LOGGER = "modal_endpoint_app"
+
+_lock = threading.Lock()
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Attach the JSON handler to the package logger (once)."""
+    global _configured
+    with _lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        root = logging.getLogger(ROOT_LOGGER)
+        root.addHandler(handler)
+        root.setLevel((level or os.getenv("PIPELINE_LOG_LEVEL", "INFO")).upper())
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(name)
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields: Any) -> None:
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
@@ -0,0 +1,17 @@
+# src/pipeline/metrics.py
+"""
+Per-stage metrics for the extraction pipeline, registered in the registry
+shared with the backend (shared/metrics.py).
+"""
+from shared.metrics import REGISTRY
+
+# Pipeline stages
+PDF_PARSE_MS = REGISTRY.histogram("pipeline_pdf_parse_ms", "PDF text extraction inside the pipeline (no pdf_content sent)")
+EMBED_MS = REGISTRY.histogram("pipeline_embedding_ms", "Sentence-embedding encode calls", labels=("kind",))
+VECTOR_QUERY_MS = REGISTRY.histogram("pipeline_vector_query_ms", "Nearest-exemplar query against the vector store")
+VECTOR_INSERT_MS = REGISTRY.histogram("pipeline_vector_insert_ms", "Document insertion into the vector store")
+LLM_MS = REGISTRY.histogram("pipeline_llm_ms", "LLM extraction call", labels=("outcome",))
+LLM_TOKENS = REGISTRY.counter("pipeline_llm_tokens_total", "Tokens used by LLM calls", ("kind",))
+SAMPLE_MS = REGISTRY.histogram("pipeline_sample_ms", "process_single_sample end to end", labels=("cache",))
+CACHE = REGISTRY.counter("pipeline_cache_total", "Document cache lookups by outcome", ("result",))
+INFLIGHT = REGISTRY.gauge("pipeline_inflight", "Samples being processed by this container")
@@ -1,18 +1,27 @@
 # src/pipeline/pipeline.py
 from __future__ import annotations
 
-import json
+import logging
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional, Tuple
 
 from modal_endpoint_app.src.pipeline.types import CacheEntry, ResultPayload
 from modal_endpoint_app.src.parsing.cache import DocumentCache
 from modal_endpoint_app.src.extraction.extraction import ExtractionOrchestrator
-from modal_endpoint_app.src.parsing.pdf_text_parser import PDFExtractor
+from shared.parsing.parse_cache import ParseCache
+from shared.parsing.pdf_text_parser import PDFExtractor
+from modal_endpoint_app.src.parsing.text_diff import TextSignature, carry_over_fields
 from modal_endpoint_app.src.embeddings.embeddings import EmbeddingModel
-from modal_endpoint_app.src.embeddings.vector_store import VectorStore
+from modal_endpoint_app.src.embeddings.vector_store import RetentionPolicy, VectorStore
 from modal_endpoint_app.src.embeddings.rag import RAGContextBuilder
+from modal_endpoint_app.src.pipeline.logs import get_logger, log_event
+from modal_endpoint_app.src.pipeline.metrics import CACHE, INFLIGHT, PDF_PARSE_MS, REGISTRY, SAMPLE_MS
+from modal_endpoint_app.src.pipeline.startup import lazy_import, phase, startup_profile
+
+log = get_logger(__name__)
 
 
 class Solution:
@@ -28,25 +37,111 @@ class Solution:
         self,
         persist_dir: Path = Path("./chroma_store"),
         cache_capacity: int = 2000,
+        retention: Optional[RetentionPolicy] = None,
+        snapshot_path: Optional[Path] = None,
+        parse_max_pages: Optional[int] = None,
+        parse_max_chars: Optional[int] = None,
+        parse_cache_dir: Optional[Path] = None,
+        parse_cache_max_bytes: int = 512 * 1024 * 1024,
     ) -> None:
         """
         Initialize core dependencies and an LRU cache keyed by document.
+        Construction is cheap: heavy libraries and model weights are loaded on first
+        use, or ahead of time by `warm_up()` / `preload_in_background()`.
 
         Args:
             persist_dir: Filesystem directory used by the vector store to persist data.
             cache_capacity: Maximum number of document entries kept in the LRU cache.
+            retention: Per-label exemplar retention policy for the vector store.
+            snapshot_path: Optional index snapshot (scripts/build_index.py) bulk-loaded
+                into the vector store during warm-up so a fresh container starts with RAG exemplars.
+            parse_max_pages: Read at most this many pages when the caller sends no pdf_content.
+            parse_max_chars: Cap on the text taken from a PDF parsed here.
+            parse_cache_dir: Directory of the on-disk parse cache (parsed text keyed by
+                PDF content hash); None parses every time.
+            parse_cache_max_bytes: Size limit of that directory.
         """
         # Core dependencies
         self.embedder = EmbeddingModel()
-        self.vstore = VectorStore(persist_dir=str(persist_dir))
+        self.vstore = VectorStore(persist_dir=str(persist_dir), retention=retention)
         self.rag = RAGContextBuilder(self.embedder, self.vstore)
+        self.snapshot_path = snapshot_path
+        self.parse_max_pages = parse_max_pages
+        self.parse_max_chars = parse_max_chars
+        self.parse_cache = ParseCache(parse_cache_dir, parse_cache_max_bytes) if parse_cache_dir else None
+        self._warmup_thread: Optional[threading.Thread] = None
         self.orchestrator = ExtractionOrchestrator()
 
         # LRU by document
         self.cache = DocumentCache(capacity=cache_capacity)
+        self._incremental = {"documents": 0, "fields_carried": 0, "fields_stale": 0}
 
     # --------------- Public API ---------------
 
+    def warm_up(self) -> None:
+        """
+        Load everything a cache miss needs: embedding weights, the vector store
+        (plus the index snapshot, if any) and the LLM client.
+        """
+        self.embedder.start_preload()
+        if self.snapshot_path is not None and Path(self.snapshot_path).is_file():
+            try:
+                with phase("vstore_snapshot"):
+                    self.vstore.import_snapshot(self.snapshot_path)
+            except Exception as exc:
+                log_event(log, "snapshot_import_failed", logging.WARNING, path=str(self.snapshot_path), error=str(exc))
+        else:
+            _ = self.vstore.client
+        _ = self.orchestrator.extractor.llm
+        _ = self.embedder.model
+
+    def preload_in_background(self) -> None:
+        """
+        Run `warm_up()` in a daemon thread so the container can accept requests
+        immediately; requests that need no embedding (full cache hits) never wait on it.
+        """
+        if self._warmup_thread is not None:
+            return
+
+        def _run() -> None:
+            try:
+                with phase("warm_up"):
+                    self.warm_up()
+            except Exception as exc:
+                log_event(log, "warm_up_failed", logging.WARNING, error=str(exc))
+
+        self._warmup_thread = threading.Thread(target=_run, name="solution-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    def wait_until_warm(self, timeout: Optional[float] = None) -> bool:
+        """Block until the background warm-up has finished; True if it has (or never started)."""
+        if self._warmup_thread is None:
+            return True
+        self._warmup_thread.join(timeout)
+        return not self._warmup_thread.is_alive()
+
+    def start_background_jobs(self) -> None:
+        """Start long-running maintenance (vector-store compaction)."""
+        self.vstore.start_compactor()
+
+    def stop_background_jobs(self) -> None:
+        self.vstore.stop_compactor()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache, vector-store compaction and startup (import / warm-up phase) counters."""
+        return {
+            "cache": self.cache.stats(),
+            "vstore_compaction": self.vstore.compaction_stats(),
+            "incremental": dict(self._incremental),
+            "parse_cache": self.parse_cache.stats() if self.parse_cache is not None else {"enabled": False},
+            "embedder_ready": self.embedder.is_ready,
+            "startup": startup_profile(),
+        }
+
+    def metrics(self) -> str:
+        """Per-stage latency histograms, cache/token counters and gauges of this process (Prometheus text)."""
+        return REGISTRY.render()
+
     def process_single_sample(
         self,
         idx: int,
@@ -57,7 +152,8 @@ class Solution:
     ) -> Dict[str, Any]:
         """
         Process a single labeled PDF:
-          1) Build a stable document key and consult the cache.
+          1) Build a stable document key and consult the cache. If the document changed
+             since it was last seen, carry over fields whose text did not change.
           2) If all requested fields are cached, return them and ensure vector-store registration once.
           3) Otherwise, build RAG context and extract only missing fields.
           4) Merge results, persist (cache + vector store), and return a payload.
@@ -75,21 +171,40 @@ class Solution:
               - pdf_filename
               - requested_fields (dict[str, Optional[str]])
         """
+        t0 = time.perf_counter()
+        with INFLIGHT.track():
+            payload, cache_result = self._process(idx, label, extraction_schema, pdf_path, pdf_content)
+        CACHE.labels(cache_result).inc()
+        SAMPLE_MS.labels(cache_result).observe((time.perf_counter() - t0) * 1000)
+        return payload
+
+    def _process(
+        self,
+        idx: int,
+        label: str,
+        extraction_schema: dict,
+        pdf_path: str,
+        pdf_content: Optional[str],
+    ) -> Tuple[Dict[str, Any], str]:
+        """process_single_sample's work; also returns the cache outcome (hit / partial / miss)."""
         pdf_filename, pdfs_root_path = self._split_pdf_path(pdf_path)
-        signature, doc_key = self._build_doc_key(label, pdfs_root_path, pdf_filename)
-        self.cache.upsert_latest_key(label, pdf_filename, doc_key)
+        signature, doc_key = self._build_doc_key(label, pdfs_root_path, pdf_filename, pdf_content)
+        previous = self.cache.upsert_latest_key(label, pdf_filename, doc_key)
 
         pdf_raw_text = self._load_pdf_text(pdf_content, pdfs_root_path, pdf_filename)
 
         # Cache lookup and partition into present/missing keys
         entry = self.cache.get(doc_key)
+        if entry is None and previous is not None and previous.text_signature is not None:
+            entry = self._carry_over(idx, previous, signature, pdf_raw_text)
+            self.cache.put(doc_key, entry)
         extraction_keys = self._schema_keys(extraction_schema)
         cached_fields = dict(entry.fields) if entry else {}
         present, missing = self._partition_fields(extraction_keys, cached_fields)
         have_all = len(missing) == 0
 
         if have_all:
-            self._log(f"[CACHE HIT-ALL] idx={idx} label={label} pdf={pdf_filename}")
+            log_event(log, "cache_hit", idx=idx, label=label, pdf=pdf_filename)
             extracted_fields = {k: cached_fields.get(k) for k in extraction_keys}
             # Ensure the document is added to the vector store exactly once
             if entry and not entry.vstore_added:
@@ -108,16 +223,13 @@ class Solution:
                 pdf_filename=pdf_filename,
                 requested_fields=extracted_fields,
             )
-            return payload.__dict__
+            return payload.__dict__, "hit"
 
         # Partial or miss → extract only missing keys
         if present:
-            self._log(
-                f"[CACHE HIT-PARTIAL] idx={idx} label={label} "
-                f"pdf={pdf_filename} present={present} missing={missing}"
-            )
+            log_event(log, "cache_partial", idx=idx, label=label, pdf=pdf_filename, present=present, missing=missing)
         else:
-            self._log(f"[CACHE MISS] idx={idx} label={label} pdf={pdf_filename}")
+            log_event(log, "cache_miss", idx=idx, label=label, pdf=pdf_filename)
 
         # Build RAG context and encode the document once
         rag_context, curr_emb = self.rag.build(label or "", pdf_raw_text)
@@ -156,6 +268,7 @@ class Solution:
             signature=signature,
             fields=merged_fields,
             vstore_added=vstore_added,
+            text_signature=TextSignature.of(pdf_raw_text, merged_fields.values()),
         )
         self.cache.put(doc_key, new_entry)
 
@@ -165,8 +278,8 @@ class Solution:
             requested_fields=extracted_for_request,
         )
 
-        self._log(json.dumps(payload.__dict__, ensure_ascii=False, indent=2))
-        return payload.__dict__
+        log_event(log, "sample_result", logging.DEBUG, idx=idx, **payload.__dict__)
+        return payload.__dict__, "partial" if present else "miss"
 
     # Private helpers 
     @staticmethod
@@ -176,12 +289,40 @@ class Solution:
         pdfs_root_path = os.path.dirname(pdf_path)
         return pdf_filename, pdfs_root_path
 
-    def _build_doc_key(self, label: str, root: str, filename: str) -> Tuple[str, str]:
-        """Compute a stable signature and document key."""
+    def _build_doc_key(
+        self, label: str, root: str, filename: str, pdf_content: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        Compute a stable signature and document key.
+        When the PDF is not readable on this host (remote calls send pre-parsed text),
+        the signature falls back to a hash of that text so edits are still detected.
+        """
         signature = self.cache.compute_signature(root, filename, mode="fast")
+        if signature == "missing" and isinstance(pdf_content, str):
+            signature = self.cache.text_signature(pdf_content)
         doc_key = self.cache.make_doc_key(label, filename, signature)
         return signature, doc_key
 
+    def _carry_over(self, idx: int, previous: CacheEntry, signature: str, pdf_raw_text: str) -> CacheEntry:
+        """
+        Build a cache entry for a new version of a known document, keeping the
+        previous fields whose supporting text span is unchanged.
+        """
+        carried, stale = carry_over_fields(previous.text_signature, pdf_raw_text, previous.fields)
+        self._incremental["documents"] += 1
+        self._incremental["fields_carried"] += len(carried)
+        self._incremental["fields_stale"] += len(stale)
+        log_event(log, "cache_incremental", idx=idx, label=previous.label, pdf=previous.pdf_filename,
+                  carried=sorted(carried), stale=sorted(stale))
+        return CacheEntry(
+            label=previous.label,
+            pdf_filename=previous.pdf_filename,
+            signature=signature,
+            fields=carried,
+            vstore_added=previous.vstore_added,
+            text_signature=TextSignature.of(pdf_raw_text, carried.values()),
+        )
+
     @staticmethod
     def _schema_keys(schema: dict) -> Iterable[str]:
         """
@@ -205,11 +346,6 @@ class Solution:
         """Build a stable doc_id for the vector store."""
         return pdf_filename if pdf_filename else f"sample_{idx}"
 
-    @staticmethod
-    def _log(msg: str) -> None:
-        """Thin wrapper to centralize logging/printing."""
-        print(msg)
-
     def _load_pdf_text(self, pdf_content: Optional[str], root: str, filename: str) -> str:
         """
         Load raw text from PDF only if not provided.
@@ -219,10 +355,20 @@ class Solution:
             return pdf_content
 
         try:
-            text, _ = PDFExtractor.extract_pdf_text(pdf_path=os.path.join(root, filename))
+            lazy_import("fitz")  # imported by PDFExtractor on first use; recorded in the startup profile
+            pdf_path = Path(os.path.join(root, filename))
+            with PDF_PARSE_MS.time():
+                if self.parse_cache is not None:
+                    text, _, _ = self.parse_cache.extract(pdf_path, self.parse_max_pages, self.parse_max_chars)
+                else:
+                    text, _ = PDFExtractor.extract_pdf_text(
+                        pdf_path=pdf_path,
+                        max_pages=self.parse_max_pages,
+                        max_chars=self.parse_max_chars,
+                    )
             return text if isinstance(text, str) else ""
         except Exception as exc:  # be resilient to parser failures
-            self._log(f"[WARN] Failed to load PDF text for '{filename}': {exc}")
+            log_event(log, "pdf_load_failed", logging.WARNING, pdf=filename, error=str(exc))
             return ""
 
     def _ensure_vstore_once(
@@ -254,4 +400,4 @@ class Solution:
             self.cache.put(doc_key, entry)
         except Exception as exc:
             # If vector-store insertion fails, proceed without breaking the request.
-            self._log(f"[WARN] Vector-store insertion failed for '{pdf_filename}': {exc}")
+            log_event(log, "vstore_insert_failed", logging.WARNING, pdf=pdf_filename, error=str(exc))
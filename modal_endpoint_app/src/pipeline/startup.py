@@ -0,0 +1,61 @@
+# src/pipeline/startup.py
+"""
+Lazy imports and startup-phase timings.
+
+Heavy dependencies (torch via sentence_transformers, chromadb, langchain, fitz)
+are imported on first use through `lazy_import`, which records how long each
+import took. `phase` times named startup steps (model load, snapshot import…).
+`startup_profile()` returns both, relative to process start.
+"""
+from __future__ import annotations
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Dict, Iterator
+
+PROCESS_START = time.time()
+
+_lock = threading.Lock()
+_import_ms: Dict[str, float] = {}
+_phases: Dict[str, Dict[str, Any]] = {}
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import `name` on first call and record the wall time it took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _import_ms.setdefault(name, round((time.perf_counter() - t0) * 1000, 1))
+    return module
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record a named startup phase (start offset from process start + duration)."""
+    started = time.time()
+    t0 = time.perf_counter()
+    with _lock:
+        _phases[name] = {"status": "running", "started_at_s": round(started - PROCESS_START, 3)}
+    try:
+        yield
+    except Exception as exc:
+        with _lock:
+            _phases[name].update(status="error", error=str(exc), duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+        raise
+    with _lock:
+        _phases[name].update(status="done", duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+
+
+def startup_profile() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "uptime_s": round(time.time() - PROCESS_START, 3),
+            "imports_ms": dict(_import_ms),
+            "phases": {k: dict(v) for k, v in _phases.items()},
+        }
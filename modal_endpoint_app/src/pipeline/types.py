@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+from ..parsing.text_diff import TextSignature
+
 @dataclass
 class CacheEntry:
     label: Optional[str]
@@ -10,6 +12,7 @@ class CacheEntry:
     signature: str
     fields: Dict[str, Optional[str]] = field(default_factory=dict)
     vstore_added: bool = False
+    text_signature: Optional[TextSignature] = None  # to diff the next version against, without keeping the text
 
 from dataclasses import dataclass
 from typing import Optional, List, Dict
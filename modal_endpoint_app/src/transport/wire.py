@@ -0,0 +1,36 @@
+# src/transport/wire.py
+"""
+Content negotiation for the scheduler endpoint.
+
+Requests may arrive as JSON or msgpack (Content-Type), optionally compressed
+with zstd or gzip (Content-Encoding). Responses use the best format listed in
+the caller's Accept / Accept-Encoding headers; plain JSON is the fallback.
+The codec itself is shared with the backend (shared/transport/wire.py).
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+
+from shared.transport.wire import (COMPRESS_MIN_BYTES, HAS_MSGPACK, HAS_ZSTD, JSON_TYPE, MSGPACK_TYPE,
+                                   UnsupportedPayload, compress, decompress, deserialize, media_type,
+                                   serialize, tokens)
+
+__all__ = ["UnsupportedPayload", "decode_request", "encode_response"]
+
+
+def decode_request(body: bytes, content_type: Optional[str], content_encoding: Optional[str]) -> Any:
+    """Request payload; UnsupportedPayload (→ 415) for formats or encodings this endpoint cannot read."""
+    return deserialize(decompress(body, content_encoding), media_type(content_type))
+
+
+def encode_response(data: Any, accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+    media = MSGPACK_TYPE if MSGPACK_TYPE in tokens(accept) and HAS_MSGPACK else JSON_TYPE
+    body = serialize(data, media)
+
+    headers = {"Content-Type": media, "Vary": "Accept, Accept-Encoding"}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encodings = tokens(accept_encoding)
+        encoding = "zstd" if "zstd" in encodings and HAS_ZSTD else "gzip" if "gzip" in encodings else None
+        if encoding:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return body, headers
@@ -0,0 +1,5 @@
+"""
+Code used by both the backend and the Modal app. Deployed alongside each of
+them (backend/Dockerfile, the image in modal_endpoint_app/endpoint.py), so it
+is imported as the top-level `shared` package.
+"""
@@ -0,0 +1,267 @@
+# shared/metrics.py
+"""
+Metrics registry shared by the backend and the Modal app: latency histograms
+in milliseconds, counters and gauges, rendered in the Prometheus text format
+by `REGISTRY.render()`.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style: each bucket counts values <= its bound)."""
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = sorted(float(b) for b in buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, n in zip(self.buckets + [float("inf")], self._counts):
+                running += n
+                cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "avg": round(self._sum / self._count, 3) if self._count else None,
+                "buckets": cumulative,
+            }
+
+# --------- registry (Prometheus text exposition) ---------
+LATENCY_MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+class Value:
+    """A counter or gauge sample."""
+    def __init__(self) -> None:
+        self._v = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._v += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._v -= amount
+
+    def set(self, value: float) -> None:
+        self._v = float(value)
+
+    def get(self) -> float:
+        return self._v
+
+class Family:
+    """
+    A named metric split by label values. labels(*values) returns the child for
+    those values (a Value, or a Histogram for histograms); unlabeled families
+    forward inc/set/observe to their single child.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new(self) -> Any:
+        return Value()
+
+    def labels(self, *values: Any) -> Any:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new())
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+class Counter(Family):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+class Gauge(Family):
+    """Settable gauge, or computed at scrape time when `fn` is given (a number, or {label values: number})."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 fn: Optional[Callable[[], Union[float, Dict[Any, float]]]] = None) -> None:
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    @contextmanager
+    def track(self, *values: Any) -> Iterator[None]:
+        """Count the block as in flight."""
+        child = self.labels(*values)
+        child.inc()
+        try:
+            yield
+        finally:
+            child.dec()
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        if self.fn is None:
+            return super().children()
+        try:
+            result = self.fn()
+        except Exception:
+            return []
+        if not isinstance(result, dict):
+            result = {(): result}
+        out = []
+        for key, v in result.items():
+            value = Value()
+            value.set(v or 0)
+            out.append(((key,) if isinstance(key, str) else tuple(key), value))
+        return out
+
+class HistogramFamily(Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_MS_BUCKETS,
+                 labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def _new(self) -> Histogram:
+        return Histogram(buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self.labels().snapshot()
+
+    @contextmanager
+    def time(self, *values: Any) -> Iterator[None]:
+        """Observe the block's wall time in milliseconds."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(*values).observe((time.perf_counter() - t0) * 1000)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labelset(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+class Registry:
+    """Process-wide set of metric families, rendered in the Prometheus text format (0.0.4)."""
+    def __init__(self) -> None:
+        self._families: Dict[str, Family] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = cls(name, *args, **kwargs)
+            elif type(family) is not cls:
+                raise ValueError(f"metric {name} already registered as a {family.kind}")
+            return family
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (),
+              fn: Optional[Callable[[], Union[float, Dict[Any, float]]]] = None) -> Gauge:
+        gauge = self._get(Gauge, name, help, labels)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_MS_BUCKETS,
+                  labels: Sequence[str] = ()) -> HistogramFamily:
+        return self._get(HistogramFamily, name, help, buckets, labels)
+
+    def render(self) -> str:
+        with self._lock:
+            families = list(self._families.values())
+        lines: List[str] = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in family.children():
+                if family.kind != "histogram":
+                    lines.append(f"{family.name}{_labelset(family.labelnames, values)} {_num(child.get())}")
+                    continue
+                snap = child.snapshot()
+                for bound, n in snap["buckets"].items():
+                    le = _labelset(family.labelnames, values, f'le="{bound}"')
+                    lines.append(f"{family.name}_bucket{le} {n}")
+                labelset = _labelset(family.labelnames, values)
+                lines.append(f"{family.name}_sum{labelset} {_num(snap['sum'])}")
+                lines.append(f"{family.name}_count{labelset} {snap['count']}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def merge_expositions(renders: Dict[str, str], label: str = "container") -> str:
+    """
+    Merge Registry.render() outputs of several processes into one exposition,
+    each sample tagged with `label`="<key>". Families keep a single HELP/TYPE
+    header and their samples stay together, as the text format requires.
+    """
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = {}
+    for key, text in renders.items():
+        tag = f'{label}="{_escape(str(key))}"'
+        family = ""
+        for line in text.splitlines():
+            if line.startswith("# "):
+                parts = line.split(" ", 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    if len(headers.setdefault(family, [])) < 2:
+                        headers[family].append(line)
+                    samples.setdefault(family, [])
+                continue
+            if not line.strip():
+                continue
+            cut = len(line.split(" ", 1)[0].split("{", 1)[0])  # end of the metric name
+            if line[cut:cut + 1] == "{":
+                line = f"{line[:cut + 1]}{tag},{line[cut + 1:]}"
+            else:
+                line = f"{line[:cut]}{{{tag}}}{line[cut:]}"
+            samples.setdefault(family, []).append(line)
+    lines: List[str] = []
+    for family, rows in samples.items():
+        lines += headers.get(family, [])
+        lines += rows
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,57 @@
+# shared/parsing/content_hash.py
+"""
+PDF content hashes and the parse-budget tag, for every cache keyed by PDF
+content (ParseCache, the backend's result cache). Files are hashed once per
+process: digests are memoized on (path, mtime_ns, size).
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+MEMO_MAX = 10_000
+
+_memo: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def _memo_key(path: Path) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+def hash_bytes(data: Union[bytes, memoryview]) -> str:
+    """blake2b (20 bytes, hex) of a PDF held in memory."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """Same digest as hash_bytes for a PDF on disk, memoized."""
+    key = _memo_key(path)
+    digest = _memo.get(key)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with _lock:
+            if len(_memo) >= MEMO_MAX:
+                _memo.clear()
+            _memo[key] = digest
+    return digest
+
+
+def known_hash(path: Path) -> Optional[str]:
+    """hash_file's digest if this process already computed it for the file as it is now; never reads the file."""
+    try:
+        return _memo.get(_memo_key(path))
+    except OSError:
+        return None
+
+
+def budget_tag(max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """Parse budgets as they appear in cache keys; 0 means no limit."""
+    return f"p{max_pages or 0}c{max_chars or 0}"
@@ -0,0 +1,237 @@
+# shared/parsing/parse_cache.py
+"""
+Content-addressed on-disk cache of parsed PDF text (and, optionally, word boxes).
+
+Entries are keyed by a blake2b of the PDF bytes (content_hash) plus the parse budgets, so an
+unchanged PDF is never parsed twice, whatever its path. One file per entry:
+
+    header  <4sBBHQQQ>  magic, version, codec, flags, text bytes, words, word-text bytes
+    text    zstd (or zlib) compressed UTF-8
+    boxes   float32 (N, 4), uncompressed, 8-byte aligned
+    offsets int64 (N + 1)
+    words   UTF-8 word buffer
+
+Files are read through mmap; the box array is a zero-copy view of the map.
+"""
+from __future__ import annotations
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from shared.parsing.content_hash import budget_tag, hash_bytes, hash_file
+from shared.parsing.pdf_text_parser import PDFExtractor
+from shared.parsing.word_boxes import WordBoxes
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"PDFT"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQQQ")
+CODEC_ZLIB, CODEC_ZSTD = 1, 2
+FLAG_WORDS = 1
+SUFFIX = ".ptc"
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class ParseCache:
+    """
+    Size-bounded directory of parse results shared by every process that opens it.
+
+    Hits bump the file's mtime, and eviction removes the oldest files until the
+    directory is back under 90% of `max_bytes`. Each instance tracks the bytes
+    it has seen (startup scan + its own writes) and rescans the directory when
+    that estimate passes the limit, so several writers can overshoot briefly.
+    """
+    def __init__(self, root: Path, max_bytes: int, level: int = 3) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.level = level
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+
+    # --------- keys ---------
+    @staticmethod
+    def key(digest: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+        return f"{digest}-{budget_tag(max_pages, max_chars)}"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / (key + SUFFIX)
+
+    # --------- read / write ---------
+    def get(self, key: str, with_words: bool = False) -> Optional[Tuple[str, Optional[WordBoxes]]]:
+        path = self._path(key)
+        mm: Optional[mmap.mmap] = None
+        entry = None
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            entry = self._decode(mm, with_words)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self._stats["errors"] += 1
+        finally:
+            # Word boxes are views of the map and keep it open; nothing else does.
+            if mm is not None and (entry is None or entry[1] is None):
+                mm.close()
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        try:
+            os.utime(path)  # recency for eviction
+        except OSError:
+            pass
+        return entry
+
+    def _decode(self, mm: mmap.mmap, with_words: bool) -> Optional[Tuple[str, Optional[WordBoxes]]]:
+        magic, version, codec, flags, text_len, n_words, wtext_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a parse cache entry")
+        if with_words and not flags & FLAG_WORDS:
+            return None  # cached without words; parse again
+
+        pos = HEADER.size
+        with memoryview(mm) as view:
+            blob = view[pos:pos + text_len]
+            if codec == CODEC_ZSTD:
+                if zstandard is None:
+                    raise ValueError("entry is zstd-compressed but zstandard is not installed")
+                raw = zstandard.ZstdDecompressor().decompressobj().decompress(blob)
+            else:
+                raw = zlib.decompress(blob)
+            blob.release()
+        text = raw.decode("utf-8")
+
+        if not with_words:
+            return text, None
+        pos = _align8(pos + text_len)
+        boxes = np.frombuffer(mm, dtype=np.float32, count=n_words * 4, offset=pos).reshape(-1, 4)
+        pos += n_words * 16
+        offsets = np.frombuffer(mm, dtype=np.int64, count=n_words + 1, offset=pos)
+        pos += (n_words + 1) * 8
+        words_text = mm[pos:pos + wtext_len].decode("utf-8")
+        return text, WordBoxes(boxes, words_text, offsets)  # boxes/offsets keep the map alive
+
+    def _encode(self, text: str, words: Optional[WordBoxes]) -> bytes:
+        raw = text.encode("utf-8")
+        if self.codec == CODEC_ZSTD:
+            blob = zstandard.ZstdCompressor(level=self.level).compress(raw)
+        else:
+            blob = zlib.compress(raw, self.level)
+        flags = FLAG_WORDS if words is not None else 0
+        n_words = len(words) if words is not None else 0
+        wtext = words.text.encode("utf-8") if words is not None else b""
+        parts = [HEADER.pack(MAGIC, VERSION, self.codec, flags, len(blob), n_words, len(wtext)), blob]
+        if words is not None:
+            parts.append(b"\0" * (_align8(HEADER.size + len(blob)) - HEADER.size - len(blob)))
+            parts += [words.boxes.astype(np.float32, copy=False).tobytes(),
+                      words.offsets.astype(np.int64, copy=False).tobytes(), wtext]
+        return b"".join(parts)
+
+    def put(self, key: str, text: str, words: Optional[WordBoxes] = None) -> None:
+        path = self._path(key)
+        try:
+            data = self._encode(text, words)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)  # readers never see a partial file
+        except OSError:
+            self._stats["errors"] += 1
+            return
+        self._stats["writes"] += 1
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan()[0]
+            else:
+                self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    # --------- eviction ---------
+    def _scan(self) -> Tuple[int, list]:
+        total, files = 0, []
+        if not self.root.is_dir():
+            return 0, files
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                total += st.st_size
+                files.append((st.st_mtime, st.st_size, entry.path))
+        return total, files
+
+    def _evict(self) -> None:
+        total, files = self._scan()
+        target = int(self.max_bytes * 0.9)
+        files.sort()
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self._stats["evictions"] += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._bytes = total
+
+    # --------- parse through the cache ---------
+    def extract(self, pdf_path: Path, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                with_words: bool = False, digest: Optional[str] = None) -> Tuple[str, WordBoxes, bool]:
+        """
+        PDFExtractor.extract_pdf_text through the cache; returns (text, words, hit).
+        `digest` is the file's hash_file digest when the caller already has it.
+        """
+        key = self.key(digest or hash_file(pdf_path), max_pages, max_chars)
+        cached = self.get(key, with_words)
+        if cached is not None:
+            return cached[0], cached[1] or WordBoxes.empty(), True
+        text, words = PDFExtractor.extract_pdf_text(pdf_path, max_pages=max_pages, max_chars=max_chars, with_words=with_words)
+        if not text.startswith("<<ERROR OPENING PDF"):
+            self.put(key, text, words if with_words else None)
+        return text, words, False
+
+    def extract_bytes(self, data: Union[bytes, memoryview], name: str, max_pages: Optional[int] = None,
+                      max_chars: Optional[int] = None, with_words: bool = False) -> Tuple[str, WordBoxes, bool]:
+        """Same as extract() for a PDF held in memory."""
+        key = self.key(hash_bytes(data), max_pages, max_chars)
+        cached = self.get(key, with_words)
+        if cached is not None:
+            return cached[0], cached[1] or WordBoxes.empty(), True
+        text, words = PDFExtractor.extract_pdf_bytes(data, name, max_pages=max_pages, max_chars=max_chars, with_words=with_words)
+        if not text.startswith("<<ERROR OPENING PDF"):
+            self.put(key, text, words if with_words else None)
+        return text, words, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            **self._stats,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "path": str(self.root),
+        }
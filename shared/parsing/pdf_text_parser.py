@@ -0,0 +1,103 @@
+# shared/parsing/pdf_text_parser.py
+import importlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Tuple, List, Optional, Union
+
+from shared.parsing.word_boxes import WordBoxes
+
+PAGE_BREAK = "\n\n--- PAGE BREAK ---\n\n"
+
+def _fitz():
+    # Imported on first parse: PyMuPDF is slow to import and most Modal requests carry their text.
+    return importlib.import_module("fitz")
+
+@dataclass
+class PageText:
+    index: int
+    text: str
+    words: Optional[WordBoxes] = None  # only when requested
+
+class PDFExtractor:
+    @staticmethod
+    def extract_pdf_text(
+        pdf_path: Path,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        with_words: bool = False,
+        stop_when: Optional[Callable[[PageText], bool]] = None,
+    ) -> Tuple[str, WordBoxes]:
+        """
+        Text of the PDF's pages joined with PAGE_BREAK, plus first-page word boxes
+        (WordBoxes) when `with_words` is set, otherwise empty.
+
+        Pages are read lazily and reading stops at the first budget hit:
+        `max_pages` pages, `max_chars` characters of output (the last page is
+        truncated), or `stop_when(page)` returning True after a page.
+        """
+        try:
+            doc = _fitz().open(pdf_path)
+        except Exception as e:
+            err_msg = f"<<ERROR OPENING PDF {pdf_path.name}: {e}>>"
+            return err_msg, WordBoxes.empty()
+        return PDFExtractor._extract_doc(doc, max_pages, max_chars, with_words, stop_when)
+
+    @staticmethod
+    def extract_pdf_bytes(
+        data: Union[bytes, memoryview], name: str = "upload.pdf",
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        with_words: bool = False,
+        stop_when: Optional[Callable[[PageText], bool]] = None,
+    ) -> Tuple[str, WordBoxes]:
+        """Same as extract_pdf_text for a PDF already in memory (bytes, or a memoryview over a buffer or mmap)."""
+        try:
+            doc = _fitz().open(stream=data, filetype="pdf")
+        except Exception as e:
+            err_msg = f"<<ERROR OPENING PDF {name}: {e}>>"
+            return err_msg, WordBoxes.empty()
+        return PDFExtractor._extract_doc(doc, max_pages, max_chars, with_words, stop_when)
+
+    @staticmethod
+    def iter_pages(doc, max_pages: Optional[int] = None, with_words: bool = False) -> Iterator[PageText]:
+        """Yield pages one at a time; nothing is extracted for pages the caller never pulls."""
+        for page_index, page in enumerate(doc):
+            if max_pages is not None and page_index >= max_pages:
+                return
+            page_text = (page.get_text("text") or "").strip()
+            # Words + bboxes from the first page only
+            words = WordBoxes.from_page(page) if with_words and page_index == 0 else None
+            yield PageText(page_index, page_text, words)
+
+    @staticmethod
+    def _extract_doc(
+        doc,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        with_words: bool = False,
+        stop_when: Optional[Callable[[PageText], bool]] = None,
+    ) -> Tuple[str, WordBoxes]:
+        text_pages: List[str] = []
+        words_with_bboxes = WordBoxes.empty()
+        budget = max_chars if max_chars is not None else -1
+
+        try:
+            for page in PDFExtractor.iter_pages(doc, max_pages, with_words):
+                if page.words:
+                    words_with_bboxes = page.words
+                if page.text:
+                    if budget >= 0:
+                        if text_pages:
+                            budget -= len(PAGE_BREAK)
+                        if budget <= 0:
+                            break
+                        page.text = page.text[:budget]
+                        budget -= len(page.text)
+                    text_pages.append(page.text)
+                if budget == 0 or (stop_when is not None and stop_when(page)):
+                    break
+        finally:
+            doc.close()
+
+        text_content = PAGE_BREAK.join(text_pages).strip()
+        return text_content, words_with_bboxes
@@ -0,0 +1,214 @@
+# shared/parsing/word_boxes.py
+"""
+Columnar storage for a page's words and bounding boxes, with a uniform-grid
+spatial index for layout lookups ("words inside this region", "nearest word
+to the right of this label").
+"""
+from __future__ import annotations
+import sys
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+BBox = Tuple[float, float, float, float]
+
+
+class WordBoxes:
+    """
+    N words as one float32 (N, 4) array of (x0, y0, x1, y1) plus a single text
+    buffer: word i is text[offsets[i]:offsets[i + 1]].
+
+    Iterating yields the (word, bbox) tuples the parser used to return, so
+    callers that unpacked the old list keep working.
+    """
+    __slots__ = ("boxes", "text", "offsets", "_index")
+
+    def __init__(self, boxes: np.ndarray, text: str, offsets: np.ndarray) -> None:
+        self.boxes = np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.text = text
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._index: Optional[GridIndex] = None
+
+    # --------- construction ---------
+    @classmethod
+    def empty(cls) -> "WordBoxes":
+        return cls(np.zeros((0, 4), dtype=np.float32), "", np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def from_words(cls, words: Iterable[Tuple[str, Sequence[float]]]) -> "WordBoxes":
+        words = list(words)
+        if not words:
+            return cls.empty()
+        texts = [w for w, _ in words]
+        boxes = np.array([b for _, b in words], dtype=np.float32)
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)), out=offsets[1:])
+        return cls(boxes, "".join(texts), offsets)
+
+    @classmethod
+    def from_page(cls, page, normalize: bool = True) -> "WordBoxes":
+        """Words of a PyMuPDF page; boxes scaled to [0, 1] page units when the page size is valid."""
+        raw = page.get_text("words") or []
+        if not raw:
+            return cls.empty()
+        boxes = np.array([w[:4] for w in raw], dtype=np.float32)
+        pdf_w = float(page.rect.width)
+        pdf_h = float(page.rect.height)
+        if normalize and pdf_w > 0 and pdf_h > 0:
+            boxes /= np.array([pdf_w, pdf_h, pdf_w, pdf_h], dtype=np.float32)
+            np.clip(boxes, 0.0, 1.0, out=boxes)
+        # Otherwise raw PDF coordinates are kept, as before
+        texts = [w[4] for w in raw]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)), out=offsets[1:])
+        return cls(boxes, "".join(texts), offsets)
+
+    # --------- access ---------
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def word(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def bbox(self, i: int) -> BBox:
+        return tuple(float(v) for v in self.boxes[i])
+
+    def __getitem__(self, i: int) -> Tuple[str, BBox]:
+        return self.word(i), self.bbox(i)
+
+    def __iter__(self) -> Iterator[Tuple[str, BBox]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_list(self) -> List[Tuple[str, BBox]]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        return self.boxes.nbytes + self.offsets.nbytes + sys.getsizeof(self.text)
+
+    # --------- layout queries ---------
+    @property
+    def index(self) -> "GridIndex":
+        """Grid index over the boxes, built on first use."""
+        if self._index is None:
+            self._index = GridIndex(self.boxes)
+        return self._index
+
+    def within(self, region: BBox, contained: bool = False) -> List[int]:
+        """Indices (reading order) of words overlapping `region`, or fully inside it with contained=True."""
+        return self.index.query(region, contained).tolist()
+
+    def find(self, label: str) -> List[BBox]:
+        """
+        Boxes of each occurrence of `label` (case-insensitive, whitespace-separated
+        tokens matched against consecutive words); multi-word matches are merged
+        into one box.
+        """
+        tokens = label.casefold().split()
+        if not tokens or len(self) < len(tokens):
+            return []
+        words = [self.word(i).casefold() for i in range(len(self))]
+        hits: List[BBox] = []
+        for i in range(len(words) - len(tokens) + 1):
+            if words[i:i + len(tokens)] == tokens:
+                span = self.boxes[i:i + len(tokens)]
+                hits.append((float(span[:, 0].min()), float(span[:, 1].min()),
+                             float(span[:, 2].max()), float(span[:, 3].max())))
+        return hits
+
+    def right_of(self, anchor: Union[int, BBox], max_gap: Optional[float] = None) -> Optional[int]:
+        """Nearest word to the right of word `anchor` (or of a bbox) on the same line, if any."""
+        bbox = self.bbox(anchor) if isinstance(anchor, (int, np.integer)) else anchor
+        found = self.index.right_of(bbox, max_gap)
+        if found is not None and isinstance(anchor, (int, np.integer)) and found == anchor:
+            return None
+        return found
+
+
+class GridIndex:
+    """
+    Uniform grid over the extent of the boxes. Each cell lists the words that
+    overlap it, stored CSR-style (one sorted item array plus per-cell start
+    offsets), so a query touches only the cells under the search region and a
+    row of cells is one contiguous slice.
+    """
+    def __init__(self, boxes: np.ndarray, cells_per_side: Optional[int] = None) -> None:
+        self.boxes = boxes
+        n = len(boxes)
+        self.g = cells_per_side or max(1, int(np.sqrt(n / 2)))  # ~2 words per cell
+        if n == 0:
+            self.origin = np.zeros(2, dtype=np.float32)
+            self.cell = np.ones(2, dtype=np.float32)
+            self.items = np.zeros(0, dtype=np.int32)
+            self.starts = np.zeros(self.g * self.g + 1, dtype=np.int64)
+            return
+
+        self.origin = boxes[:, :2].min(axis=0)
+        extent = boxes[:, 2:].max(axis=0) - self.origin
+        self.cell = np.maximum(extent, 1e-6) / self.g
+
+        c0 = self._cells(boxes[:, :2])
+        c1 = self._cells(boxes[:, 2:])
+        nx = c1[:, 0] - c0[:, 0] + 1
+        counts = nx * (c1[:, 1] - c0[:, 1] + 1)
+
+        # One (cell, word) entry for every cell a box covers
+        word_ids = np.repeat(np.arange(n), counts)
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        nx_rep = np.repeat(nx, counts)
+        cx = np.repeat(c0[:, 0], counts) + local % nx_rep
+        cy = np.repeat(c0[:, 1], counts) + local // nx_rep
+        cell_ids = cy * self.g + cx
+
+        order = np.argsort(cell_ids, kind="stable")
+        self.items = word_ids[order].astype(np.int32)
+        self.starts = np.searchsorted(cell_ids[order], np.arange(self.g * self.g + 1))
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        return np.clip(((points - self.origin) / self.cell).astype(np.int64), 0, self.g - 1)
+
+    def candidates(self, region: BBox) -> np.ndarray:
+        (cx0, cy0), (cx1, cy1) = self._cells(np.array([region[:2], region[2:]], dtype=np.float32))
+        parts = [
+            self.items[self.starts[cy * self.g + cx0]:self.starts[cy * self.g + cx1 + 1]]
+            for cy in range(cy0, cy1 + 1)
+        ]
+        return np.unique(np.concatenate(parts)) if parts else self.items[:0]
+
+    def query(self, region: BBox, contained: bool = False) -> np.ndarray:
+        cand = self.candidates(region)
+        if not len(cand):
+            return cand
+        b = self.boxes[cand]
+        x0, y0, x1, y1 = region
+        if contained:
+            mask = (b[:, 0] >= x0) & (b[:, 1] >= y0) & (b[:, 2] <= x1) & (b[:, 3] <= y1)
+        else:
+            mask = (b[:, 0] <= x1) & (b[:, 2] >= x0) & (b[:, 1] <= y1) & (b[:, 3] >= y0)
+        return cand[mask]  # unique() already sorted them
+
+    def right_of(self, bbox: BBox, max_gap: Optional[float] = None, min_overlap: float = 0.5) -> Optional[int]:
+        """
+        Word whose left edge is nearest past bbox's right edge, among words that
+        share at least `min_overlap` of the shorter height with bbox.
+        """
+        if not len(self.boxes):
+            return None
+        x0, y0, x1, y1 = bbox
+        right = x1 + max_gap if max_gap is not None else float(self.origin[0] + self.cell[0] * self.g)
+        cand = self.query((x1, y0, right, y1))
+        if not len(cand):
+            return None
+        b = self.boxes[cand]
+        overlap = np.minimum(b[:, 3], y1) - np.maximum(b[:, 1], y0)
+        shorter = np.minimum(b[:, 3] - b[:, 1], y1 - y0)
+        gap = b[:, 0] - x1
+        tol = 1e-6 + 0.1 * (y1 - y0)  # kerning can make neighbours overlap slightly
+        ok = (overlap >= min_overlap * shorter) & (gap >= -tol)
+        if max_gap is not None:
+            ok &= gap <= max_gap
+        if not ok.any():
+            return None
+        cand, gap = cand[ok], gap[ok]
+        return int(cand[np.argmin(gap)])
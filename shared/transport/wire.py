@@ -0,0 +1,79 @@
+# shared/transport/wire.py
+"""
+Wire codec shared by the backend (client side) and the Modal scheduler
+endpoint (server side): JSON or msgpack bodies, optionally zstd- or
+gzip-compressed. msgpack and zstandard are optional; without them JSON and
+gzip are used. Negotiation (what to send, what to accept) stays in each app.
+"""
+from __future__ import annotations
+import gzip
+import json
+from typing import Any, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional: falls back to JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional: falls back to gzip
+    zstandard = None
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/x-msgpack"
+COMPRESS_MIN_BYTES = 1024  # smaller bodies are sent as they are
+
+HAS_MSGPACK = msgpack is not None
+HAS_ZSTD = zstandard is not None
+
+
+class UnsupportedPayload(ValueError):
+    """Body in a format or encoding that cannot be read here."""
+
+
+def tokens(header: Optional[str]) -> List[str]:
+    """Lower-cased values of a comma-separated header, parameters (;q=...) dropped."""
+    return [part.split(";")[0].strip().lower() for part in (header or "").split(",") if part.strip()]
+
+
+def media_type(content_type: Optional[str]) -> str:
+    return (tokens(content_type) or [JSON_TYPE])[0]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress with "zstd" or "gzip" (the caller checks HAS_ZSTD)."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=5)
+
+
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "zstd":
+        if zstandard is None:
+            raise UnsupportedPayload("zstd body but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "identity":
+        return body
+    raise UnsupportedPayload(f"Unsupported Content-Encoding: {encoding}")
+
+
+def serialize(data: Any, media: str) -> bytes:
+    """Encode as MSGPACK_TYPE (when installed) or JSON_TYPE."""
+    if media == MSGPACK_TYPE and msgpack is not None:
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def deserialize(raw: bytes, media: str) -> Any:
+    """Decode a body of the given media type; UnsupportedPayload for other types."""
+    if media == MSGPACK_TYPE:
+        if msgpack is None:
+            raise UnsupportedPayload("msgpack body but msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    if media == JSON_TYPE:
+        return json.loads(raw.decode("utf-8"))
+    raise UnsupportedPayload(f"Unsupported Content-Type: {media}")
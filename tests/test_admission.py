@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.core.admission import AdmissionGate, FairScheduler
+
+
+def gate(limit=1, queue_size=2, timeout=None):
+    return AdmissionGate("test", limit, queue_size, timeout, retry_after_s=5)
+
+
+# --------- AdmissionGate ---------
+def test_gate_admits_up_to_limit_then_queues_fifo():
+    async def main():
+        g = gate(limit=1, queue_size=2)
+        assert g.enter() is None
+        first, second = g.enter(), g.enter()
+        assert g.waiting == 2
+        g.release()
+        assert first.done() and not second.done()
+        assert g.in_use == 1
+        g.release()
+        assert second.done()
+        g.release()
+        assert g.in_use == 0
+    asyncio.run(main())
+
+
+def test_gate_rejects_with_429_when_queue_full():
+    async def main():
+        g = gate(limit=1, queue_size=1)
+        g.enter()
+        g.enter()
+        with pytest.raises(HTTPException) as exc:
+            g.enter()
+        assert exc.value.status_code == 429
+        assert exc.value.headers["Retry-After"] == "5"
+        assert g.stats()["rejected_full"] == 1
+    asyncio.run(main())
+
+
+def test_gate_times_out_with_503_and_frees_the_queue_spot():
+    async def main():
+        g = gate(limit=1, queue_size=1, timeout=0.01)
+        await g.acquire()
+        with pytest.raises(HTTPException) as exc:
+            await g.acquire()
+        assert exc.value.status_code == 503
+        assert g.waiting == 0
+        g.release()
+        assert g.in_use == 0
+    asyncio.run(main())
+
+
+def test_gate_cancelled_waiter_gives_its_turn_away():
+    async def main():
+        g = gate(limit=1, queue_size=2)
+        await g.acquire()
+        cancelled = asyncio.create_task(g.acquire())
+        waiting = asyncio.create_task(g.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        g.release()
+        await asyncio.wait_for(waiting, 1)
+        assert g.in_use == 1 and g.waiting == 0
+    asyncio.run(main())
+
+
+def test_gate_waiter_admitted_while_cancelled_releases_the_slot():
+    async def main():
+        g = gate(limit=1, queue_size=1)
+        await g.acquire()
+        waiter = asyncio.create_task(g.acquire())
+        await asyncio.sleep(0)
+        g.release()  # grants the waiter's ticket...
+        waiter.cancel()  # ...but it is cancelled before it runs
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert g.in_use == 0
+    asyncio.run(main())
+
+
+# --------- FairScheduler ---------
+async def _start(sched, lane, order):
+    async def call():
+        await sched.acquire(lane)
+        order.append(lane)
+    task = asyncio.create_task(call())
+    await asyncio.sleep(0)
+    return task
+
+
+def test_scheduler_serves_interactive_before_batch():
+    async def main():
+        s = FairScheduler(limit=1, batch_limit=1)
+        order = []
+        await s.acquire(None)
+        batch = await _start(s, "job-a", order)
+        interactive = await _start(s, None, order)
+        s.release(None)
+        await interactive
+        assert order == [None]
+        s.release(None)
+        await batch
+        assert order == [None, "job-a"]
+        assert s.batch_in_use == 1
+    asyncio.run(main())
+
+
+def test_scheduler_caps_batch_slots():
+    async def main():
+        s = FairScheduler(limit=3, batch_limit=2)
+        await s.acquire("job-a")
+        await s.acquire("job-a")
+        order = []
+        third = await _start(s, "job-a", order)
+        assert order == [] and s.in_use == 2
+        await s.acquire(None)  # the spare slot stays available to interactive calls
+        assert s.in_use == 3
+        s.release("job-a")
+        await third
+        assert s.batch_in_use == 2
+    asyncio.run(main())
+
+
+def test_scheduler_round_robins_between_jobs():
+    async def main():
+        s = FairScheduler(limit=1, batch_limit=1)
+        await s.acquire(None)
+        order = []
+        tasks = [await _start(s, lane, order) for lane in ("job-a", "job-a", "job-a", "job-b")]
+        for _ in tasks:
+            s.release(order[-1] if order else None)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["job-a", "job-b", "job-a", "job-a"]
+    asyncio.run(main())
+
+
+def test_scheduler_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        s = FairScheduler(limit=1, batch_limit=1)
+        await s.acquire(None)
+        order = []
+        cancelled = await _start(s, "job-a", order)
+        waiting = await _start(s, "job-b", order)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        s.release(None)
+        await waiting
+        assert order == ["job-b"]
+        assert s.in_use == 1 and s.batch_in_use == 1
+    asyncio.run(main())
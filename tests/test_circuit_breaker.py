@@ -0,0 +1,75 @@
+import pytest
+from fastapi import HTTPException
+
+from backend.clients.modal_client import CircuitBreaker
+
+
+def opened(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(breaker.before_call(), "boom")
+    assert breaker.state == "open"
+    return breaker
+
+
+def expire(breaker):
+    breaker.opened_at -= breaker.open_s + 1
+
+
+def test_consecutive_failures_open_the_breaker():
+    b = CircuitBreaker(failure_threshold=3, open_s=30, slow_call_s=10)
+    b.record_failure(b.before_call(), "boom")
+    b.record_failure(b.before_call(), "boom")
+    b.record_success(b.before_call(), 0.1)  # a success resets the count
+    assert b.failures == 0
+    opened(b)
+    assert b.transitions[-1]["to"] == "open"
+
+
+def test_open_breaker_rejects_with_retry_after():
+    b = opened(CircuitBreaker(failure_threshold=1, open_s=30, slow_call_s=10))
+    with pytest.raises(HTTPException) as exc:
+        b.before_call()
+    assert exc.value.status_code == 503
+    assert 1 <= int(exc.value.headers["Retry-After"]) <= 30
+    assert b.stats()["rejected"] == 1
+
+
+def test_half_open_trial_success_closes():
+    b = opened(CircuitBreaker(failure_threshold=1, open_s=30, slow_call_s=10))
+    expire(b)
+    assert b.before_call() is True
+    assert b.state == "half_open"
+    with pytest.raises(HTTPException):
+        b.before_call()  # one trial at a time
+    b.record_success(True, 0.1)
+    assert b.state == "closed"
+
+
+def test_half_open_trial_failure_reopens():
+    b = opened(CircuitBreaker(failure_threshold=1, open_s=30, slow_call_s=10))
+    expire(b)
+    b.record_failure(b.before_call(), "still down")
+    assert b.state == "open"
+    assert b.transitions[-1]["reason"].startswith("trial call failed")
+
+
+def test_abandoned_trial_frees_the_trial_slot():
+    b = opened(CircuitBreaker(failure_threshold=1, open_s=30, slow_call_s=10))
+    expire(b)
+    b.abandon(b.before_call())
+    assert b.before_call() is True
+
+
+def test_probe_success_moves_open_to_half_open():
+    b = opened(CircuitBreaker(failure_threshold=1, open_s=30, slow_call_s=10))
+    b.probe_succeeded()
+    assert b.state == "half_open"
+
+
+def test_slow_calls_are_judged_per_item():
+    b = CircuitBreaker(failure_threshold=1, open_s=30, slow_call_s=10)
+    b.record_success(b.before_call(), 80, items=16)  # a batch chunk, 5 s per item
+    assert b.state == "closed"
+    b.record_success(b.before_call(), 11)
+    assert b.state == "open"
+    assert b.stats()["slow_calls"] == 1
@@ -0,0 +1,28 @@
+import os
+
+from shared.parsing.content_hash import budget_tag, hash_bytes, hash_file, known_hash
+from shared.parsing.parse_cache import ParseCache
+
+
+def test_file_and_bytes_digests_match(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.4 one")
+    assert hash_file(path) == hash_bytes(b"%PDF-1.4 one")
+
+
+def test_known_hash_only_reports_the_current_contents(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.4 one")
+    assert known_hash(path) is None  # never read
+    digest = hash_file(path)
+    assert known_hash(path) == digest
+    path.write_bytes(b"%PDF-1.4 two!")
+    os.utime(path, ns=(0, 1))
+    assert known_hash(path) is None
+    assert hash_file(path) == hash_bytes(b"%PDF-1.4 two!")
+    assert known_hash(tmp_path / "missing.pdf") is None
+
+
+def test_cache_keys_share_the_budget_tag():
+    assert budget_tag() == "p0c0"
+    assert ParseCache.key("abc", 3, None) == f"abc-{budget_tag(3, None)}" == "abc-p3c0"
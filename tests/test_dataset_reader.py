@@ -0,0 +1,62 @@
+import io
+import json
+
+import pytest
+
+from backend.services import dataset_reader
+from backend.services.dataset_reader import DatasetError, _iter_json_array
+
+
+def items(text):
+    return list(_iter_json_array(io.StringIO(text)))
+
+
+@pytest.fixture
+def tiny_blocks(monkeypatch):
+    # Items straddle read blocks, exercising refills mid-token.
+    monkeypatch.setattr(dataset_reader, "READ_BLOCK_CHARS", 3)
+
+
+@pytest.mark.parametrize("block", ["tiny", "default"])
+def test_decodes_items_across_blocks(request, block):
+    if block == "tiny":
+        request.getfixturevalue("tiny_blocks")
+    data = [{"label": "a, [b]", "pdf_path": "x.pdf"}, 12, "s", {"nested": {"k": [1, 2]}}, None]
+    assert items(" \n" + json.dumps(data, indent=2)) == data
+
+
+def test_empty_array(tiny_blocks):
+    assert items("  [ ]  ") == []
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"a": 1}', r"must start with '\['"),
+    ("", r"must start with '\['"),
+    ('[{"a": 1}', "missing ']'"),
+    ('[{"a": 1} {"b": 2}]', "Expected ',' or ']'"),
+    ('[{"a": 1}, {"b": }]', "Invalid JSON"),
+])
+def test_malformed_arrays(tiny_blocks, text, message):
+    with pytest.raises(DatasetError, match=message):
+        items(text)
+
+
+def test_items_before_an_error_are_yielded(tiny_blocks):
+    reader = _iter_json_array(io.StringIO('[{"a": 1}, oops]'))
+    assert next(reader) == {"a": 1}
+    with pytest.raises(DatasetError):
+        next(reader)
+
+
+@pytest.mark.parametrize("number", ["12", "-3", "1.5", "2e10", "123456"])
+def test_number_split_by_a_block_boundary(tiny_blocks, number):
+    assert items(f"[{number}, {number}]") == [json.loads(number)] * 2
+
+
+def test_validate_dataset_reads_to_the_end(tmp_path):
+    path = tmp_path / "dataset.json"
+    path.write_text('[{"label": "a"}, {"label": "b"}]')
+    assert dataset_reader.validate_dataset(path) == 2
+    path.write_text('[{"label": "a"}, 12]')
+    with pytest.raises(DatasetError, match="Item 1"):
+        dataset_reader.validate_dataset(path)
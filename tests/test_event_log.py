@@ -0,0 +1,42 @@
+import asyncio
+
+from backend.models.event_log import EventLog
+
+
+def test_since_replays_after_last_event_id():
+    log = EventLog()
+    for n in range(3):
+        assert log.append({"n": n}) == n + 1
+    assert log.since(0) == [(1, {"n": 0}), (2, {"n": 1}), (3, {"n": 2})]
+    assert log.since(2) == [(3, {"n": 2})]
+    assert log.since(3) == []
+
+
+def test_resumed_log_continues_ids():
+    log = EventLog(start=5)
+    assert log.last_id == 5
+    log.append({"n": 0})
+    log.append({"n": 1})
+    assert log.last_id == 7
+    assert log.since(6) == [(7, {"n": 1})]
+    # ids from the previous run are gone: replay starts at the first id kept
+    assert log.since(2) == [(6, {"n": 0}), (7, {"n": 1})]
+
+
+def test_wait_wakes_every_subscriber_on_append():
+    async def main():
+        log = EventLog()
+        waiters = [asyncio.create_task(log.wait(0, timeout=1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        log.append({"type": "item_ok"})
+        assert await asyncio.gather(*waiters) == [True, True]
+    asyncio.run(main())
+
+
+def test_wait_returns_at_once_when_behind_and_false_on_timeout():
+    async def main():
+        log = EventLog(start=3)
+        log.append({})
+        assert await log.wait(3, timeout=0.01) is True
+        assert await log.wait(4, timeout=0.01) is False
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.models.job_model import BatchJob
+from backend.models.job_store import SQLiteJobStore
+from backend.services import batch_runner
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SQLiteJobStore(tmp_path / "jobs.sqlite3", ttl_s=3600, memory_ttl_s=3600)
+    yield s
+    s.close()
+
+
+def reopen(store):
+    """The same database as seen by the next backend process."""
+    store.close()
+    return SQLiteJobStore(store.path, store.ttl_s, store.memory_ttl_s)
+
+
+def run_interrupted_job(store, params):
+    """A 3-item job whose item 1 failed, stopped while running."""
+    job = BatchJob(id="job-1")
+    store.add(job, params)
+    items = [
+        (0, {"label": "a", "f": "x"}, {"index": 0, "status": "ok"}),
+        (1, {"label": "b", "f": None}, {"index": 1, "status": "error", "error": "boom"}),
+        (2, {"label": "c", "f": "z"}, {"index": 2, "status": "ok"}),
+    ]
+    job.filled_items = [None] * 3
+    for i, filled, meta in items:
+        job.filled_items[i] = filled
+        job.meta_items.append(meta)
+        job.events.append({"type": "item_ok" if meta["status"] == "ok" else "item_error", "index": i})
+    store.checkpoint(job, items)
+    return job
+
+
+def test_restart_marks_running_jobs_interrupted_and_keeps_items(store):
+    run_interrupted_job(store, {"json_path": "d.json"})
+    store = reopen(store)
+    job = store.get("job-1")
+    assert job.status == "interrupted"
+    assert job.processed == 3
+    assert job.filled_items[2] == {"label": "c", "f": "z"}
+    assert job.events.last_id == 3
+    assert store.params("job-1") == {"json_path": "d.json"}
+    store.close()
+
+
+def test_resumed_job_keeps_successes_and_continues_event_ids(store):
+    run_interrupted_job(store, {})
+    store = reopen(store)
+    resumed = store.get("job-1").resumed()
+    assert resumed.id == "job-1"
+    assert [m["index"] for m in resumed.meta_items] == [0, 2]
+    assert resumed.filled_items[1] is None
+    assert resumed.processed == 2
+    assert resumed.events.append({"type": "started"}) == 4
+    store.close()
+
+
+def finish(job, store):
+    job.finished_at = time.time()
+    store.finish(job)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "dataset.json"
+    path.write_text(json.dumps([{"label": "a", "extraction_schema": {}, "pdf_path": "a.pdf"}]))
+    return path
+
+
+@pytest.fixture
+def runner_store(store, monkeypatch):
+    started = []
+
+    async def fake_run(job, feed, root, **kwargs):
+        started.append(job)
+
+    monkeypatch.setattr(batch_runner, "get_job_store", lambda: store)
+    monkeypatch.setattr(batch_runner, "run_batch_job", fake_run)
+    return store, started
+
+
+def test_start_batch_job_resumes_from_the_store(runner_store, dataset, tmp_path):
+    store, started = runner_store
+    run_interrupted_job(store, {"json_path": str(dataset), "pdfs_root_path": str(tmp_path)})
+    finish(store.get("job-1"), store)
+    store._live.clear()  # only the database knows the job now
+
+    async def main():
+        job = batch_runner.start_batch_job(dataset, tmp_path, resume_job_id="job-1")
+        await job.task
+        return job
+    job = asyncio.run(main())
+    assert started == [job]
+    assert [m["index"] for m in job.meta_items] == [0, 2]
+    assert job.events.last_id == 3
+
+
+def test_start_batch_job_refuses_a_different_dataset(runner_store, dataset, tmp_path):
+    store, started = runner_store
+    run_interrupted_job(store, {"json_path": str(tmp_path / "other.json"), "pdfs_root_path": str(tmp_path)})
+    finish(store.get("job-1"), store)
+    with pytest.raises(HTTPException) as exc:
+        batch_runner.start_batch_job(dataset, tmp_path, resume_job_id="job-1")
+    assert exc.value.status_code == 409
+    assert "json_path" in exc.value.detail
+    assert started == []
+
+
+def test_start_batch_job_refuses_running_and_unknown_jobs(runner_store, dataset, tmp_path):
+    store, _ = runner_store
+    run_interrupted_job(store, {})
+    with pytest.raises(HTTPException) as exc:
+        batch_runner.start_batch_job(dataset, tmp_path, resume_job_id="job-1")
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        batch_runner.start_batch_job(dataset, tmp_path, resume_job_id="nope")
+    assert exc.value.status_code == 404
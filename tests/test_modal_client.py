@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from backend.clients import modal_client
+from backend.clients.modal_client import RemoteError
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    """Answers each request with the next status in `statuses`; records the calls."""
+    calls = []
+    statuses = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(statuses.pop(0) if len(statuses) > 1 else statuses[0], json={"ok": True})
+
+    monkeypatch.setattr(modal_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(modal_client, "_backoff", lambda attempt: 0)
+    return calls, statuses
+
+
+def send(method="GET", retries=3):
+    return asyncio.run(modal_client._send("http://remote", "/x", None, method, None, retries))
+
+
+@pytest.mark.parametrize("status", [400, 401, 404])
+def test_client_errors_are_not_retried(remote, status):
+    calls, statuses = remote
+    statuses.append(status)
+    with pytest.raises(HTTPException) as exc:
+        send()
+    assert not isinstance(exc.value, RemoteError)
+    assert calls == ["GET"]
+
+
+def test_server_error_outside_retry_statuses_is_not_retried(remote):
+    calls, statuses = remote
+    statuses.append(500)
+    with pytest.raises(RemoteError):
+        send()
+    assert calls == ["GET"]
+
+
+def test_retry_statuses_are_retried_until_success(remote):
+    calls, statuses = remote
+    statuses.extend([503, 429, 200])
+    assert send() == {"ok": True}
+    assert len(calls) == 3
+
+
+def test_retry_statuses_give_up_after_the_last_attempt(remote):
+    calls, statuses = remote
+    statuses.append(503)
+    with pytest.raises(RemoteError):
+        send(retries=2)
+    assert len(calls) == 3
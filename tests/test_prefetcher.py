@@ -0,0 +1,44 @@
+import asyncio
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+from backend.parsing import parse_pool
+from backend.parsing.parse_pool import PDFPrefetcher
+
+
+class FakeParseService:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, path):
+        self.submitted.append(path.name)
+        fut = Future()
+        fut.set_result(f"text of {path.name}")
+        return fut
+
+
+@pytest.fixture
+def service(monkeypatch):
+    svc = FakeParseService()
+    monkeypatch.setattr(parse_pool, "get_parse_service", lambda: svc)
+    return svc
+
+
+async def resolve(i):
+    return Path(f"{i}.pdf")
+
+
+def test_discard_drops_prefetched_and_skips_upcoming_items(service):
+    async def main():
+        prefetcher = PDFPrefetcher(10, resolve, depth=2)
+        prefetcher.discard(4)  # not reached yet: never parsed
+        assert await prefetcher.get(0) == "text of 0.pdf"
+        prefetcher.discard(1)  # prefetched but settled without get()
+        assert 1 not in prefetcher._futures
+        assert await prefetcher.get(3) == "text of 3.pdf"
+        assert "4.pdf" not in service.submitted
+        assert sorted(prefetcher._futures) == [2, 5]
+        prefetcher.close()
+    asyncio.run(main())
@@ -0,0 +1,29 @@
+import pytest
+
+from backend.core import wire as client
+from modal_endpoint_app.src.transport import wire as server
+from shared.transport.wire import JSON_TYPE, UnsupportedPayload
+
+PAYLOAD = {"items": [{"label": "é", "text": "x" * 2000}]}
+
+
+@pytest.mark.parametrize("fmt, compression", [("json", "none"), ("json", "gzip"), ("msgpack", "zstd")])
+def test_client_request_and_server_response_round_trip(monkeypatch, fmt, compression):
+    monkeypatch.setattr(client.settings, "WIRE_FORMAT", fmt)
+    monkeypatch.setattr(client.settings, "WIRE_COMPRESSION", compression)
+    body, headers = client.encode_body(PAYLOAD)
+    assert server.decode_request(body, headers["Content-Type"], headers.get("Content-Encoding")) == PAYLOAD
+
+    accept = client.accept_headers()
+    body, headers = server.encode_response(PAYLOAD, accept["Accept"], accept["Accept-Encoding"])
+    assert "Content-Encoding" in headers
+    assert client.decode_body(body, headers["Content-Type"], headers["Content-Encoding"]) == PAYLOAD
+
+
+def test_server_refuses_unknown_formats_and_encodings():
+    with pytest.raises(UnsupportedPayload):
+        server.decode_request(b"{}", "text/plain", None)
+    with pytest.raises(UnsupportedPayload):
+        server.decode_request(b"{}", JSON_TYPE, "br")
+    with pytest.raises(ValueError):
+        client.decode_body(b"{}", JSON_TYPE, "br")